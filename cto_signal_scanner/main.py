@@ -1,17 +1,37 @@
 import os
 import ssl
+import time
+import uuid
+import socket
+import argparse
 import logging
-import feedparser
+import threading
 from datetime import datetime, timedelta
 import json
 from pathlib import Path
+from concurrent.futures import Future
+from typing import Any, List, NamedTuple, Optional
+from urllib.parse import urljoin
 from cto_signal_scanner.utils.gpt_agent import GPTAgent
 from cto_signal_scanner.utils.feed_sources import FEEDS
 from cto_signal_scanner.utils.pdf_generator import ReportGenerator
+from cto_signal_scanner.utils.feed_fetcher import get_fetcher
+from cto_signal_scanner.utils.feed_cache import FeedCache, MAX_DAYS_BACK
+from cto_signal_scanner.utils.feed_parser import FeedEntry, get_parser_pool, parse_feed
+from cto_signal_scanner.utils.evaluation_pool import EvaluationPool
+from cto_signal_scanner.utils.response_cache import ResponseCache, namespace_fingerprint
+from cto_signal_scanner.utils.dedup import DedupIndex, canonicalize_url
+from cto_signal_scanner.utils.prefilter import RelevanceScorer, article_text, is_skipped
+from cto_signal_scanner.utils.text_prep import TextPreparer
+from cto_signal_scanner.utils.model_router import ModelRouter, tiered_routing_enabled
+from cto_signal_scanner.utils.single_flight import get_single_flight
+from cto_signal_scanner.utils.pipeline import Pipeline, Stage
+from cto_signal_scanner.utils.seen_index import SeenIndex
+from cto_signal_scanner.utils.article_store import ArticleStore
+from cto_signal_scanner.utils.scan_jobs import JobStore, JobWorkerPool
+from cto_signal_scanner.utils.work_queue import LeaseKeeper, open_work_queue
 from dotenv import load_dotenv
-import requests
 from bs4 import BeautifulSoup
-import xml.etree.ElementTree as ET
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -25,6 +45,15 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Cache setup
 CACHE_FILE = BASE_DIR / "processed_entries.json"
+FEED_CACHE_FILE = BASE_DIR / "feed_cache.json"
+GPT_CACHE_FILE = BASE_DIR / "gpt_cache.sqlite3"
+LEGACY_GPT_CACHE_FILE = BASE_DIR / "gpt_cache.json"
+ARTICLE_STORE_FILE = BASE_DIR / "articles.sqlite3"
+# Outside reports/, so the scheduler's reports do not count against ReportGenerator's retention
+PRECOMPUTED_REPORTS_DIR = BASE_DIR / "precomputed_reports"
+SCAN_JOBS_FILE = BASE_DIR / "scan_jobs.sqlite3"
+# Shared queue of distributed scans; nodes on several hosts need a URL they all reach
+WORK_QUEUE_URL = os.getenv('WORK_QUEUE_URL', f"sqlite://{BASE_DIR / 'work_queue.sqlite3'}")
 
 def clear_cache():
     """Clear the cache file."""
@@ -34,181 +63,1025 @@ def clear_cache():
 
 def load_cache():
     if CACHE_FILE.exists():
-        with open(CACHE_FILE, 'r') as f:
-            return json.load(f)
+        try:
+            with open(CACHE_FILE, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache {CACHE_FILE}: {str(e)}")
     return {}
 
 def save_cache(cache):
-    with open(CACHE_FILE, 'w') as f:
+    """Write the cache through a temporary file, so readers never see a partly written one."""
+    temp_file = CACHE_FILE.with_name(f"{CACHE_FILE.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(temp_file, 'w') as f:
         json.dump(cache, f)
+    os.replace(temp_file, CACHE_FILE)
 
-def parse_date(entry):
-    """Parse date from feed entry."""
-    date_fields = ['published_parsed', 'updated_parsed', 'created_parsed']
-    for field in date_fields:
-        if hasattr(entry, field) and getattr(entry, field):
-            return datetime(*getattr(entry, field)[:6])
-    return None
+# Serializes the read-merge-write of the seen-entry index between scans in this process
+_seen_index_lock = threading.Lock()
 
-def fetch_and_validate_feed(url):
-    """Fetch and validate feed content with better error handling."""
-    try:
-        # First try direct request to see what we're getting
-        response = requests.get(url)
-        response.raise_for_status()
-        content_type = response.headers.get('content-type', '').lower()
-        
-        if 'html' in content_type:
-            # Try to find the actual RSS feed URL from HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            feed_links = soup.find_all('link', type='application/rss+xml') or \
-                        soup.find_all('link', type='application/atom+xml')
-            
-            if feed_links:
-                actual_feed_url = feed_links[0].get('href')
-                if not actual_feed_url.startswith('http'):
-                    # Handle relative URLs
-                    actual_feed_url = f"{'/'.join(url.split('/')[:3])}{actual_feed_url}"
-                logger.info(f"Found actual feed URL: {actual_feed_url}")
-                return feedparser.parse(actual_feed_url)
-        
-        # Try parsing as RSS/Atom
-        feed = feedparser.parse(response.text)
-        if feed.entries:
-            return feed
-            
-        # If no entries found, try XML parsing
-        try:
-            root = ET.fromstring(response.text)
-            # Handle different XML structures
-            items = root.findall('.//item') or root.findall('.//{http://www.w3.org/2005/Atom}entry')
-            if items:
-                return feedparser.parse(response.text)
-        except ET.ParseError:
-            logger.error(f"XML parsing failed for {url}")
-            
+def store_seen_index(seen_index):
+    """
+    Save the seen-entry index, merged with the copy on disk first, so scans
+    that ran at the same time (web jobs, the scheduler, shard workers) keep
+    each other's entries.
+    """
+    with _seen_index_lock:
+        seen_index.merge(load_cache())
+        seen_index.prune()
+        save_cache(seen_index.to_dict())
+
+def discover_feed_url(url, html):
+    """Find the RSS/Atom feed advertised by an HTML landing page."""
+    soup = BeautifulSoup(html, 'html.parser')
+    feed_links = soup.find_all('link', type='application/rss+xml') or \
+                soup.find_all('link', type='application/atom+xml')
+    if not feed_links or not feed_links[0].get('href'):
+        return None
+    # Handle relative URLs
+    return urljoin(url, feed_links[0].get('href'))
+
+def parse_feed_response(url, response, feed_cache=None, cutoff_date=None, parser_pool=None):
+    """
+    Parse a downloaded feed body into FeedEntry records, answering unchanged
+    bodies from the cache. Parsing stops once entries are older than cutoff_date.
+    With a parser_pool, large bodies are parsed in its worker processes.
+    """
+    body_hash = FeedCache.content_hash(response.content)
+    if feed_cache and feed_cache.is_unchanged(url, body_hash):
+        logger.info(f"Feed content unchanged since last scan: {url}")
+        feed_cache.update(url, response.headers, body_hash)
+        return feed_cache.cached_entries(url)
+
+    if feed_cache:
+        # Cached entries must cover any window a later scan may ask for
+        horizon = datetime.utcnow() - timedelta(days=MAX_DAYS_BACK)
+        cutoff_date = min(cutoff_date, horizon) if cutoff_date else horizon
+
+    if parser_pool:
+        entries = parser_pool.parse(response.content, cutoff_date)
+    else:
+        entries = parse_feed(response.content, cutoff_date)
+    if entries is None:
         logger.error(f"Could not parse feed from {url}")
         return None
-        
+
+    if feed_cache:
+        feed_cache.update(url, response.headers, body_hash, entries)
+    return entries
+
+class FeedDownload(NamedTuple):
+    """A downloaded feed body, or the cached entries of a feed the server reported unchanged."""
+    url: str
+    response: Any = None
+    entries: Optional[List[FeedEntry]] = None
+
+def parse_download(url, download, feed_cache=None, cutoff_date=None, parser_pool=None):
+    """Parse a FeedDownload of the configured url into FeedEntry records, or None."""
+    if download.response is None:
+        return download.entries
+    return parse_feed_response(url, download.response, feed_cache, cutoff_date, parser_pool)
+
+def _download_feed(url, feed_url, fetcher, feed_cache=None, discover=True):
+    """
+    Download feed_url (the configured url or the feed discovered from it).
+    Validators are sent and discoveries cached against the configured url.
+    """
+    headers = feed_cache.request_headers(url) if feed_cache else {}
+    response = fetcher.get(feed_url, headers=headers)
+    if feed_cache and response.status_code == 304:
+        logger.info(f"Feed not modified since last scan: {url}")
+        feed_cache.mark_checked(url)
+        return FeedDownload(feed_url, entries=feed_cache.cached_entries(url))
+    response.raise_for_status()
+
+    content_type = response.headers.get('content-type', '').lower()
+    if discover and 'html' in content_type:
+        # Try to find the actual RSS feed URL from HTML
+        actual_feed_url = discover_feed_url(url, response.text)
+        if actual_feed_url:
+            logger.info(f"Found actual feed URL: {actual_feed_url}")
+            if feed_cache:
+                feed_cache.remember_discovery(url, actual_feed_url)
+            return _download_feed(url, actual_feed_url, fetcher, feed_cache, discover=False)
+
+    return FeedDownload(feed_url, response=response)
+
+def download_feed(url, fetcher=None, feed_cache=None):
+    """
+    Download a configured feed without parsing it, going straight to a
+    cached discovered feed URL when there is one. Returns a FeedDownload, or
+    None when the feed could not be downloaded.
+    """
+    fetcher = fetcher or get_fetcher()
+    try:
+        discovered_url = feed_cache.discovered_url(url) if feed_cache else None
+        if discovered_url:
+            try:
+                return _download_feed(url, discovered_url, fetcher, feed_cache, discover=False)
+            except Exception as e:
+                logger.warning(f"Cached feed URL {discovered_url} failed: {str(e)}")
+            logger.info(f"Re-discovering feed URL for {url}")
+            feed_cache.forget_discovery(url)
+
+        return _download_feed(url, url, fetcher, feed_cache)
+
     except Exception as e:
         logger.error(f"Error fetching feed {url}: {str(e)}")
         return None
 
-def load_gpt_cache():
-    """Load the GPT response cache."""
-    cache_file = BASE_DIR / "gpt_cache.json"
-    if cache_file.exists():
-        with open(cache_file, 'r') as f:
-            return json.load(f)
-    return {'prompt': '', 'responses': {}}
-
-def save_gpt_cache(cache):
-    """Save the GPT response cache."""
-    cache_file = BASE_DIR / "gpt_cache.json"
-    with open(cache_file, 'w') as f:
-        json.dump(cache, f)
+def open_gpt_cache():
+    """Open the GPT response cache, importing the legacy JSON cache on first use."""
+    is_new = not GPT_CACHE_FILE.exists()
+    cache = ResponseCache(GPT_CACHE_FILE)
+    if is_new:
+        cache.import_json(LEGACY_GPT_CACHE_FILE)
+    return cache
+
+def compact_gpt_cache():
+    """Evict stale GPT responses and shrink the cache file."""
+    cache = open_gpt_cache()
+    try:
+        removed = cache.compact()
+        logger.info(f"GPT cache compacted: {removed} entries removed, {len(cache)} kept")
+    finally:
+        cache.close()
+
+def _store_response(gpt_cache, cache_key, article=None):
+    """
+    Done-callback that writes an evaluation (with the article text it rated)
+    to the cache as soon as it finishes and releases the cross-process
+    claim on its key.
+    """
+    def store(future):
+        try:
+            if not future.cancelled() and future.exception() is None:
+                gpt_cache.put(cache_key, future.result(), article)
+        except Exception as e:
+            logger.error(f"Error caching GPT response: {str(e)}")
+        finally:
+            if gpt_cache.shared_lock:
+                gpt_cache.release(cache_key)
+    return store
+
+def _submit_evaluation(entry, cache_key, eval_pool, gpt_cache, on_result):
+    future = eval_pool.submit(entry.title, entry.summary, entry.link,
+                              on_partial=_publish_partial(entry, on_result) if on_result else None)
+    future.add_done_callback(_store_response(gpt_cache, cache_key, article_text(entry.title, entry.summary)))
+    return future
+
+def _await_claim(entry, cache_key, eval_pool, gpt_cache, on_result):
+    """Wait for another process's evaluation, evaluating here if its claim lapses without a result."""
+    result = gpt_cache.wait_for(cache_key)
+    if result is not None:
+        logger.info(f"Using evaluation from another process for: {entry.title}")
+        return result
+    gpt_cache.claim(cache_key)
+    future = _submit_evaluation(entry, cache_key, eval_pool, gpt_cache, on_result)
+    eval_pool.flush()
+    return future.result()
+
+def _start_evaluation(entry, cache_key, eval_pool, gpt_cache, on_result):
+    """
+    Start the evaluation of an uncached article. Runs inside the single-flight
+    group, so the cache is checked again in case a concurrent scan just
+    finished it. With a shared cache lock, an article another process is
+    evaluating is waited for instead of evaluated twice.
+    """
+    future = Future()
+    cached = gpt_cache.get(cache_key)
+    if cached is not None:
+        future.set_result(cached)
+        return future
+    if gpt_cache.shared_lock and not gpt_cache.claim(cache_key):
+        logger.info(f"Waiting for another process evaluating: {entry.title}")
+        return get_single_flight().run_waiter(_await_claim, entry, cache_key, eval_pool, gpt_cache, on_result)
+    return _submit_evaluation(entry, cache_key, eval_pool, gpt_cache, on_result)
+
+def build_result(entry, result):
+    """Combine a feed entry with its evaluation into a report result dict."""
+    return {
+        'title': entry.title,
+        'link': entry.link,
+        'summary': result.get('summary', ''),
+        'rating': result.get('rating', ''),
+        'rationale': result.get('rationale', ''),
+        'date': entry.published.isoformat()
+    }
+
+def _publish_result(entry, on_result):
+    """Done-callback that hands a finished evaluation to on_result."""
+    def publish(future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        try:
+            on_result(build_result(entry, future.result()), True)
+        except Exception as e:
+            logger.error(f"Error publishing result: {str(e)}", exc_info=True)
+    return publish
+
+def _publish_partial(entry, on_result):
+    """Streaming callback that hands a partially parsed evaluation to on_result."""
+    def publish(partial):
+        try:
+            on_result(build_result(entry, partial), False)
+        except Exception as e:
+            logger.error(f"Error publishing partial result: {str(e)}", exc_info=True)
+    return publish
+
+def resolve_duplicate(entry, cache_key, dedup_index, gpt_cache, pending):
+    """
+    Map an article to the cache key of an earlier near-duplicate (same
+    canonical URL or similar title and summary) whose evaluation is queued in
+    this scan or cached from history. New articles are indexed under their own key.
+    """
+    canonical_url = canonicalize_url(entry.link)
+    fingerprint = DedupIndex.fingerprint(entry.title, entry.summary)
+    duplicate_of = dedup_index.match(canonical_url, fingerprint)
+    if duplicate_of == cache_key:
+        return cache_key
+    if duplicate_of and (duplicate_of in pending or gpt_cache.get(duplicate_of) is not None):
+        logger.info(f"Near-duplicate article, reusing evaluation: {entry.title}")
+        return duplicate_of
+    dedup_index.add(cache_key, canonical_url, fingerprint, entry.title)
+    return cache_key
+
+def prepare_entry(entry, cutoff_date, text_prep=None):
+    """
+    Return (raw_key, entry) for an entry newer than cutoff_date, with its
+    summary reduced by text_prep, or None for entries that are too old or
+    undated. raw_key is the cache key of the unprepared entry.
+    """
+    entry_date = entry.published
+    if not entry_date:
+        logger.warning(f"Could not parse date for entry: {entry.title}")
+        return None
+
+    # Skip if entry is too old
+    if entry_date < cutoff_date:
+        return None
+
+    logger.info(f"Processing entry: {entry.title}")
+    # Responses cached before summaries were cleaned are keyed by the raw summary
+    raw_key = ResponseCache.cache_key(entry.title, entry.summary, entry.link)
+    if text_prep:
+        entry = entry._replace(summary=text_prep.prepare(entry.summary, entry.title))
+    return raw_key, entry
+
+def assign_cache_key(entry, gpt_cache, queued_keys, dedup_index=None):
+    """
+    Cache key of a prepared entry: its own, or that of a near-duplicate whose
+    evaluation is cached or among queued_keys.
+    """
+    # Create cache key from article content
+    cache_key = ResponseCache.cache_key(entry.title, entry.summary, entry.link)
+    if dedup_index:
+        cache_key = resolve_duplicate(entry, cache_key, dedup_index, gpt_cache, queued_keys)
+    return cache_key
+
+def create_prefilter(gpt_cache):
+    """
+    A RelevanceScorer trained on the cached ratings of the cache's current
+    namespace, with the prepared article text each rating was given for.
+    """
+    prefilter = RelevanceScorer()
+    if prefilter.enabled:
+        prefilter.train(gpt_cache.training_samples())
+    return prefilter
+
+def _hold_slot(in_flight, eval_pool):
+    # A partial batch holds evaluations that would otherwise free a slot
+    if not in_flight.acquire(blocking=False):
+        eval_pool.flush()
+        in_flight.acquire()
+
+def known_evaluation(entry, raw_key, cache_key, gpt_cache, prefilter=None, on_progress=None):
+    """
+    Return the evaluation of a prepared entry that needs no LLM call: its
+    cached result (also found under raw_key) or a skipped result from the
+    prefilter. Returns None when the entry has to be evaluated.
+    """
+    cached = gpt_cache.get(cache_key)
+    if cached is None and raw_key != cache_key:
+        cached = gpt_cache.get(raw_key)
+        if cached is not None:
+            gpt_cache.put(cache_key, cached, article_text(entry.title, entry.summary))
+    if cached is not None:
+        logger.info(f"Using cached GPT response for: {entry.title}")
+        if on_progress:
+            on_progress('cache_hits')
+        return cached
+
+    skip, prior = prefilter.should_skip(entry.title, entry.summary) \
+        if prefilter and prefilter.enabled else (False, None)
+    if skip:
+        # Not cached, so a later change of threshold re-evaluates it
+        logger.info(f"Skipping low-relevance entry (estimated {prior:.1f}): {entry.title}")
+        if on_progress:
+            on_progress('articles_skipped')
+        return prefilter.skipped_result(entry.summary, prior)
+    return None
+
+def queue_evaluation(entry, raw_key, cache_key, eval_pool, gpt_cache, pending, prefilter=None, on_result=None,
+                     in_flight=None, on_progress=None):
+    """
+    Return a Future for the evaluation of a prepared entry: its cached result,
+    an evaluation already pending in this scan, a skipped result from the
+    prefilter, or a new evaluation. A new evaluation holds one of the
+    in_flight semaphore's slots until it finishes, blocking while none are free.
+    on_progress(event), if given, is told about cache hits and skipped entries.
+    """
+    known = None if cache_key in pending else \
+        known_evaluation(entry, raw_key, cache_key, gpt_cache, prefilter, on_progress)
+    if known is not None:
+        future = Future()
+        future.set_result(known)
+    elif cache_key in pending:
+        future = pending[cache_key]
+    else:
+        if in_flight is not None:
+            _hold_slot(in_flight, eval_pool)
+        # Get new evaluation from GPT, cached as soon as it completes; an
+        # evaluation of the same article under the same prompt and model
+        # already running in another scan is joined
+        future, shared = get_single_flight().do(
+            (gpt_cache.namespace, cache_key),
+            lambda: _start_evaluation(entry, cache_key, eval_pool, gpt_cache, on_result)
+        )
+        if shared:
+            logger.info(f"Joining in-flight evaluation from another scan: {entry.title}")
+        if in_flight is not None:
+            if shared:
+                in_flight.release()
+            else:
+                future.add_done_callback(lambda done: in_flight.release())
+        pending[cache_key] = future
+    if on_result:
+        future.add_done_callback(_publish_result(entry, on_result))
+    return future
+
+def collect_results(queued):
+    """Wait for queued evaluations and build result dicts in queue order."""
+    results = []
+    for entry, cache_key, future in queued:
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"Error evaluating post: {str(e)}", exc_info=True)
+            continue
+        
+        # Add to results
+        results.append(build_result(entry, result))
+    return results
+
+def _report_evaluated(on_progress):
+    """Done-callback that counts a finished evaluation."""
+    def report(future):
+        if not future.cancelled() and future.exception() is None:
+            on_progress('articles_evaluated')
+    return report
+
+def was_skipped(future):
+    """Whether a queued evaluation finished with a pre-filter estimate instead of a model result."""
+    return future.done() and not future.cancelled() and future.exception() is None and is_skipped(future.result())
+
+def remember_results(seen_index, feed_url, queued):
+    """
+    Record the finished evaluations of a feed's queued entries in the
+    seen-entry index. Entries the pre-filter skipped are left out, so later
+    scans score them again.
+    """
+    for entry, cache_key, future in queued:
+        if future.done() and not future.cancelled() and future.exception() is None \
+                and not is_skipped(future.result()):
+            seen_index.add(entry, feed_url, build_result(entry, future.result()))
+
+class FeedStages:
+    """
+    The feed side of a scan, for a Pipeline: fetch -> parse -> filter ->
+    dedup -> route -> sink. Each stage is a method taking one item, so it
+    can be run, replaced or tested on its own. The route stage, passed to
+    stages(), decides what becomes of each deduplicated article and hands
+    the sink (url, position, value); nothing here evaluates, so shard
+    workers run these stages without an evaluation pool. Entries carry
+    their position in their feed, and queued() reports a feed's values in
+    feed order whatever order they finished in.
+    """
+
+    def __init__(self, cutoff_date, gpt_cache, feed_cache=None, dedup_index=None, text_prep=None, fetcher=None,
+                 seen_index=None, on_progress=None, parser_pool=None):
+        """
+        Initialize the stages.
+
+        Args:
+            cutoff_date: Entries published before this are dropped
+            gpt_cache: Response cache, namespaced for the agent
+            feed_cache: HTTP validators and parsed entries of each feed
+            dedup_index: Near-duplicate index; without it only identical articles share an evaluation
+            text_prep: Summary cleaner run by the filter stage
+            fetcher: Fetcher for downloads; its worker count sizes the fetch stage
+            seen_index: For incremental scans, entries the filter stage drops as already handled
+            on_progress: Called as on_progress(event, count=1) with the scan's progress
+                (feeds fetched or failed, articles found, evaluated, cached or skipped)
+            parser_pool: Processes the parse stage hands feed bodies to; its worker count sizes the stage
+        """
+        self.cutoff_date = cutoff_date
+        self.gpt_cache = gpt_cache
+        self.feed_cache = feed_cache
+        self.dedup_index = dedup_index
+        self.text_prep = text_prep
+        self.seen_index = seen_index
+        self.on_progress = on_progress
+        self.already_seen = 0
+        self.failed_feeds = 0
+        self.fetcher = fetcher or get_fetcher()
+        self.parser_pool = parser_pool or get_parser_pool()
+        # Keys the dedup stage has passed on to the route stage
+        self.routed_keys = set()
+        self.queued_by_feed = {}
+
+    def fetch(self, url):
+        logger.info(f"Processing feed: {url}")
+        download = download_feed(url, self.fetcher, self.feed_cache)
+        if download is None:
+            logger.warning(f"Could not fetch or parse feed: {url}")
+            self._feed_failed()
+            return None
+        return url, download
+
+    def parse(self, item):
+        url, download = item
+        entries = parse_download(url, download, self.feed_cache, self.cutoff_date, self.parser_pool)
+        if entries is None:
+            logger.warning(f"Could not fetch or parse feed: {url}")
+            self._feed_failed()
+            if self.feed_cache and download.url != url:
+                # Find the feed again on the next scan
+                self.feed_cache.forget_discovery(url)
+            return None
+        logger.info(f"Feed parsed, found {len(entries)} recent entries")
+        self._report('feeds_fetched')
+        return url, entries
 
-def fetch_and_process_feeds(days_back=7):
-    """Fetch and process feeds for the specified number of days back."""
-    cutoff_date = datetime.now() - timedelta(days=days_back)
+    def filter(self, item):
+        url, entries = item
+        prepared = []
+        for position, entry in enumerate(entries):
+            try:
+                if self.seen_index is not None and self.seen_index.is_seen(entry):
+                    self.already_seen += 1
+                    continue
+                kept = prepare_entry(entry, self.cutoff_date, self.text_prep)
+                if kept is not None:
+                    prepared.append((url, position) + kept)
+            except Exception as e:
+                logger.error(f"Error processing entry: {str(e)}", exc_info=True)
+        if prepared:
+            self._report('articles_found', len(prepared))
+        return prepared
+
+    def dedup(self, item):
+        url, position, raw_key, entry = item
+        cache_key = assign_cache_key(entry, self.gpt_cache, self.routed_keys, self.dedup_index)
+        self.routed_keys.add(cache_key)
+        return url, position, raw_key, cache_key, entry
+
+    def sink(self, item):
+        url, position, queued = item
+        self.queued_by_feed.setdefault(url, []).append((position, queued))
+
+    def _feed_failed(self):
+        self.failed_feeds += 1
+        self._report('feeds_failed')
+
+    def _report(self, event, count=1):
+        if self.on_progress:
+            self.on_progress(event, count)
+
+    def stages(self, route):
+        # Only fetching waits on the network and parsing on the parser processes
+        return [
+            Stage('fetch', self.fetch, workers=self.fetcher.max_workers),
+            Stage('parse', self.parse, workers=self.parser_pool.workers),
+            Stage('filter', self.filter, fan_out=True),
+            Stage('dedup', self.dedup),
+            route,
+            Stage('sink', self.sink),
+        ]
+
+    def queued(self, url):
+        """Values the route stage produced for a feed, in feed order."""
+        return [queued for _, queued in sorted(self.queued_by_feed.get(url, []), key=lambda item: item[0])]
+
+class ScanStages(FeedStages):
+    """
+    The stages of a scan: the feed stages, routed through an evaluate stage
+    that queues each article on an EvaluationPool, so queued() reports
+    (entry, cache_key, future) tuples.
+    """
+
+    def __init__(self, cutoff_date, eval_pool, gpt_cache, feed_cache=None, dedup_index=None, prefilter=None,
+                 text_prep=None, on_result=None, fetcher=None, max_in_flight=None, seen_index=None,
+                 on_progress=None, parser_pool=None):
+        """
+        Initialize the stages.
+
+        Args:
+            cutoff_date: Entries published before this are dropped
+            eval_pool: Pool the evaluate stage submits to
+            gpt_cache: Response cache, namespaced for the agent
+            feed_cache: HTTP validators and parsed entries of each feed
+            dedup_index: Near-duplicate index; without it only identical articles share an evaluation
+            prefilter: Relevance scorer that may skip uncached articles
+            text_prep: Summary cleaner run by the filter stage
+            on_result: Called as on_result(result, final) with each finished result and with
+                partial results of streamed evaluations
+            fetcher: Fetcher for downloads; its worker count sizes the fetch stage
+            max_in_flight: Evaluations queued or running before the evaluate stage
+                blocks (PIPELINE_MAX_IN_FLIGHT, default twice the pool's workers)
+            seen_index: For incremental scans, entries the filter stage drops as already handled
+            on_progress: Called as on_progress(event, count=1) with the scan's progress
+                (feeds fetched or failed, articles found, evaluated, cached or skipped)
+            parser_pool: Processes the parse stage hands feed bodies to; its worker count sizes the stage
+        """
+        super().__init__(cutoff_date, gpt_cache, feed_cache, dedup_index, text_prep, fetcher=fetcher,
+                         seen_index=seen_index, on_progress=on_progress, parser_pool=parser_pool)
+        self.eval_pool = eval_pool
+        self.prefilter = prefilter
+        self.on_result = on_result
+        max_in_flight = max_in_flight or int(os.getenv('PIPELINE_MAX_IN_FLIGHT', 2 * eval_pool.max_workers))
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.pending = {}
+
+    def evaluate(self, item):
+        url, position, raw_key, cache_key, entry = item
+        future = queue_evaluation(entry, raw_key, cache_key, self.eval_pool, self.gpt_cache, self.pending,
+                                  self.prefilter, self.on_result, self.in_flight, self.on_progress)
+        if self.on_progress:
+            future.add_done_callback(_report_evaluated(self.on_progress))
+        return url, position, (entry, cache_key, future)
+
+    def stages(self, route=None):
+        # The evaluate stage just queues work; LLM concurrency is the EvaluationPool's
+        return super().stages(route or Stage('evaluate', self.evaluate))
+
+def create_scan_agent():
+    """The agent scans evaluate with: a ModelRouter with tiered routing, otherwise a GPTAgent."""
+    return ModelRouter() if tiered_routing_enabled() else GPTAgent()
+
+def scan_namespace(gpt_agent):
+    """Fingerprint of an agent's prompt, model and system message, under which its results are stored."""
+    return namespace_fingerprint(gpt_agent.get_current_prompt(), gpt_agent.model, gpt_agent.system_message)
+
+def report_windows():
+    """Days back of the reports precomputed by the scheduler (REPORT_WINDOWS, default 1,7,14,30)."""
+    return sorted({int(days) for days in os.getenv('REPORT_WINDOWS', '1,7,14,30').split(',') if days.strip()})
+
+def write_report(pdf_gen, results):
+    """Add the results to the report and generate the PDF, returning its path."""
+    for result in results:
+        pdf_gen.add_article(
+            title=result['title'],
+            link=result['link'],
+            summary=result['summary'],
+            rating=result['rating'],
+            rationale=result['rationale']
+        )
+    return pdf_gen.generate()
+
+def fetch_and_process_feeds(days_back=7, on_result=None, incremental=None, max_age=None, cancel=None,
+                            on_progress=None, on_namespace=None):
+    """
+    Fetch and process feeds for the specified number of days back.
+    on_result(result, final), if given, receives each article result as soon
+    as it is available (final=False for streamed partial results), from
+    worker threads and in completion order.
+    An incremental scan (SCAN_INCREMENTAL, default false) evaluates only
+    entries missing from the seen-entry index and merges in the stored
+    results of the others, newest first within each feed.
+    When a scan of the same feeds and evaluation setup covered the window
+    within max_age minutes (ARTICLE_STORE_MAX_AGE, default 60; 0 forces a
+    scan), the results are answered from the article store instead.
+    Setting the cancel Event stops the scan; evaluations already finished
+    are still returned. on_progress(event, count=1), if given, is called with
+    the scan's progress counters as they change (see ScanStages).
+    on_namespace(namespace), if given, is called with the fingerprint of the
+    evaluation setup the results are stored under in the article store.
+    """
+    if incremental is None:
+        incremental = os.getenv('SCAN_INCREMENTAL', 'false').lower() in ('true', '1', 'yes')
+    # Feed dates are normalized to UTC
+    cutoff_date = datetime.utcnow() - timedelta(days=days_back)
     logger.info(f"Looking for posts since: {cutoff_date.strftime('%Y-%m-%d')}")
     
     # Initialize PDF generator and GPT agent
     pdf_gen = ReportGenerator()
-    gpt_agent = GPTAgent()
+    # With tiered routing a local model rates everything and only ambiguous
+    # articles are re-evaluated remotely
+    gpt_agent = create_scan_agent()
     pdf_gen.add_header(days_back)
+
+    namespace = scan_namespace(gpt_agent)
+    if on_namespace:
+        on_namespace(namespace)
+    # The store is only held open while it is read here and written back once
+    # the scan has finished, so a failure in between cannot leak its connection
+    article_store = ArticleStore(ARTICLE_STORE_FILE, max_age_minutes=max_age)
+    try:
+        fresh = article_store.is_fresh(namespace, FEEDS, cutoff_date)
+        results = article_store.window(namespace, cutoff_date, FEEDS) if fresh else None
+    finally:
+        article_store.close()
+    if fresh:
+        logger.info(f"Window since {cutoff_date.strftime('%Y-%m-%d')} is covered by a recent scan, "
+                    f"answering from the article store")
+        if on_progress:
+            on_progress('articles_found', len(results))
+            on_progress('articles_evaluated', len(results))
+        if on_result:
+            for result in results:
+                on_result(result, True)
+        return results, write_report(pdf_gen, results)
+
+    # Load a local model while the feeds are fetched rather than on the first evaluation
+    threading.Thread(target=gpt_agent.warm_up, name='llm-warm-up', daemon=True).start()
     
-    # Load GPT cache
-    gpt_cache = load_gpt_cache()
-    current_prompt = gpt_agent.get_current_prompt()
+    # Load HTTP validators and GPT cache
+    feed_cache = FeedCache(FEED_CACHE_FILE)
+    gpt_cache = open_gpt_cache()
     
-    # Check if we need to invalidate cache
-    if gpt_cache['prompt'] != current_prompt:
-        logger.info("Prompt changed, invalidating GPT cache")
-        gpt_cache = {'prompt': current_prompt, 'responses': {}}
+    # Responses are namespaced by prompt, model and system message, so changing
+    # any of them starts a fresh namespace without discarding the others
+    gpt_cache.use_namespace(gpt_agent.get_current_prompt(), gpt_agent.model, gpt_agent.system_message)
+    dedup_index = DedupIndex(GPT_CACHE_FILE)
+    seen_index = SeenIndex(load_cache(), gpt_cache.namespace)
+    stored_by_feed = {url: seen_index.results(url, cutoff_date) for url in FEEDS} if incremental else {}
     
-    # Initialize empty results list
-    results = []
+    text_prep = TextPreparer()
+    
+    # Local relevance estimate, learned from this namespace's cached ratings
+    prefilter = create_prefilter(gpt_cache)
+    
+    # Evaluations are queued per feed as each feed arrives and collected in
+    # FEEDS order afterwards, so the report order does not depend on timing
+    feed_results = {}
+    # Links of pre-filter estimates, kept out of the article store like the seen-entry index
+    skipped_links = {}
+    # Native Ollama serves OLLAMA_NUM_PARALLEL requests at once; more would only queue there
+    eval_pool = EvaluationPool(gpt_agent, max_workers=gpt_agent.parallel or None)
+    stages = ScanStages(cutoff_date, eval_pool, gpt_cache, feed_cache, dedup_index, prefilter, text_prep, on_result,
+                        seen_index=seen_index if incremental else None, on_progress=on_progress)
+    pipeline = Pipeline(stages.stages(), cancel_event=cancel)
     
+    complete = False
     logger.info("Starting feed processing")
     try:
+        if on_progress:
+            stored = sum(len(results) for results in stored_by_feed.values())
+            on_progress('feeds_total', len(FEEDS))
+            on_progress('articles_found', stored)
+            on_progress('articles_evaluated', stored)
+        if on_result:
+            for result in (result for url in FEEDS for result in stored_by_feed.get(url, [])):
+                on_result(result, True)
+        pipeline.run(FEEDS)
+        eval_pool.flush()
+        pipeline.log_stats()
+        if pipeline.cancelled:
+            logger.info("Scan cancelled, dropping evaluations that have not finished")
+            eval_pool.shutdown(wait=False)
+        logger.info(f"Article summaries prepared: ~{text_prep.tokens_in} tokens reduced to "
+                    f"~{text_prep.tokens_out} (~{text_prep.tokens_saved} saved)")
+        if prefilter.enabled:
+            logger.info(f"Pre-filter skipped {prefilter.skipped} of {prefilter.scored} uncached articles, "
+                        f"saving {prefilter.skipped} LLM calls")
+        if incremental:
+            logger.info(f"Incremental scan: {stages.already_seen} entries seen before, "
+                        f"{sum(len(stored) for stored in stored_by_feed.values())} stored results in the window")
+        failed_evaluations = 0
         for url in FEEDS:
-            logger.info(f"Processing feed: {url}")
-            try:
-                feed = fetch_and_validate_feed(url)
-                if not feed:
-                    logger.warning(f"Could not fetch or parse feed: {url}")
-                    continue
-                    
-                logger.info(f"Feed parsed, found {len(feed.entries)} entries")
-                
-                for entry in feed.entries:
-                    try:
-                        entry_date = parse_date(entry)
-                        if not entry_date:
-                            logger.warning(f"Could not parse date for entry: {entry.title}")
-                            continue
-                            
-                        # Skip if entry is too old
-                        if entry_date < cutoff_date:
-                            continue
-                        
-                        logger.info(f"Processing entry: {entry.title}")
-                        try:
-                            # Create cache key from article content
-                            cache_key = f"{entry.title}:{entry.summary}:{entry.link}"
-                            
-                            # Check cache first
-                            if cache_key in gpt_cache['responses']:
-                                logger.info(f"Using cached GPT response for: {entry.title}")
-                                result = gpt_cache['responses'][cache_key]
-                            else:
-                                # Get new evaluation from GPT
-                                result = gpt_agent.evaluate_post(entry.title, entry.summary, entry.link)
-                                # Cache the response
-                                gpt_cache['responses'][cache_key] = result
-                            
-                            # Add to results
-                            results.append({
-                                'title': entry.title,
-                                'link': entry.link,
-                                'summary': result['summary'],
-                                'rating': result['rating'],
-                                'rationale': result['rationale'],
-                                'date': entry_date.isoformat()
-                            })
-                            
-                            # Add to PDF
-                            pdf_gen.add_article(
-                                title=entry.title,
-                                link=entry.link,
-                                summary=result['summary'],
-                                rating=result['rating'],
-                                rationale=result['rationale']
-                            )
-                        except Exception as e:
-                            logger.error(f"Error evaluating post: {str(e)}", exc_info=True)
-                            continue
-                    except Exception as e:
-                        logger.error(f"Error processing entry: {str(e)}", exc_info=True)
-                        continue
-            except Exception as e:
-                logger.error(f"Error processing feed {url}: {str(e)}", exc_info=True)
-                continue
+            queued = stages.queued(url)
+            if pipeline.cancelled:
+                queued = [item for item in queued if item[2].done() and not item[2].cancelled()]
+            feed_results[url] = collect_results(queued)
+            skipped_links[url] = {entry.link for entry, _, future in queued if was_skipped(future)}
+            remember_results(seen_index, url, queued)
+            evaluated = len(feed_results[url])
+            if incremental:
+                merged = feed_results[url] + stored_by_feed.get(url, [])
+                feed_results[url] = sorted(merged, key=lambda result: result['date'], reverse=True)
+            failed_evaluations += len(queued) - evaluated
+        # Only a scan without failed feeds or evaluations keeps its window fresh
+        complete = failed_evaluations == 0 and stages.failed_feeds == 0 and not pipeline.cancelled
     except Exception as e:
         logger.error(f"Main process error: {str(e)}", exc_info=True)
+        eval_pool.shutdown(wait=False)
         raise  # Re-raise the exception to be caught by the web app
     finally:
         try:
-            # Save GPT cache
-            save_gpt_cache(gpt_cache)
+            eval_pool.shutdown()
+            if isinstance(gpt_agent, ModelRouter):
+                gpt_agent.log_stats()
+            # Save caches; GPT responses were written as they completed
+            feed_cache.save()
+            gpt_cache.evict()
+            gpt_cache.close()
+            dedup_index.prune()
+            dedup_index.close()
+            store_seen_index(seen_index)
+            article_store = ArticleStore(ARTICLE_STORE_FILE)
+            try:
+                for url in FEEDS:
+                    article_store.add_results(namespace, url, [result for result in feed_results.get(url, [])
+                                                               if result['link'] not in skipped_links.get(url, ())])
+                if complete:
+                    article_store.record_scan(namespace, FEEDS, cutoff_date)
+                article_store.prune(float(os.getenv('ARTICLE_STORE_HISTORY_DAYS', 365)))
+            finally:
+                article_store.close()
+            results = [result for url in FEEDS for result in feed_results.get(url, [])]
             # Generate PDF
-            pdf_path = pdf_gen.generate()
+            pdf_path = write_report(pdf_gen, results)
             return results, pdf_path
         except Exception as e:
             logger.error(f"Error in final steps: {str(e)}", exc_info=True)
             raise  # Re-raise the exception to be caught by the web app
 
+def precompute_reports(namespace, windows=None):
+    """
+    Build the results and PDF report of each window from the article
+    store, so they can be served without a scan. Each window has one PDF in
+    PRECOMPUTED_REPORTS_DIR, replaced by every run. Returns the number of
+    articles per window.
+    """
+    windows = windows or report_windows()
+    counts = {}
+    PRECOMPUTED_REPORTS_DIR.mkdir(exist_ok=True)
+    store = ArticleStore(ARTICLE_STORE_FILE)
+    try:
+        for days_back in windows:
+            results = store.window(namespace, datetime.utcnow() - timedelta(days=days_back), FEEDS)
+            output_path = PRECOMPUTED_REPORTS_DIR / f"tech_report_{days_back}d.pdf"
+            # Written beside the previous report and swapped in, so it is never served half-written
+            partial_path = output_path.with_suffix('.pdf.tmp')
+            pdf_gen = ReportGenerator(output_path=partial_path)
+            pdf_gen.add_header(days_back)
+            write_report(pdf_gen, results)
+            os.replace(partial_path, output_path)
+            store.save_report(namespace, FEEDS, days_back, results, str(output_path))
+            counts[days_back] = len(results)
+    finally:
+        store.close()
+    return counts
+
+def run_scan_job(params, on_result, cancel, on_progress=None):
+    """Run a queued scan job (see JobWorkerPool)."""
+    return fetch_and_process_feeds(
+        params['days_back'], on_result=on_result, incremental=params.get('incremental'),
+        max_age=0 if params.get('force') else None, cancel=cancel, on_progress=on_progress
+    )
+
+def run_scan_worker():
+    """Run queued scan jobs until interrupted, alongside or instead of the web app's workers."""
+    store = JobStore(SCAN_JOBS_FILE)
+    logger.info(f"Scan worker waiting for jobs in {SCAN_JOBS_FILE}")
+    try:
+        JobWorkerPool(store, run_scan_job).run_forever()
+    finally:
+        store.close()
+
+def entry_payload(entry):
+    """A FeedEntry as JSON-serializable data, for work queue tasks."""
+    return {
+        'title': entry.title,
+        'link': entry.link,
+        'summary': entry.summary,
+        'published': entry.published.isoformat() if entry.published else None,
+        'guid': entry.guid
+    }
+
+def entry_from_payload(payload):
+    published = datetime.fromisoformat(payload['published']) if payload['published'] else None
+    return FeedEntry(payload['title'], payload['link'], payload['summary'], published, payload.get('guid', ''))
+
+def start_distributed_scan(work_queue, days_back=7, feeds=None, shard_size=None):
+    """Queue the feeds of a scan as shard tasks of a new run and return the run ID."""
+    feeds = list(feeds if feeds is not None else FEEDS)
+    shard_size = shard_size or int(os.getenv('SCAN_SHARD_SIZE', 4))
+    run_id = uuid.uuid4().hex
+    for index, start in enumerate(range(0, len(feeds), shard_size)):
+        work_queue.put(run_id, 'shard', str(index), {'feeds': feeds[start:start + shard_size], 'days_back': days_back})
+    logger.info(f"Queued distributed scan {run_id}: {len(feeds)} feeds in shards of {shard_size}")
+    return run_id
+
+class ShardWorker:
+    """
+    One scanner node of a distributed scan. A shard task runs the fetch,
+    parse, filter and dedup stages for its feeds; articles without a cached
+    or skipped result are queued as evaluate tasks (one per cache key, so
+    an article in several shards is evaluated once), which any node
+    evaluates through its EvaluationPool. Heartbeats keep the leases of
+    the tasks a node is working on, so tasks of a node that dies are
+    claimed again by the others.
+    """
+
+    def __init__(self, work_queue, worker_id=None, poll_interval=1.0):
+        """
+        Initialize the worker.
+
+        Args:
+            work_queue: Queue shared by the nodes
+            worker_id: Name of this node in task leases; defaults to host, process and a random suffix
+            poll_interval: Seconds between claims while there is no work
+        """
+        self.work_queue = work_queue
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.poll_interval = poll_interval
+        self._evaluating = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def run(self, run_id=None, stop=None):
+        """
+        Work on tasks until the stop Event is set, or, with a run_id, on the
+        tasks of that run until none are left unfinished.
+        """
+        gpt_agent = create_scan_agent()
+        gpt_cache = open_gpt_cache()
+        gpt_cache.use_namespace(gpt_agent.get_current_prompt(), gpt_agent.model, gpt_agent.system_message)
+        dedup_index = DedupIndex(GPT_CACHE_FILE)
+        feed_cache = FeedCache(FEED_CACHE_FILE)
+        prefilter = create_prefilter(gpt_cache)
+        eval_pool = EvaluationPool(gpt_agent, max_workers=gpt_agent.parallel or None)
+        lease = LeaseKeeper(self.work_queue, self.worker_id, self.work_queue.lease_seconds / 3)
+        max_evaluating = 2 * eval_pool.max_workers
+        logger.info(f"Shard worker {self.worker_id} started")
+        try:
+            while not (stop and stop.is_set()):
+                if run_id and not self.work_queue.unfinished(run_id):
+                    break
+                # Evaluations first, so queued articles drain before more feeds are
+                # fetched; a shard is taken while the evaluation slots are full
+                tasks = []
+                capacity = max_evaluating - self._evaluating
+                if capacity > 0:
+                    tasks = self.work_queue.claim(self.worker_id, limit=capacity, kinds=['evaluate'], run_id=run_id)
+                if not tasks:
+                    tasks = self.work_queue.claim(self.worker_id, kinds=['shard'], run_id=run_id)
+                if not tasks:
+                    self._wake.wait(self.poll_interval)
+                    self._wake.clear()
+                    continue
+                for task in tasks:
+                    lease.hold(task.id)
+                    if task.kind == 'shard':
+                        self._run_shard(task, lease, gpt_cache, feed_cache, dedup_index, prefilter)
+                    else:
+                        self._evaluate(task, lease, eval_pool, gpt_cache)
+                eval_pool.flush()
+        finally:
+            eval_pool.shutdown()
+            lease.stop()
+            if isinstance(gpt_agent, ModelRouter):
+                gpt_agent.log_stats()
+            feed_cache.save()
+            gpt_cache.close()
+            dedup_index.close()
+            logger.info(f"Shard worker {self.worker_id} stopped")
+
+    def _run_shard(self, task, lease, gpt_cache, feed_cache, dedup_index, prefilter):
+        feeds = task.payload['feeds']
+        cutoff_date = datetime.utcnow() - timedelta(days=task.payload['days_back'])
+        try:
+            stages = FeedStages(cutoff_date, gpt_cache, feed_cache, dedup_index, TextPreparer())
+
+            def route(item):
+                url, position, raw_key, cache_key, entry = item
+                known = known_evaluation(entry, raw_key, cache_key, gpt_cache, prefilter)
+                if known is None:
+                    self.work_queue.put(task.run_id, 'evaluate', cache_key, {'entry': entry_payload(entry)})
+                return url, position, {'entry': entry_payload(entry), 'cache_key': cache_key, 'evaluation': known}
+
+            Pipeline(stages.stages(Stage('route', route))).run(feeds)
+            result = {'feeds': {url: stages.queued(url) for url in feeds}, 'failed_feeds': stages.failed_feeds}
+            if not self.work_queue.complete(self.worker_id, task.id, result):
+                logger.warning(f"Lost the lease of shard {task.key}, its result was dropped")
+        except Exception as e:
+            logger.error(f"Error scanning shard {task.key}: {str(e)}", exc_info=True)
+            self.work_queue.fail(self.worker_id, task.id, str(e))
+        finally:
+            lease.release(task.id)
+
+    def _evaluate(self, task, lease, eval_pool, gpt_cache):
+        cached = gpt_cache.get(task.key)
+        if cached is not None:
+            self.work_queue.complete(self.worker_id, task.id, cached)
+            lease.release(task.id)
+            return
+        entry = entry_from_payload(task.payload['entry'])
+        with self._lock:
+            self._evaluating += 1
+        future = eval_pool.submit(entry.title, entry.summary, entry.link)
+        future.add_done_callback(lambda done: self._finish_evaluation(task, lease, gpt_cache, done))
+
+    def _finish_evaluation(self, task, lease, gpt_cache, future):
+        try:
+            if future.cancelled():
+                self.work_queue.fail(self.worker_id, task.id, 'cancelled')
+            elif future.exception() is not None:
+                logger.error(f"Error evaluating task {task.key}: {str(future.exception())}")
+                self.work_queue.fail(self.worker_id, task.id, str(future.exception()))
+            else:
+                entry = task.payload['entry']
+                gpt_cache.put(task.key, future.result(), article_text(entry['title'], entry['summary']))
+                self.work_queue.complete(self.worker_id, task.id, future.result())
+        except Exception as e:
+            logger.error(f"Error recording evaluation: {str(e)}", exc_info=True)
+        finally:
+            lease.release(task.id)
+            with self._lock:
+                self._evaluating -= 1
+            self._wake.set()
+
+def merge_run_results(work_queue, run_id):
+    """Combine the shard and evaluation results of a distributed run into report results, in feed order."""
+    shards = work_queue.results(run_id, 'shard')
+    evaluations = work_queue.results(run_id, 'evaluate')
+    results = []
+    for key in sorted(shards, key=int):
+        for url, items in shards[key]['feeds'].items():
+            for item in items:
+                evaluation = item['evaluation'] or evaluations.get(item['cache_key'])
+                if evaluation is not None:
+                    results.append(build_result(entry_from_payload(item['entry']), evaluation))
+    return results
+
+def distributed_scan(days_back=7, work_queue=None, participate=True, poll_interval=2.0):
+    """
+    Scan FEEDS across scanner nodes sharing a work queue (WORK_QUEUE_URL):
+    the feeds are queued as shard tasks, worked on by every node running
+    `--shard-worker` and, unless participate is False, by this one, and the
+    results of the run are merged into one report. Returns (results,
+    pdf_path) like fetch_and_process_feeds, which remains the single-node path.
+    """
+    own_queue = work_queue is None
+    work_queue = work_queue or open_work_queue(WORK_QUEUE_URL)
+    try:
+        run_id = start_distributed_scan(work_queue, days_back)
+        if participate:
+            ShardWorker(work_queue).run(run_id=run_id)
+        while work_queue.unfinished(run_id):
+            time.sleep(poll_interval)
+        results = merge_run_results(work_queue, run_id)
+        failures = work_queue.failures(run_id)
+        if failures:
+            logger.warning(f"Distributed scan {run_id}: {len(failures)} tasks failed: {failures}")
+        failed_feeds = sum(shard['failed_feeds'] for shard in work_queue.results(run_id, 'shard').values())
+        logger.info(f"Distributed scan {run_id} finished: {len(results)} articles, {failed_feeds} feeds failed")
+        work_queue.purge(run_id)
+    finally:
+        if own_queue:
+            work_queue.close()
+
+    pdf_gen = ReportGenerator()
+    pdf_gen.add_header(days_back)
+    return results, write_report(pdf_gen, results)
+
+def run_shard_worker():
+    """Work on distributed scan tasks from WORK_QUEUE_URL until interrupted."""
+    work_queue = open_work_queue(WORK_QUEUE_URL)
+    logger.info(f"Shard worker waiting for tasks in {WORK_QUEUE_URL}")
+    try:
+        ShardWorker(work_queue).run()
+    finally:
+        work_queue.close()
+
 if __name__ == "__main__":
-    fetch_and_process_feeds()
-    logger.debug("Processing complete")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scan technology feeds and build a CTO signal report.")
+    parser.add_argument('--days-back', type=int, default=7, help="Number of days to look back (default: 7)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Evaluate only entries not seen by an earlier scan and reuse stored results")
+    parser.add_argument('--force', action='store_true',
+                        help="Scan even when a recent scan covered the window")
+    parser.add_argument('--worker', action='store_true',
+                        help="Run scan jobs queued through the web app instead of scanning once")
+    parser.add_argument('--distributed', action='store_true',
+                        help="Share the scan with --shard-worker nodes through the work queue")
+    parser.add_argument('--shard-worker', action='store_true',
+                        help="Work on feed shards and evaluations of distributed scans")
+    parser.add_argument('--compact-cache', action='store_true',
+                        help="Evict stale GPT responses, shrink the cache file and exit")
+    args = parser.parse_args()
+
+    if args.compact_cache:
+        compact_gpt_cache()
+    elif args.worker:
+        run_scan_worker()
+    elif args.shard_worker:
+        run_shard_worker()
+    elif args.distributed:
+        distributed_scan(args.days_back)
+    else:
+        fetch_and_process_feeds(args.days_back, incremental=args.incremental or None,
+                                max_age=0 if args.force else None)
+        logger.debug("Processing complete")
\ No newline at end of file
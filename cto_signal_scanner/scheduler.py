@@ -0,0 +1,77 @@
+import os
+import time
+import logging
+import argparse
+import threading
+from typing import Dict, List, Optional
+from cto_signal_scanner.main import fetch_and_process_feeds, precompute_reports, report_windows
+
+logger = logging.getLogger(__name__)
+
+
+class ScanScheduler:
+    """
+    Scans on a fixed cadence so users never wait for a cold scan. Each run
+    is an incremental scan of the widest report window, which keeps the
+    feed, GPT and seen-entry caches and the article store current (and a
+    local model loaded), followed by precomputing the report of every
+    window from the article store for the web app to serve.
+    """
+
+    def __init__(self, interval_minutes: Optional[float] = None, windows: Optional[List[int]] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            interval_minutes: Minutes from the start of one run to the next (SCHEDULE_INTERVAL, default 60)
+            windows: Days back of the precomputed reports (REPORT_WINDOWS, default 1,7,14,30)
+        """
+        self.interval_minutes = interval_minutes or float(os.getenv('SCHEDULE_INTERVAL', 60))
+        self.windows = sorted(windows or report_windows())
+
+    def run_once(self) -> Dict[int, int]:
+        """Scan and precompute the reports; returns the number of articles per window."""
+        started = time.monotonic()
+        namespaces = []
+        # Forced, so the store's freshness check does not skip the scan that keeps it fresh
+        fetch_and_process_feeds(max(self.windows), incremental=True, max_age=0, on_namespace=namespaces.append)
+        counts = precompute_reports(namespaces[0], self.windows)
+        logger.info(f"Scheduled scan finished in {time.monotonic() - started:.1f}s, reports: "
+                    + ', '.join(f"{days}d: {count} articles" for days, count in counts.items()))
+        return counts
+
+    def run_forever(self, stop: Optional[threading.Event] = None):
+        """Run until the stop Event is set; a failed run is logged and retried on the next tick."""
+        stop = stop or threading.Event()
+        logger.info(f"Scheduler started: every {self.interval_minutes:g} minutes, "
+                    f"reports for {', '.join(str(days) for days in self.windows)} days back")
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Scheduled scan failed: {str(e)}", exc_info=True)
+            stop.wait(max(0.0, self.interval_minutes * 60 - (time.monotonic() - started)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan on a schedule and precompute CTO signal reports.")
+    parser.add_argument('--interval', type=float,
+                        help="Minutes between scans (default: SCHEDULE_INTERVAL or 60)")
+    parser.add_argument('--windows', help="Comma-separated days back to precompute (default: REPORT_WINDOWS or 1,7,14,30)")
+    parser.add_argument('--once', action='store_true', help="Scan and precompute once, then exit")
+    args = parser.parse_args(argv)
+
+    windows = [int(days) for days in args.windows.split(',')] if args.windows else None
+    scheduler = ScanScheduler(args.interval, windows)
+    if args.once:
+        scheduler.run_once()
+        return
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        logger.info("Scheduler stopped")
+
+
+if __name__ == "__main__":
+    main()
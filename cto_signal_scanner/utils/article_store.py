@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+from cto_signal_scanner.utils.dedup import canonicalize_url
+from cto_signal_scanner.utils.prefilter import rating_value
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 2
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    canonical_url TEXT NOT NULL,
+    feed TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    rating TEXT NOT NULL DEFAULT '',
+    rating_value REAL,
+    rationale TEXT NOT NULL DEFAULT '',
+    published TEXT NOT NULL,
+    evaluated_at REAL NOT NULL,
+    UNIQUE (namespace, canonical_url)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_url ON articles (canonical_url, evaluated_at);
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (namespace, published);
+CREATE INDEX IF NOT EXISTS idx_articles_feed ON articles (feed, published);
+CREATE INDEX IF NOT EXISTS idx_articles_rating ON articles (rating_value);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, summary, content='articles', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, summary) VALUES (new.id, new.title, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, summary) VALUES ('delete', old.id, old.title, old.summary);
+    INSERT INTO articles_fts (rowid, title, summary) VALUES (new.id, new.title, new.summary);
+END;
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    feeds TEXT NOT NULL,
+    window_start TEXT NOT NULL,
+    scanned_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scans_feeds ON scans (feeds, scanned_at);
+CREATE TABLE IF NOT EXISTS reports (
+    namespace TEXT NOT NULL,
+    feeds TEXT NOT NULL,
+    days_back INTEGER NOT NULL,
+    results TEXT NOT NULL,
+    pdf_path TEXT,
+    generated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, feeds, days_back)
+);
+'''
+
+RESULT_COLUMNS = 'title, link, summary, rating, rationale, published'
+
+
+def feeds_fingerprint(feeds: Sequence[str]) -> str:
+    """Identify a set of feeds, so a scan of other feeds does not count as covering a window."""
+    return hashlib.sha256('\n'.join(sorted(feeds)).encode('utf-8')).hexdigest()[:16]
+
+
+def _fts_query(text: str) -> str:
+    # Quote every word so user input cannot be read as FTS5 syntax; the last
+    # word also matches as a prefix, for search-as-you-type
+    words = ['"' + word.replace('"', '""') + '"' for word in text.split()]
+    if words:
+        words[-1] += '*'
+    return ' '.join(words)
+
+
+class ArticleStore:
+    """
+    SQLite store of evaluated articles, one row per namespace and canonical
+    URL holding its latest evaluation in that namespace, indexed by publish
+    date, feed and rating, with a full text index over title and summary.
+    A scan in one namespace never touches the rows of another. Completed scans are recorded with the
+    window they covered, so a later request for a window inside a recent scan
+    can be answered from the store.
+    """
+
+    def __init__(self, db_path, max_age_minutes: Optional[float] = None):
+        """
+        Open (or create) the store.
+
+        Args:
+            db_path: SQLite database file
+            max_age_minutes: How long a scan keeps its window fresh (ARTICLE_STORE_MAX_AGE, default 60; 0 = never)
+        """
+        self.db_path = Path(db_path)
+        self.max_age_minutes = max_age_minutes if max_age_minutes is not None else \
+            float(os.getenv('ARTICLE_STORE_MAX_AGE', 60))
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._migrate()
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+
+    def _migrate(self):
+        """
+        Rebuild the version 1 articles table, which kept one row per canonical
+        URL whatever the namespace, with rows unique per namespace, and rate
+        its High/Medium/Low ratings.
+        """
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(articles)')]
+        if version >= SCHEMA_VERSION or not columns:
+            return
+        with self.conn:
+            for index in ('idx_articles_published', 'idx_articles_feed', 'idx_articles_rating'):
+                self.conn.execute(f'DROP INDEX IF EXISTS {index}')
+            for trigger in ('articles_fts_insert', 'articles_fts_delete', 'articles_fts_update'):
+                self.conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+            self.conn.execute('ALTER TABLE articles RENAME TO articles_v1')
+            self.conn.executescript(SCHEMA)
+            self.conn.execute('INSERT INTO articles SELECT * FROM articles_v1')
+            self.conn.execute('DROP TABLE articles_v1')
+            self.conn.executemany('UPDATE articles SET rating_value = ? WHERE id = ?', [
+                (rating_value(row['rating']), row['id'])
+                for row in self.conn.execute('SELECT id, rating FROM articles WHERE rating_value IS NULL')
+            ])
+            self.conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+
+    def add_results(self, namespace: str, feed_url: str, results: List[Dict[str, str]]):
+        """Store a feed's result dicts (as built by build_result), replacing earlier evaluations."""
+        now = time.time()
+        rows = [
+            (canonicalize_url(result['link']), feed_url, namespace, result['title'], result['link'],
+             result.get('summary', ''), str(result.get('rating', '')), rating_value(result.get('rating')),
+             result.get('rationale', ''), result['date'], now)
+            for result in results
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'INSERT INTO articles (canonical_url, feed, namespace, title, link, summary, rating, rating_value, '
+                'rationale, published, evaluated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (namespace, canonical_url) DO UPDATE SET feed = excluded.feed, '
+                'title = excluded.title, link = excluded.link, summary = excluded.summary, '
+                'rating = excluded.rating, rating_value = excluded.rating_value, rationale = excluded.rationale, '
+                'published = excluded.published, evaluated_at = excluded.evaluated_at',
+                rows
+            )
+
+    def record_scan(self, namespace: str, feeds: Sequence[str], window_start: datetime):
+        """Record a completed scan of feeds back to window_start."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT INTO scans (namespace, feeds, window_start, scanned_at) VALUES (?, ?, ?, ?)',
+                (namespace, feeds_fingerprint(feeds), window_start.isoformat(), time.time())
+            )
+
+    def is_fresh(self, namespace: str, feeds: Sequence[str], window_start: datetime) -> bool:
+        """True when a scan in this namespace covered the window within the maximum age."""
+        if self.max_age_minutes <= 0:
+            return False
+        with self._lock:
+            covering = self.conn.execute(
+                'SELECT 1 FROM scans WHERE namespace = ? AND feeds = ? AND window_start <= ? AND scanned_at >= ? '
+                'LIMIT 1',
+                (namespace, feeds_fingerprint(feeds), window_start.isoformat(),
+                 time.time() - self.max_age_minutes * 60)
+            ).fetchone()
+        return covering is not None
+
+    def window(self, namespace: str, window_start: datetime, feeds: Sequence[str]) -> List[Dict[str, str]]:
+        """Stored results published since window_start, in feeds order and newest first within a feed."""
+        with self._lock:
+            rows = self.conn.execute(
+                f'SELECT feed, {RESULT_COLUMNS} FROM articles WHERE namespace = ? AND published >= ? '
+                'ORDER BY published DESC',
+                (namespace, window_start.isoformat())
+            ).fetchall()
+        order = {url: index for index, url in enumerate(feeds)}
+        rows = sorted((row for row in rows if row['feed'] in order), key=lambda row: order[row['feed']])
+        return [self._result(row) for row in rows]
+
+    def save_report(self, namespace: str, feeds: Sequence[str], days_back: int, results: List[Dict[str, str]],
+                    pdf_path: Optional[str] = None):
+        """Keep a precomputed report of a window, replacing the previous one."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO reports (namespace, feeds, days_back, results, pdf_path, generated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (namespace, feeds_fingerprint(feeds), days_back, json.dumps(results), pdf_path, time.time())
+            )
+
+    def latest_report(self, namespace: str, feeds: Sequence[str], days_back: int,
+                      max_age_minutes: float) -> Optional[Dict]:
+        """The precomputed report of a window if it is at most max_age_minutes old, else None."""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT results, pdf_path, generated_at FROM reports WHERE namespace = ? AND feeds = ? '
+                'AND days_back = ? AND generated_at >= ?',
+                (namespace, feeds_fingerprint(feeds), days_back, time.time() - max_age_minutes * 60)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'results': json.loads(row['results']), 'pdf_path': row['pdf_path'],
+                'generated_at': row['generated_at']}
+
+    def search(self, query: str, since: Optional[datetime] = None, min_rating: Optional[float] = None,
+               limit: int = 50) -> List[Dict[str, str]]:
+        """
+        Full-text search over titles and summaries, best matches first. An
+        article stored in several namespaces is found with its latest evaluation.
+        """
+        fts_query = _fts_query(query)
+        if not fts_query:
+            return []
+        conditions = ['articles_fts MATCH ?', 'a.evaluated_at = (SELECT MAX(evaluated_at) FROM articles b '
+                                              'WHERE b.canonical_url = a.canonical_url)']
+        params = [fts_query]
+        if since is not None:
+            conditions.append('a.published >= ?')
+            params.append(since.isoformat())
+        if min_rating is not None:
+            conditions.append('a.rating_value >= ?')
+            params.append(min_rating)
+        params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(
+                f'SELECT a.feed, {", ".join("a." + column for column in RESULT_COLUMNS.split(", "))} '
+                'FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid '
+                f'WHERE {" AND ".join(conditions)} ORDER BY articles_fts.rank LIMIT ?',
+                params
+            ).fetchall()
+        return [dict(self._result(row), feed=row['feed']) for row in rows]
+
+    @staticmethod
+    def _result(row) -> Dict[str, str]:
+        return {
+            'title': row['title'],
+            'link': row['link'],
+            'summary': row['summary'],
+            'rating': row['rating'],
+            'rationale': row['rationale'],
+            'date': row['published']
+        }
+
+    def prune(self, max_days: float) -> int:
+        """Drop articles published more than max_days ago and the scans that covered them."""
+        oldest = datetime.utcfromtimestamp(time.time() - max_days * 86400).isoformat()
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM scans WHERE scanned_at < ?', (time.time() - max_days * 86400,))
+            return self.conn.execute('DELETE FROM articles WHERE published < ?', (oldest,)).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,180 @@
+import os
+import re
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'cmpid', 'sc_channel'}
+TRACKING_PREFIXES = ('utm_', 'trk', 'hmb_')
+
+# MinHash signature of NUM_PERM values split into BANDS bands for LSH lookups;
+# with 8 bands of 4 rows, pairs above ~0.6 Jaccard similarity become candidates
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+# Texts with fewer distinct words than this are only matched by URL
+MIN_TOKENS = 8
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_random = random.Random(0x5eed)
+_PERMUTATIONS = [(_random.randrange(1, _MERSENNE_PRIME), _random.randrange(0, _MERSENNE_PRIME))
+                 for _ in range(NUM_PERM)]
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS dedup_articles (
+    id INTEGER PRIMARY KEY,
+    cache_key TEXT NOT NULL,
+    canonical_url TEXT NOT NULL,
+    signature TEXT,
+    title TEXT,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_dedup_url ON dedup_articles (canonical_url);
+CREATE INDEX IF NOT EXISTS idx_dedup_seen ON dedup_articles (seen_at);
+CREATE TABLE IF NOT EXISTS dedup_bands (
+    band INTEGER NOT NULL,
+    hash INTEGER NOT NULL,
+    article_id INTEGER NOT NULL REFERENCES dedup_articles (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_dedup_bands ON dedup_bands (band, hash);
+CREATE INDEX IF NOT EXISTS idx_dedup_bands_article ON dedup_bands (article_id);
+'''
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a link so tracking parameters, fragments and cosmetic differences don't matter."""
+    parts = urlsplit((url or '').strip())
+    host = parts.hostname or ''
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https' if parts.scheme in ('http', 'https') else parts.scheme,
+                       host.lower(), path, urlencode(query), ''))
+
+
+def _tokens(text: str) -> set:
+    text = re.sub(r'<[^>]+>', ' ', text or '')
+    return set(re.findall(r'[a-z0-9]+', text.lower()))
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def minhash(text: str) -> Optional[List[int]]:
+    """MinHash signature of the text's word set; None when the text is too short to compare."""
+    tokens = _tokens(text)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    hashes = [_hash64(token) for token in tokens]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def _band_hashes(signature: List[int]) -> List[int]:
+    """One 63-bit hash per band, so it fits a signed SQLite integer."""
+    return [
+        _hash64(','.join(map(str, signature[band * ROWS:(band + 1) * ROWS]))) >> 1
+        for band in range(BANDS)
+    ]
+
+
+class DedupIndex:
+    """
+    Persistent index of article fingerprints (canonical URL plus a MinHash
+    signature of title and summary). Lookups go through the URL index and
+    LSH band indexes, so they stay fast as history grows.
+    """
+
+    def __init__(self, db_path, min_similarity: Optional[float] = None, history_days: Optional[float] = None):
+        """
+        Open (or create) the index.
+
+        Args:
+            db_path: SQLite database file
+            min_similarity: Estimated Jaccard similarity treated as a duplicate (DEDUP_MIN_SIMILARITY, default 0.8)
+            history_days: Fingerprints older than this are pruned (DEDUP_HISTORY_DAYS, default 365)
+        """
+        self.db_path = Path(db_path)
+        self.min_similarity = min_similarity if min_similarity is not None else \
+            float(os.getenv('DEDUP_MIN_SIMILARITY', 0.8))
+        self.history_days = history_days if history_days is not None else \
+            float(os.getenv('DEDUP_HISTORY_DAYS', 365))
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+
+    @staticmethod
+    def fingerprint(title: str, summary: str) -> Optional[List[int]]:
+        return minhash(f"{title} {summary}")
+
+    def match(self, canonical_url: str, fingerprint: Optional[List[int]]) -> Optional[str]:
+        """Return the cache key of the most similar previously seen near-duplicate, if any."""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT cache_key FROM dedup_articles WHERE canonical_url = ? ORDER BY seen_at DESC LIMIT 1',
+                (canonical_url,)
+            ).fetchone()
+            if row:
+                return row[0]
+            if fingerprint is None:
+                return None
+
+            conditions = ' OR '.join(['(b.band = ? AND b.hash = ?)'] * BANDS)
+            params = [value for band, band_hash in enumerate(_band_hashes(fingerprint)) for value in (band, band_hash)]
+            candidates = self.conn.execute(
+                'SELECT DISTINCT a.cache_key, a.signature, a.seen_at FROM dedup_bands b '
+                f'JOIN dedup_articles a ON a.id = b.article_id WHERE {conditions}',
+                params
+            ).fetchall()
+
+        best_key, best_score = None, 0.0
+        for cache_key, signature, _ in sorted(candidates, key=lambda row: row[2], reverse=True):
+            score = similarity(fingerprint, [int(value) for value in signature.split(',')])
+            if score >= self.min_similarity and score > best_score:
+                best_key, best_score = cache_key, score
+        return best_key
+
+    def add(self, cache_key: str, canonical_url: str, fingerprint: Optional[List[int]], title: str = ''):
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                'INSERT INTO dedup_articles (cache_key, canonical_url, signature, title, seen_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (cache_key, canonical_url, ','.join(map(str, fingerprint)) if fingerprint else None,
+                 title, time.time())
+            )
+            if fingerprint:
+                self.conn.executemany(
+                    'INSERT INTO dedup_bands (band, hash, article_id) VALUES (?, ?, ?)',
+                    [(band, band_hash, cursor.lastrowid) for band, band_hash in enumerate(_band_hashes(fingerprint))]
+                )
+
+    def prune(self) -> int:
+        cutoff = time.time() - self.history_days * 86400
+        with self._lock, self.conn:
+            return self.conn.execute('DELETE FROM dedup_articles WHERE seen_at < ?', (cutoff,)).rowcount
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,466 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+import httpx
+import openai
+import requests
+
+logger = logging.getLogger('gpt_agent')
+
+# Errors worth retrying: the request was throttled or never completed
+RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.Timeout,
+    openai.error.APIConnectionError,
+    openai.error.ServiceUnavailableError,
+    openai.error.TryAgain,
+    requests.Timeout,
+    requests.ConnectionError,
+    httpx.TransportError,
+)
+
+
+def _status(error: Exception) -> Optional[int]:
+    # openai errors carry http_status, ollama.ResponseError carries status_code
+    return getattr(error, 'http_status', None) or getattr(error, 'status_code', None)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return isinstance(error, openai.error.RateLimitError) or _status(error) == 429
+
+
+def is_overloaded(error: Exception) -> bool:
+    """The backend was too slow or refused the connection: a congestion signal."""
+    # Ollama answers 503 once its parallel slots and request queue are full
+    return isinstance(error, (openai.error.Timeout, openai.error.ServiceUnavailableError,
+                              openai.error.TryAgain, requests.Timeout, httpx.TimeoutException)) or \
+        _status(error) == 503
+
+
+def is_retryable(error: Exception) -> bool:
+    return isinstance(error, RETRYABLE_ERRORS) or is_rate_limited(error) or is_overloaded(error)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, from a Retry-After header."""
+    headers = getattr(error, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After') or headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Blocking token bucket refilled continuously at rate_per_minute. A rate of 0 disables it."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount: float = 1):
+        if self.rate <= 0:
+            return
+        # Requests larger than the bucket would never fit; let them drain it
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits shared by all evaluations."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests_per_minute = requests_per_minute if requests_per_minute is not None \
+            else float(os.getenv('LLM_RPM', 0))
+        self.tokens_per_minute = tokens_per_minute if tokens_per_minute is not None \
+            else float(os.getenv('LLM_TPM', 0))
+        self.requests = TokenBucket(self.requests_per_minute)
+        self.tokens = TokenBucket(self.tokens_per_minute)
+
+    def acquire(self, tokens: int):
+        self.requests.acquire(1)
+        self.tokens.acquire(tokens)
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide limiter so overlapping scans share one quota."""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Caps the number of model requests in flight and adapts the cap with AIMD:
+    each success below the latency tolerance adds 1/limit (about +1 per round
+    trip), while rate limits, timeouts, latency above tolerance x baseline or a
+    high error rate multiply it by decrease_factor, at most once per cooldown.
+    With adaptive off the cap stays at its initial value.
+    """
+
+    # Smoothing for the latency and error rate averages
+    EWMA_ALPHA = 0.2
+    # Samples needed before latency and error rate may trigger a decrease
+    MIN_SAMPLES = 10
+    # How fast the latency baseline drifts up towards the current average
+    BASELINE_DRIFT = 0.01
+
+    def __init__(self, initial_limit: Optional[int] = None, min_limit: int = 1,
+                 max_limit: Optional[int] = None, adaptive: Optional[bool] = None,
+                 decrease_factor: float = 0.5, latency_tolerance: float = 2.0,
+                 max_error_rate: float = 0.5):
+        """
+        Initialize the limiter.
+
+        Args:
+            initial_limit: Requests in flight at start (LLM_CONCURRENCY, default 4)
+            min_limit: Lowest limit a decrease can reach
+            max_limit: Highest limit an increase can reach (LLM_MAX_CONCURRENCY, default 16)
+            adaptive: Adjust the limit from observed outcomes (LLM_ADAPTIVE_CONCURRENCY, default true)
+            decrease_factor: Multiplier applied on congestion
+            latency_tolerance: Latency above this multiple of the baseline counts as congestion
+            max_error_rate: Error rate above which the limit is decreased
+        """
+        initial_limit = initial_limit or int(os.getenv('LLM_CONCURRENCY', 4))
+        self.adaptive = adaptive if adaptive is not None else \
+            os.getenv('LLM_ADAPTIVE_CONCURRENCY', 'true').lower() in ('true', '1', 'yes')
+        self.min_limit = min_limit
+        self.max_limit = max(initial_limit, max_limit or int(os.getenv('LLM_MAX_CONCURRENCY', 16))) \
+            if self.adaptive else initial_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.max_error_rate = max_error_rate
+
+        self.limit = float(initial_limit)
+        self.in_flight = 0
+        self.samples = 0
+        self.latency = None
+        self.baseline = None
+        self.error_rate = 0.0
+        self.counts = {'success': 0, 'rate_limited': 0, 'overloaded': 0, 'error': 0}
+        self.decisions = deque(maxlen=50)
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Block until a request may start."""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, outcome: str):
+        """
+        Finish a request and adapt the limit. outcome is 'success',
+        'rate_limited', 'overloaded' (timeout or unavailable) or 'error'.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self.counts[outcome] += 1
+            if self.adaptive:
+                self._adapt(latency, outcome)
+            self._condition.notify_all()
+
+    def _adapt(self, latency: float, outcome: str):
+        self.samples += 1
+        self.error_rate += self.EWMA_ALPHA * ((outcome != 'success') - self.error_rate)
+        if outcome == 'success':
+            self.latency = latency if self.latency is None else \
+                self.latency + self.EWMA_ALPHA * (latency - self.latency)
+            self.baseline = self.latency if self.baseline is None else \
+                min(self.latency, self.baseline + self.BASELINE_DRIFT * (self.latency - self.baseline))
+
+        warmed_up = self.samples >= self.MIN_SAMPLES
+        if outcome in ('rate_limited', 'overloaded'):
+            self._decrease(outcome.replace('_', ' '))
+        elif warmed_up and self.error_rate > self.max_error_rate:
+            self._decrease(f"error rate {self.error_rate:.0%}")
+        elif outcome == 'success':
+            if warmed_up and latency > self.baseline * self.latency_tolerance:
+                self._decrease(f"latency {latency:.1f}s over baseline {self.baseline:.1f}s")
+            elif self.limit < self.max_limit and self.in_flight + 1 >= int(self.limit):
+                # Only grow while the current limit is actually being used
+                self._increase()
+
+    def _increase(self):
+        previous = int(self.limit)
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        if int(self.limit) > previous:
+            self._record('increase', 'requests succeeded within latency tolerance')
+
+    def _decrease(self, reason: str):
+        # One overload shows up as several failures at once; react to it once
+        now = time.monotonic()
+        if now - self._last_decrease < max(1.0, self.latency or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        self._record('decrease', reason)
+        logger.warning(f"LLM concurrency reduced to {int(self.limit)}: {reason}")
+
+    def _record(self, action: str, reason: str):
+        self.decisions.append({'at': time.time(), 'action': action, 'limit': int(self.limit), 'reason': reason})
+
+    def stats(self) -> Dict:
+        """Current limit, observations and recent decisions, for monitoring."""
+        with self._condition:
+            return {
+                'adaptive': self.adaptive,
+                'limit': int(self.limit),
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'in_flight': self.in_flight,
+                'latency': self.latency,
+                'baseline_latency': self.baseline,
+                'error_rate': self.error_rate,
+                'outcomes': dict(self.counts),
+                'decisions': list(self.decisions)
+            }
+
+
+_default_concurrency = None
+_default_concurrency_lock = threading.Lock()
+
+
+def get_concurrency_limiter() -> AdaptiveConcurrencyLimiter:
+    """Return the process-wide limiter, so the learned limit carries over between scans."""
+    global _default_concurrency
+    with _default_concurrency_lock:
+        if _default_concurrency is None:
+            _default_concurrency = AdaptiveConcurrencyLimiter()
+        return _default_concurrency
+
+
+def _cancel(batch: List[Tuple[Tuple[str, str, str], Future]]):
+    for _, future in batch:
+        future.cancel()
+
+
+class EvaluationPool:
+    """
+    Runs GPTAgent evaluations concurrently under rate limits, retrying throttled
+    requests. Requests in flight are capped by an adaptive concurrency limiter.
+    With a batch size above 1, submitted articles are grouped and evaluated
+    with GPTAgent.evaluate_batch; call flush() before waiting on a partial batch.
+    Articles a batch response drops are retried as batches of their own, so
+    every model call goes through the limits.
+    """
+
+    def __init__(self, gpt_agent, max_workers: Optional[int] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 max_retries: Optional[int] = None, backoff_base: float = 1.0,
+                 backoff_max: float = 60.0, batch_size: Optional[int] = None,
+                 concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            gpt_agent: Agent used for evaluations
+            max_workers: Worker threads, an upper bound on concurrency; defaults to the limiter's maximum
+            rate_limiter: Limiter to share; defaults to the process-wide one (LLM_RPM/LLM_TPM)
+            max_retries: Retries for rate limits and timeouts (LLM_MAX_RETRIES, default 5)
+            backoff_base: First retry delay in seconds, doubled on each attempt
+            backoff_max: Upper bound for a single retry delay
+            batch_size: Articles per request (GPT_BATCH_SIZE, default 1 = no batching)
+            concurrency_limiter: Limiter to share; defaults to the process-wide adaptive one
+        """
+        self.gpt_agent = gpt_agent
+        self.concurrency = concurrency_limiter or get_concurrency_limiter()
+        self.max_workers = max_workers or self.concurrency.max_limit
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('LLM_MAX_RETRIES', 5))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.batch_size = batch_size or int(os.getenv('GPT_BATCH_SIZE', 1))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='llm-eval')
+        self._batch = []
+        # Guards the partial batch, the count of batches submitted and not
+        # finished (including retries) and the stopped flag
+        self._batch_lock = threading.Condition()
+        self._batches = 0
+        self._stopped = False
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Exponential backoff with full jitter, honouring Retry-After when given."""
+        delay = retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return delay
+
+    def _call_with_retries(self, call, tokens: int, label: str):
+        attempt = 0
+        while True:
+            self.concurrency.acquire()
+            started = time.monotonic()
+            try:
+                self.rate_limiter.acquire(tokens)
+                started = time.monotonic()
+                result = call()
+            except Exception as e:
+                outcome = 'rate_limited' if is_rate_limited(e) else 'overloaded' if is_overloaded(e) else 'error'
+                self.concurrency.release(time.monotonic() - started, outcome)
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                logger.warning(f"Retrying evaluation of {label} in {delay:.1f}s after: {str(e)}")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.concurrency.release(time.monotonic() - started, 'success')
+            return result
+
+    def _evaluate(self, title: str, summary: str, link: str, on_partial=None) -> Dict[str, str]:
+        kwargs = {'on_partial': on_partial} if on_partial else {}
+        return self._call_with_retries(
+            lambda: self.gpt_agent.evaluate_post(title, summary, link, **kwargs),
+            self.gpt_agent.estimate_tokens(title, summary, link),
+            title
+        )
+
+    def _evaluate_batch(self, batch: List[Tuple[Tuple[str, str, str], Future]]):
+        articles = [
+            {'id': str(index), 'title': title, 'summary': summary, 'link': link}
+            for index, ((title, summary, link), _) in enumerate(batch)
+        ]
+        try:
+            results = self._call_with_retries(
+                lambda: self.gpt_agent.evaluate_batch(articles),
+                self.gpt_agent.estimate_batch_tokens(articles),
+                f"batch of {len(articles)}"
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        missing = []
+        for article, (item, future) in zip(articles, batch):
+            if article['id'] in results:
+                future.set_result(results[article['id']])
+            else:
+                missing.append((item, future))
+        if not missing:
+            return
+        if len(missing) < len(batch):
+            logger.warning(f"Batch response missing {len(missing)} of {len(batch)} articles, retrying them")
+            retries = [missing]
+        elif len(batch) > 1:
+            # Nothing usable came back; halve the batch so one bad item cannot sink the rest
+            logger.warning(f"No usable results for a batch of {len(batch)}, splitting it")
+            middle = len(batch) // 2
+            retries = [batch[:middle], batch[middle:]]
+        else:
+            (title, _, _), future = batch[0]
+            future.set_exception(ValueError(f"No usable evaluation of {title}"))
+            return
+        for retry in retries:
+            self._send_batch(retry)
+
+    def _send_batch(self, batch: List[Tuple[Tuple[str, str, str], Future]]):
+        """Run a batch on the executor; its articles are cancelled when the pool has stopped."""
+        with self._batch_lock:
+            task = None
+            if not self._stopped:
+                self._batches += 1
+                task = self.executor.submit(self._evaluate_batch, batch)
+        if task is None:
+            _cancel(batch)
+        else:
+            task.add_done_callback(lambda task: self._batch_done(batch, task))
+
+    def _batch_done(self, batch, task: Future):
+        # A batch the executor dropped on shutdown never resolves its articles
+        if task.cancelled():
+            _cancel(batch)
+        with self._batch_lock:
+            self._batches -= 1
+            self._batch_lock.notify_all()
+
+    def submit(self, title: str, summary: str, link: str,
+               on_partial: Optional[Callable[[Dict[str, str]], None]] = None) -> Future:
+        """
+        Queue one evaluation; the future resolves to an evaluate_post style result.
+        on_partial receives streamed partial results; batched evaluations do not stream.
+        """
+        if self.batch_size <= 1:
+            return self.executor.submit(self._evaluate, title, summary, link, on_partial)
+
+        future = Future()
+        full_batch = None
+        with self._batch_lock:
+            if self._stopped:
+                raise RuntimeError("cannot schedule new evaluations after shutdown")
+            self._batch.append(((title, summary, link), future))
+            if len(self._batch) >= self.batch_size:
+                full_batch, self._batch = self._batch, []
+        if full_batch:
+            self._send_batch(full_batch)
+        return future
+
+    def flush(self):
+        """Send any partially filled batch."""
+        with self._batch_lock:
+            batch, self._batch = self._batch, []
+        if batch:
+            self._send_batch(batch)
+
+    def evaluate_many(self, articles: List[Tuple[str, str, str]]) -> List[Dict[str, str]]:
+        """Evaluate (title, summary, link) tuples concurrently; results keep the input order."""
+        futures = [self.submit(*article) for article in articles]
+        self.flush()
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the pool. With wait, the partial batch is sent and all batches,
+        retries included, finish first; without, evaluations that have not
+        started are cancelled. Calls after the first do nothing.
+        """
+        with self._batch_lock:
+            if self._stopped:
+                return
+            if not wait:
+                self._stopped = True
+                unsent, self._batch = self._batch, []
+        if wait:
+            self.flush()
+            with self._batch_lock:
+                while self._batches:
+                    self._batch_lock.wait()
+                self._stopped = True
+        else:
+            _cancel(unsent)
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # On errors, drop evaluations that have not started yet
+        self.shutdown(wait=exc_type is None)
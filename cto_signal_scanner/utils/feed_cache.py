@@ -0,0 +1,148 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+from cto_signal_scanner.utils.feed_parser import FeedEntry
+
+logger = logging.getLogger(__name__)
+
+# Entries older than the longest scan window are never needed again
+MAX_DAYS_BACK = 30
+
+
+class FeedCache:
+    """
+    Persists per-feed HTTP validators (ETag, Last-Modified, body hash) together
+    with the recent entries of the last successful parse, so unchanged feeds can
+    be served without downloading or parsing them again. Feed URLs discovered
+    from HTML landing pages are kept here too.
+    """
+
+    def __init__(self, cache_file, discovery_ttl_hours: Optional[float] = None):
+        self.cache_file = Path(cache_file)
+        if discovery_ttl_hours is None:
+            discovery_ttl_hours = float(os.getenv('FEED_DISCOVERY_TTL_HOURS', 168))
+        self.discovery_ttl = timedelta(hours=discovery_ttl_hours)
+        self._lock = threading.Lock()
+        self.feeds = self._load()
+
+    def _load(self) -> Dict:
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable feed cache {self.cache_file}: {str(e)}")
+        return {}
+
+    def save(self):
+        """Write the cache to disk."""
+        with self._lock:
+            data = json.dumps(self.feeds)
+        with open(self.cache_file, 'w') as f:
+            f.write(data)
+
+    @staticmethod
+    def content_hash(body: bytes) -> str:
+        return hashlib.sha256(body).hexdigest()
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        """Conditional GET headers for a feed we already hold entries for."""
+        with self._lock:
+            cached = self.feeds.get(url)
+        if not cached or 'entries' not in cached:
+            return {}
+
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    def is_unchanged(self, url: str, body_hash: str) -> bool:
+        with self._lock:
+            cached = self.feeds.get(url)
+        return bool(cached) and 'entries' in cached and cached.get('content_hash') == body_hash
+
+    def update(self, url: str, headers, body_hash: str, entries: Optional[List] = None):
+        """
+        Record the validators from a response. When entries is None the
+        previously stored entries are kept (the body did not change).
+        """
+        with self._lock:
+            cached = self.feeds.setdefault(url, {})
+            cached['etag'] = headers.get('ETag')
+            cached['last_modified'] = headers.get('Last-Modified')
+            cached['content_hash'] = body_hash
+            cached['checked_at'] = datetime.now().isoformat()
+            if entries is not None:
+                cached['entries'] = self._serialize_entries(entries)
+
+    def mark_checked(self, url: str):
+        """Record a 304 response; validators and entries stay as they are."""
+        with self._lock:
+            if url in self.feeds:
+                self.feeds[url]['checked_at'] = datetime.now().isoformat()
+
+    def discovered_url(self, url: str) -> Optional[str]:
+        """The feed URL previously discovered from the HTML page at url, if still fresh."""
+        with self._lock:
+            cached = self.feeds.get(url) or {}
+            discovered_url = cached.get('discovered_url')
+            discovered_at = cached.get('discovered_at')
+        if not discovered_url or not discovered_at:
+            return None
+        if datetime.now() - datetime.fromisoformat(discovered_at) > self.discovery_ttl:
+            return None
+        return discovered_url
+
+    def remember_discovery(self, url: str, feed_url: str):
+        with self._lock:
+            cached = self.feeds.setdefault(url, {})
+            cached['discovered_url'] = feed_url
+            cached['discovered_at'] = datetime.now().isoformat()
+
+    def forget_discovery(self, url: str):
+        """Drop a discovered URL and the validators that belonged to it."""
+        with self._lock:
+            cached = self.feeds.get(url)
+            if not cached:
+                return
+            for key in ('discovered_url', 'discovered_at', 'etag', 'last_modified', 'content_hash'):
+                cached.pop(key, None)
+
+    def cached_entries(self, url: str) -> Optional[List[FeedEntry]]:
+        """Rebuild the stored entries of a feed."""
+        with self._lock:
+            cached = self.feeds.get(url)
+            entries = list(cached.get('entries', [])) if cached else None
+        if entries is None:
+            return None
+        return [
+            FeedEntry(
+                title=entry['title'],
+                link=entry['link'],
+                summary=entry['summary'],
+                published=datetime.fromisoformat(entry['published']) if entry.get('published') else None,
+                guid=entry.get('guid', '')
+            )
+            for entry in entries
+        ]
+
+    @staticmethod
+    def _serialize_entries(entries: List[FeedEntry]) -> List[Dict]:
+        """Store the entries that fall inside the longest scan window."""
+        oldest = datetime.utcnow() - timedelta(days=MAX_DAYS_BACK)
+        serialized = []
+        for entry in entries:
+            if entry.published and entry.published < oldest:
+                continue
+            stored = entry._asdict()
+            stored['published'] = entry.published.isoformat() if entry.published else None
+            serialized.append(stored)
+        return serialized
@@ -0,0 +1,64 @@
+import os
+import logging
+import threading
+from typing import Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'CTO-Signal-Scanner/0.1 (+https://github.com/kltownsend/cto_scanner)'
+
+
+class FeedFetcher:
+    """
+    Downloads feeds over one pooled HTTP session, shared by the threads of a
+    scan's fetch stage; max_workers sizes both the stage and the pool.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None):
+        """
+        Initialize the fetcher.
+
+        Args:
+            max_workers: Maximum number of feeds downloaded at once (FEED_FETCH_CONCURRENCY, default 8)
+            connect_timeout: Seconds to wait for a connection (FEED_CONNECT_TIMEOUT, default 5)
+            read_timeout: Seconds to wait between bytes of the response (FEED_READ_TIMEOUT, default 20)
+        """
+        self.max_workers = max_workers or int(os.getenv('FEED_FETCH_CONCURRENCY', 8))
+        self.connect_timeout = connect_timeout or float(os.getenv('FEED_CONNECT_TIMEOUT', 5))
+        self.read_timeout = read_timeout or float(os.getenv('FEED_READ_TIMEOUT', 20))
+
+        # One connection pool shared by every worker thread
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = USER_AGENT
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        return (self.connect_timeout, self.read_timeout)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET a URL through the shared session with the configured timeouts."""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+_default_fetcher = None
+_default_fetcher_lock = threading.Lock()
+
+
+def get_fetcher() -> FeedFetcher:
+    """Return the process-wide fetcher so connections are reused across scans."""
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = FeedFetcher()
+        return _default_fetcher
@@ -1,11 +1,17 @@
 import json
 import os
+import time
 import uuid
+import queue
+import logging
+import threading
 import feedparser
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 import requests
-from datetime import datetime
+from datetime import datetime, timedelta
+
+logger = logging.getLogger('feed_manager')
 
 class FeedManager:
     # Default feeds to pre-populate
@@ -18,12 +24,24 @@ class FeedManager:
         'redhat': 'https://www.redhat.com/en/feed'
     }
 
-    def __init__(self, feeds_file: str = "feeds.json"):
+    def __init__(self, feeds_file: str = "feeds.json", health_ttl_minutes: Optional[float] = None):
         self.feeds_file = Path(feeds_file)
         self.custom_feeds_file = self.feeds_file.parent / "custom_feeds.json"
+        self.health_file = self.feeds_file.parent / "feed_health.json"
         self.feeds = self._load_feeds()
         self.custom_feeds = self._load_custom_feeds()
 
+        # Feed health (status, last check, latency, error) is cached and
+        # refreshed by a background worker instead of on every page load
+        if health_ttl_minutes is None:
+            health_ttl_minutes = float(os.getenv('FEED_HEALTH_TTL_MINUTES', 60))
+        self.health_ttl = timedelta(minutes=health_ttl_minutes)
+        self._health_lock = threading.Lock()
+        self.health = self._load_health()
+        self._revalidation_queue = queue.Queue()
+        self._pending_revalidation = set()
+        self._worker = None
+
     def _load_feeds(self) -> Dict:
         """Load default feeds from JSON file or create if not exists."""
         if self.feeds_file.exists():
@@ -56,6 +74,29 @@ class FeedManager:
                 return json.load(f)
         return {"feeds": []}
 
+    def _load_health(self) -> Dict:
+        """Load cached feed health from JSON file."""
+        if self.health_file.exists():
+            try:
+                with open(self.health_file, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable feed health file: {str(e)}")
+        return {}
+
+    def _save_health(self):
+        """
+        Save cached feed health to JSON file, through a temporary file: the web
+        app, scheduler and workers each keep a FeedManager writing this file.
+        """
+        with self._health_lock:
+            data = json.dumps(self.health, indent=2)
+        temp_file = self.health_file.with_name(
+            f"{self.health_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(temp_file, 'w') as f:
+            f.write(data)
+        os.replace(temp_file, self.health_file)
+
     def _save_feeds(self):
         """Save feeds to appropriate JSON files."""
         # Save default feeds
@@ -104,21 +145,83 @@ class FeedManager:
         except Exception as e:
             return False, f"Error validating feed: {str(e)}"
 
+    def check_feed(self, url: str) -> Dict:
+        """Validate a feed now and record its health in the cache."""
+        started = time.monotonic()
+        is_valid, message = self.validate_feed(url)
+        health = {
+            'status': 'valid' if is_valid else 'invalid',
+            'checked_at': datetime.now().isoformat(),
+            'latency': round(time.monotonic() - started, 3),
+            'error': None if is_valid else message
+        }
+        with self._health_lock:
+            self.health[url] = health
+        self._save_health()
+        return health
+
+    def get_health(self, url: str) -> Optional[Dict]:
+        with self._health_lock:
+            health = self.health.get(url)
+        return dict(health) if health else None
+
+    def is_stale(self, url: str) -> bool:
+        health = self.get_health(url)
+        if not health:
+            return True
+        return datetime.now() - datetime.fromisoformat(health['checked_at']) > self.health_ttl
+
+    def revalidate(self, urls: Iterable[str]):
+        """Queue feeds for revalidation by the background worker."""
+        self._ensure_worker()
+        for url in urls:
+            with self._health_lock:
+                if url in self._pending_revalidation:
+                    continue
+                self._pending_revalidation.add(url)
+            self._revalidation_queue.put(url)
+
+    def _ensure_worker(self):
+        with self._health_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._revalidation_loop, name='feed-health', daemon=True
+                )
+                self._worker.start()
+
+    def _revalidation_loop(self):
+        """Revalidate queued feeds; when idle, sweep for feeds whose health went stale."""
+        while True:
+            try:
+                url = self._revalidation_queue.get(timeout=self.health_ttl.total_seconds())
+            except queue.Empty:
+                self.revalidate(feed['url'] for feed in self._all_feeds() if self.is_stale(feed['url']))
+                continue
+            try:
+                self.check_feed(url)
+            except Exception as e:
+                logger.error(f"Error revalidating feed {url}: {str(e)}")
+            finally:
+                with self._health_lock:
+                    self._pending_revalidation.discard(url)
+
+    def _all_feeds(self) -> List[Dict]:
+        return self.feeds['feeds'] + self.custom_feeds['feeds']
+
     def add_feed(self, url: str) -> Tuple[bool, str, Optional[Dict]]:
         """
         Add a new feed after validation.
         Returns (success, message, feed_data)
         """
-        # Validate feed first
-        is_valid, error_msg = self.validate_feed(url)
-        if not is_valid:
-            return False, error_msg, None
-
         # Check if feed already exists in either default or custom feeds
-        all_feeds = self.get_feeds()
-        if any(feed['url'] == url for feed in all_feeds):
+        if any(feed['url'] == url for feed in self._all_feeds()):
             return False, "Feed already exists", None
 
+        # Validate feed, recording its health for the settings page
+        health = self.check_feed(url)
+        if health['status'] != 'valid':
+            return False, health['error'], None
+
         # Create new feed entry
         feed_data = {
             'id': str(uuid.uuid4()),
@@ -138,11 +241,14 @@ class FeedManager:
     def remove_feed(self, feed_id: str) -> Tuple[bool, str]:
         """Remove a feed by ID."""
         # First try to remove from custom feeds
-        original_length = len(self.custom_feeds['feeds'])
+        removed = [f for f in self.custom_feeds['feeds'] if f['id'] == feed_id]
         self.custom_feeds['feeds'] = [f for f in self.custom_feeds['feeds'] if f['id'] != feed_id]
         
-        if len(self.custom_feeds['feeds']) != original_length:
+        if removed:
             self._save_feeds()
+            with self._health_lock:
+                self.health.pop(removed[0]['url'], None)
+            self._save_health()
             return True, "Feed removed successfully"
         
         # If not found in custom feeds, check if it's a default feed
@@ -153,14 +259,21 @@ class FeedManager:
         return False, "Feed not found"
 
     def get_feeds(self) -> List[Dict]:
-        """Get all feeds (both default and custom) with their current status."""
-        all_feeds = self.feeds['feeds'].copy() + self.custom_feeds['feeds'].copy()
+        """
+        Get all feeds (both default and custom) with their cached status.
+        Feeds whose status is missing or older than the TTL are revalidated
+        in the background; this call never waits on the network.
+        """
+        all_feeds = [dict(feed) for feed in self._all_feeds()]
         
-        # Update status for each feed
         for feed in all_feeds:
-            is_valid, _ = self.validate_feed(feed['url'])
-            feed['status'] = 'valid' if is_valid else 'invalid'
+            health = self.get_health(feed['url'])
+            feed['status'] = health['status'] if health else 'unknown'
+            feed['last_checked'] = health['checked_at'] if health else None
+            feed['latency'] = health['latency'] if health else None
+            feed['error'] = health['error'] if health else None
         
+        self.revalidate(feed['url'] for feed in all_feeds if self.is_stale(feed['url']))
         return all_feeds
 
     def _extract_feed_name(self, url: str) -> str:
@@ -180,5 +293,5 @@ class FeedManager:
         return name
 
     def get_enabled_feeds(self) -> List[str]:
-        """Get URLs of all valid feeds."""
-        return [feed['url'] for feed in self.get_feeds() if feed['status'] == 'valid'] 
\ No newline at end of file
+        """Get URLs of all feeds not known to be invalid."""
+        return [feed['url'] for feed in self.get_feeds() if feed['status'] != 'invalid'] 
\ No newline at end of file
@@ -0,0 +1,243 @@
+import os
+import logging
+import threading
+import multiprocessing
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterator, List, NamedTuple, Optional
+import feedparser
+from dateutil import parser as date_parser
+
+logger = logging.getLogger(__name__)
+
+# Bytes handed to the incremental parser at a time
+CHUNK_SIZE = 64 * 1024
+
+# Consecutive entries older than the cutoff (in a newest-first feed) after which
+# the rest of the document is not read
+STALE_ENTRY_LIMIT = 3
+
+FEED_ROOTS = {'rss', 'feed', 'RDF'}
+ENTRY_TAGS = {'item', 'entry'}
+SUMMARY_TAGS = ['description', 'summary', 'encoded', 'content']
+DATE_TAGS = ['pubDate', 'published', 'issued', 'date', 'updated', 'modified']
+FEEDPARSER_DATE_FIELDS = ['published_parsed', 'updated_parsed', 'created_parsed']
+
+
+class FeedEntry(NamedTuple):
+    """The fields of a feed entry the scanner uses. Dates are naive UTC."""
+    title: str
+    link: str
+    summary: str
+    published: Optional[datetime]
+    guid: str = ''
+
+
+class NotAFeedError(ValueError):
+    """The document is well-formed XML but not an RSS/Atom feed."""
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+def _text(element) -> str:
+    return ''.join(element.itertext()).strip()
+
+
+def parse_entry_date(value: str) -> Optional[datetime]:
+    """Parse an RFC 822 (RSS) or ISO 8601 (Atom) date into naive UTC."""
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = date_parser.parse(value)
+        except (ValueError, OverflowError):
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _entry_from_element(element) -> FeedEntry:
+    children = {}
+    link = ''
+    for child in element:
+        name = _local_name(child.tag)
+        if name == 'link':
+            # Atom links carry the URL in href; prefer the alternate link
+            href = child.get('href')
+            if href and child.get('rel', 'alternate') == 'alternate' and not link:
+                link = href
+            elif not href and not link:
+                link = _text(child)
+            continue
+        children.setdefault(name, child)
+
+    title = _text(children['title']) if 'title' in children else ''
+    summary = next((_text(children[tag]) for tag in SUMMARY_TAGS if tag in children), '')
+    published = None
+    for tag in DATE_TAGS:
+        if tag in children:
+            published = parse_entry_date(_text(children[tag]))
+            if published:
+                break
+    guid = _text(children['guid']) if 'guid' in children else \
+        _text(children['id']) if 'id' in children else ''
+    return FeedEntry(title=title, link=link, summary=summary, published=published, guid=guid or link)
+
+
+def iter_entries(body: bytes, cutoff_date: Optional[datetime] = None) -> Iterator[FeedEntry]:
+    """
+    Incrementally parse an RSS/Atom document, yielding entries as they complete.
+    Entries older than cutoff_date are dropped, and once a newest-first feed has
+    produced STALE_ENTRY_LIMIT old entries in a row the rest is not read.
+    Raises ET.ParseError for malformed XML and NotAFeedError for other documents.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root_checked = False
+    previous_date = None
+    newest_first = True
+    stale_count = 0
+
+    for offset in range(0, len(body), CHUNK_SIZE):
+        parser.feed(body[offset:offset + CHUNK_SIZE])
+        for event, element in parser.read_events():
+            name = _local_name(element.tag)
+            if event == 'start':
+                if not root_checked:
+                    if name not in FEED_ROOTS:
+                        raise NotAFeedError(f"Unexpected root element <{name}>")
+                    root_checked = True
+                continue
+
+            if name not in ENTRY_TAGS:
+                continue
+
+            entry = _entry_from_element(element)
+            element.clear()
+
+            if entry.published and previous_date and entry.published > previous_date:
+                newest_first = False
+            if entry.published:
+                previous_date = entry.published
+
+            if cutoff_date and entry.published and entry.published < cutoff_date:
+                stale_count += 1
+                if newest_first and stale_count >= STALE_ENTRY_LIMIT:
+                    return
+                continue
+            stale_count = 0
+            yield entry
+
+    parser.close()
+    if not root_checked:
+        raise ET.ParseError("Empty document")
+
+
+def entries_from_feedparser(parsed, cutoff_date: Optional[datetime] = None) -> List[FeedEntry]:
+    """Convert a feedparser result into FeedEntry records."""
+    entries = []
+    for item in parsed.entries:
+        published = None
+        for field in FEEDPARSER_DATE_FIELDS:
+            if item.get(field):
+                published = datetime(*item.get(field)[:6])
+                break
+        if cutoff_date and published and published < cutoff_date:
+            continue
+        link = item.get('link', '')
+        entries.append(FeedEntry(
+            title=item.get('title', ''),
+            link=link,
+            summary=item.get('summary', ''),
+            published=published,
+            guid=item.get('id', '') or link
+        ))
+    return entries
+
+
+def parse_feed(body: bytes, cutoff_date: Optional[datetime] = None) -> Optional[List[FeedEntry]]:
+    """
+    Parse a feed body in a single streaming pass, falling back to feedparser
+    for malformed XML. Returns None when the body is not a usable feed.
+    """
+    try:
+        return list(iter_entries(body, cutoff_date))
+    except (ET.ParseError, NotAFeedError) as e:
+        logger.debug(f"Streaming parse failed ({str(e)}), falling back to feedparser")
+
+    parsed = feedparser.parse(body)
+    if not parsed.entries:
+        return None
+    return entries_from_feedparser(parsed, cutoff_date)
+
+
+class ParserPool:
+    """
+    Parses feed bodies in worker processes, so parsing and sanitizing large
+    feeds is spread over several cores instead of contending for the GIL.
+    Workers get the raw body and return FeedEntry records, never feedparser
+    objects. Bodies under min_bytes are parsed in the calling thread, where
+    shipping them to a process would cost more than the parse.
+    """
+
+    def __init__(self, workers: Optional[int] = None, min_bytes: Optional[int] = None):
+        """
+        Initialize the pool; worker processes are started on first use.
+
+        Args:
+            workers: Parser processes (PARSE_WORKERS, default 0: parse in the calling thread)
+            min_bytes: Smallest body sent to a worker (PARSE_POOL_MIN_BYTES, default 32768)
+        """
+        self.workers = workers if workers is not None else int(os.getenv('PARSE_WORKERS', 0))
+        self.min_bytes = min_bytes if min_bytes is not None else int(os.getenv('PARSE_POOL_MIN_BYTES', 32 * 1024))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers do not inherit the threads and locks of the web app
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def parse(self, body: bytes, cutoff_date: Optional[datetime] = None) -> Optional[List[FeedEntry]]:
+        """parse_feed, run in a worker process when the pool is enabled and the body is large enough."""
+        if not self.enabled or len(body) < self.min_bytes:
+            return parse_feed(body, cutoff_date)
+        try:
+            return self._get_executor().submit(parse_feed, body, cutoff_date).result()
+        except BrokenProcessPool as e:
+            logger.error(f"Feed parser process failed, parsing in process: {str(e)}")
+            self.shutdown()
+            return parse_feed(body, cutoff_date)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_parser_pool() -> ParserPool:
+    """Return the process-wide parser pool, so worker processes are reused across scans."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ParserPool()
+        return _default_pool
@@ -1,37 +1,123 @@
 import os
+import re
+import time
 import logging
 import openai
-from typing import Optional, Dict, Any
+import ollama
+import json
+from typing import Optional, Dict, Any, Callable, Iterator, List
 from dotenv import load_dotenv
 
 # Set up logger
 gpt_logger = logging.getLogger('gpt_agent')
 gpt_logger.setLevel(logging.INFO)
 
-class GPTAgent:
+SYSTEM_MESSAGE = "You are a technology analyst specializing in cloud computing and enterprise technology."
+
+BATCH_PROMPT = '''{instructions}
+
+Apply the instructions above to each of the articles below. Instead of the response
+format given above, respond with a single JSON object and nothing else. Use each
+article's "id" as a key, mapped to an object with the keys "summary", "rating" and
+"rationale" (all strings).
+
+Articles:
+{articles}'''
+
+# Section headers of the Summary:/Rating:/Rationale: response format
+SECTION_HEADER = re.compile(r'^\s*(Summary|Rating|Rationale):', re.MULTILINE)
+
+# Placeholders for the per-article fields of a prompt template
+ARTICLE_FIELDS = ('{title}', '{summary}', '{link}')
+
+def move_article_to_end(template: str) -> str:
+    """
+    Reorder a prompt template so the lines holding the article fields (and an
+    "Article:" style heading just above them) come last. Everything before
+    them is then identical for every article, so a server that caches prompt
+    prefixes can reuse it.
+    """
+    lines = template.split('\n')
+    field_lines = [i for i, line in enumerate(lines) if any(field in line for field in ARTICLE_FIELDS)]
+    if not field_lines:
+        return template
+    start, end = field_lines[0], field_lines[-1]
+    if start > 0 and lines[start - 1].strip().endswith(':') and not any(f in lines[start - 1] for f in ARTICLE_FIELDS):
+        start -= 1
+    instructions = '\n'.join(lines[:start] + lines[end + 1:]).strip()
+    instructions = re.sub(r'\n{3,}', '\n\n', instructions)
+    article = '\n'.join(lines[start:end + 1])
+    return f"{instructions}\n\n{article}" if instructions else article
+
+def _keep_alive(value: str):
+    """Ollama takes a duration string ("30m") or a number of seconds (-1 keeps the model loaded)."""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+class StreamingResponseParser:
+    """
+    Accumulates a streamed Summary:/Rating:/Rationale: response. feed() reports
+    when a section has been completed, i.e. the next section header arrived.
+    """
+
     def __init__(self):
+        self.text = ''
+        self.sections = 0
+        self.completed_until = 0
+
+    def feed(self, delta: str) -> bool:
+        """Add streamed text; True when another section has been completed."""
+        self.text += delta
+        headers = list(SECTION_HEADER.finditer(self.text))
+        started = len(headers) > self.sections
+        self.sections = len(headers)
+        if started and len(headers) > 1:
+            self.completed_until = headers[-1].start()
+            return True
+        return False
+
+    def partial_result(self) -> Dict[str, str]:
+        """The sections completed so far."""
+        return GPTAgent.parse_response(self.text[:self.completed_until])
+
+    def result(self) -> Dict[str, str]:
+        return GPTAgent.parse_response(self.text)
+
+class GPTAgent:
+    def __init__(self, provider: Optional[str] = None):
+        """
+        Configure the agent for one model endpoint.
+
+        Args:
+            provider: 'ollama' or 'openai'; by default chosen by USE_OLLAMA/LLM_PROVIDER
+        """
         load_dotenv()
-        # Detect whether to use a local Ollama model
-        use_ollama_env = os.getenv('USE_OLLAMA', 'false').lower() in ('true', '1', 'yes')
-        llm_provider = os.getenv('LLM_PROVIDER', '').lower()
-        self.use_ollama = use_ollama_env or llm_provider == 'ollama'
+        if provider:
+            self.use_ollama = provider.lower() == 'ollama'
+        else:
+            # Detect whether to use a local Ollama model
+            use_ollama_env = os.getenv('USE_OLLAMA', 'false').lower() in ('true', '1', 'yes')
+            llm_provider = os.getenv('LLM_PROVIDER', '').lower()
+            self.use_ollama = use_ollama_env or llm_provider == 'ollama'
 
+        # Endpoint and key are passed with every request rather than set on the
+        # openai module, so agents for different providers can run side by side
         try:
             if self.use_ollama:
                 # Configure Ollama endpoint — defaults to local instance
-                base_url = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434/v1')
-                # Set up OpenAI configuration for Ollama
-                openai.api_base = base_url
-                openai.api_key = os.getenv('OLLAMA_API_KEY', 'ollama')
+                self.api_base = os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434/v1')
+                self.api_key = os.getenv('OLLAMA_API_KEY', 'ollama')
                 self.model = os.getenv('OLLAMA_MODEL', os.getenv('GPT_MODEL', 'qwen2:7b'))
-                gpt_logger.info(f"GPTAgent configured to use local Ollama model: {self.model} at {base_url}")
+                gpt_logger.info(f"GPTAgent configured to use local Ollama model: {self.model} at {self.api_base}")
             else:
-                api_key = os.getenv('OPENAI_API_KEY')
-                if not api_key:
+                self.api_key = os.getenv('OPENAI_API_KEY')
+                if not self.api_key:
                     raise ValueError("OpenAI API key not found and USE_OLLAMA not enabled")
 
-                # Set up OpenAI configuration
-                openai.api_key = api_key
+                # None keeps the openai library's default endpoint
+                self.api_base = None
                 self.model = os.getenv('GPT_MODEL', 'gpt-3.5-turbo')
                 gpt_logger.info(f"GPTAgent configured to use OpenAI model: {self.model}")
         except Exception as e:
@@ -56,19 +142,167 @@ Format your response as:
 Summary: [your summary]
 Rating: [1-10]
 Rationale: [your rationale]''')
+        self.system_message = SYSTEM_MESSAGE
+        self.max_tokens = 500
+        self.request_timeout = float(os.getenv('LLM_REQUEST_TIMEOUT', 120))
+        self.stream = os.getenv('LLM_STREAM', 'true').lower() in ('true', '1', 'yes')
         self.logger = logging.getLogger('gpt_agent')
 
+        # Ollama-optimized mode (opt-in): the native API keeps the model loaded
+        # between requests, the built-in prompt starts with its static
+        # instructions so the server can reuse the cached prefix, and requests
+        # are capped at the server's parallel slots. A GPT_PROMPT of the user's
+        # is sent as written, so its cache namespace does not change
+        self.ollama_native = self.use_ollama and \
+            os.getenv('OLLAMA_NATIVE', 'false').lower() in ('true', '1', 'yes')
+        self.parallel = 0
+        if self.ollama_native:
+            self.keep_alive = _keep_alive(os.getenv('OLLAMA_KEEP_ALIVE', '30m'))
+            self.parallel = int(os.getenv('OLLAMA_NUM_PARALLEL', 0))
+            self.ollama = ollama.Client(host=re.sub(r'/v1/?$', '', self.api_base), timeout=self.request_timeout)
+            if 'GPT_PROMPT' not in os.environ:
+                self.prompt_template = move_article_to_end(self.prompt_template)
+
     def get_current_prompt(self) -> str:
         """
         Returns the current prompt template being used for evaluations.
-        This is used for cache invalidation when the prompt changes.
+        Together with the model and system message it selects the cache namespace.
         """
         return self.prompt_template
 
-    def evaluate_post(self, title: str, summary: str, link: str) -> Dict[str, str]:
+    def estimate_tokens(self, title: str, summary: str, link: str) -> int:
+        """
+        Rough token count for one evaluation (prompt plus the completion budget),
+        used for tokens-per-minute rate limiting. Assumes ~4 characters per token.
+        """
+        prompt_chars = len(self.prompt_template) + len(title) + len(summary) + len(link)
+        return prompt_chars // 4 + self.max_tokens
+
+    def warm_up(self) -> bool:
+        """
+        Load the Ollama model and pin it for the keep-alive period, so the
+        first evaluation of a scan does not pay the model load time.
+        Does nothing outside Ollama-optimized mode.
+        """
+        if not self.ollama_native:
+            return False
+        started = time.monotonic()
+        try:
+            self.ollama.generate(model=self.model, keep_alive=self.keep_alive)
+        except Exception as e:
+            self.logger.warning(f"Could not warm up Ollama model {self.model}: {str(e)}")
+            return False
+        self.logger.info(f"Ollama model {self.model} loaded in {time.monotonic() - started:.1f}s "
+                         f"(keep-alive {self.keep_alive})")
+        return True
+
+    def _ollama_chat(self, prompt: str, max_tokens: int, stream: bool) -> Iterator[Dict[str, Any]]:
+        """Send one request to the native Ollama chat API, yielding its response parts."""
+        response = self.ollama.chat(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_message},
+                {"role": "user", "content": prompt}
+            ],
+            stream=stream,
+            options={'temperature': 0.3, 'num_predict': max_tokens},
+            keep_alive=self.keep_alive
+        )
+        for part in (response if stream else [response]):
+            if part.get('done'):
+                # Durations are in nanoseconds; a short prompt eval means the prefix was reused
+                self.logger.debug(
+                    f"Ollama timings: load {part.get('load_duration', 0) / 1e9:.2f}s, "
+                    f"prompt {part.get('prompt_eval_count', 0)} tokens in {part.get('prompt_eval_duration', 0) / 1e9:.2f}s, "
+                    f"output {part.get('eval_count', 0)} tokens in {part.get('eval_duration', 0) / 1e9:.2f}s"
+                )
+            yield part
+
+    def _chat(self, prompt: str, max_tokens: int) -> str:
+        """Send one chat completion and return the stripped response text."""
+        if self.ollama_native:
+            parts = self._ollama_chat(prompt, max_tokens, stream=False)
+            return ''.join(part.get('message', {}).get('content', '') for part in parts).strip()
+        response = openai.ChatCompletion.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_message},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,  # Lower temperature for more consistent responses
+            max_tokens=max_tokens,
+            request_timeout=self.request_timeout,
+            api_key=self.api_key,
+            api_base=self.api_base
+        )
+        return response.choices[0].message.content.strip()
+
+    def _chat_stream(self, prompt: str, max_tokens: int) -> Iterator[str]:
+        """Send one streamed chat completion and yield the text as it arrives."""
+        if self.ollama_native:
+            for part in self._ollama_chat(prompt, max_tokens, stream=True):
+                content = part.get('message', {}).get('content')
+                if content:
+                    yield content
+            return
+        response = openai.ChatCompletion.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.system_message},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.3,
+            max_tokens=max_tokens,
+            request_timeout=self.request_timeout,
+            api_key=self.api_key,
+            api_base=self.api_base,
+            stream=True
+        )
+        for chunk in response:
+            choices = chunk.get('choices') or []
+            if choices:
+                delta = choices[0].get('delta') or {}
+                if delta.get('content'):
+                    yield delta['content']
+
+    @staticmethod
+    def parse_response(gpt_response: str) -> Dict[str, str]:
+        """Parse a Summary:/Rating:/Rationale: response into a result dict."""
+        result = {
+            'summary': '',
+            'rating': '',
+            'rationale': ''
+        }
+
+        lines = gpt_response.split('\n')
+        current_section = None
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            if line.startswith('Summary:'):
+                current_section = 'summary'
+                result['summary'] = line[8:].strip()
+            elif line.startswith('Rating:'):
+                current_section = 'rating'
+                result['rating'] = line[7:].strip()
+            elif line.startswith('Rationale:'):
+                current_section = 'rationale'
+                result['rationale'] = line[10:].strip()
+            elif current_section:
+                result[current_section] += ' ' + line
+
+        return result
+
+    def evaluate_post(self, title: str, summary: str, link: str,
+                      on_partial: Optional[Callable[[Dict[str, str]], None]] = None) -> Dict[str, str]:
         """
         Evaluate a blog post using GPT.
-        Returns a dictionary with the evaluation results.
+        Returns a dictionary with the evaluation results. When on_partial is
+        given and streaming is enabled (LLM_STREAM), the response is streamed
+        and on_partial receives the completed sections each time one finishes.
         """
         try:
             # Format the prompt with the article details
@@ -81,49 +315,93 @@ Rationale: [your rationale]''')
             self.logger.info(f"Evaluating post: {title}")
             self.logger.debug(f"Prompt: {prompt}")
 
-            # Get response from GPT / Ollama
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a technology analyst specializing in cloud computing and enterprise technology."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,  # Lower temperature for more consistent responses
-                max_tokens=500
-            )
+            # Get response from GPT / Ollama, streamed when someone is listening
+            if not (self.stream and on_partial):
+                gpt_response = self._chat(prompt, self.max_tokens)
+                self.logger.debug(f"GPT Response: {gpt_response}")
+                return self.parse_response(gpt_response)
 
-            gpt_response = response.choices[0].message.content.strip()
-            self.logger.debug(f"GPT Response: {gpt_response}")
+            parser = StreamingResponseParser()
+            for delta in self._chat_stream(prompt, self.max_tokens):
+                if parser.feed(delta):
+                    on_partial(parser.partial_result())
+            self.logger.debug(f"GPT Response: {parser.text}")
+            return parser.result()
 
-            # Parse the response
-            result = {
-                'summary': '',
-                'rating': '',
-                'rationale': ''
-            }
+        except Exception as e:
+            self.logger.error(f"Error evaluating post: {str(e)}")
+            raise
 
-            lines = gpt_response.split('\n')
-            current_section = None
+    def build_batch_prompt(self, articles: List[Dict[str, str]]) -> str:
+        """
+        Build one prompt covering several articles. The configured prompt is
+        kept as the per-article instructions and the model is asked for JSON
+        keyed by article id.
+        """
+        instructions = self.prompt_template.format(
+            title='<article title>',
+            summary='<article summary>',
+            link='<article link>'
+        )
+        payload = [
+            {'id': article['id'], 'title': article['title'],
+             'summary': article['summary'], 'link': article['link']}
+            for article in articles
+        ]
+        return BATCH_PROMPT.format(
+            instructions=instructions,
+            articles=json.dumps(payload, ensure_ascii=False, indent=1)
+        )
 
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
+    def estimate_batch_tokens(self, articles: List[Dict[str, str]]) -> int:
+        """Rough token count for one batched evaluation."""
+        return sum(self.estimate_tokens(a['title'], a['summary'], a['link']) for a in articles)
 
-                if line.startswith('Summary:'):
-                    current_section = 'summary'
-                    result['summary'] = line[8:].strip()
-                elif line.startswith('Rating:'):
-                    current_section = 'rating'
-                    result['rating'] = line[7:].strip()
-                elif line.startswith('Rationale:'):
-                    current_section = 'rationale'
-                    result['rationale'] = line[10:].strip()
-                elif current_section:
-                    result[current_section] += ' ' + line
+    @staticmethod
+    def parse_batch_response(gpt_response: str) -> Dict[str, Dict[str, str]]:
+        """
+        Parse a batched JSON response into per-article result dicts.
+        Items that are missing fields or not objects are left out.
+        Raises ValueError when no JSON object can be found.
+        """
+        start, end = gpt_response.find('{'), gpt_response.rfind('}')
+        if start == -1 or end <= start:
+            raise ValueError("No JSON object in batch response")
+        data = json.loads(gpt_response[start:end + 1])
+        if not isinstance(data, dict):
+            raise ValueError("Batch response is not a JSON object")
 
-            return result
+        results = {}
+        for article_id, item in data.items():
+            if not isinstance(item, dict):
+                continue
+            if not all(item.get(key) not in (None, '') for key in ('summary', 'rating')):
+                continue
+            results[str(article_id)] = {
+                'summary': str(item.get('summary', '')).strip(),
+                'rating': str(item.get('rating', '')).strip(),
+                'rationale': str(item.get('rationale', '')).strip()
+            }
+        return results
 
-        except Exception as e:
-            self.logger.error(f"Error evaluating post: {str(e)}")
-            raise
+    def evaluate_batch(self, articles: List[Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+        """
+        Evaluate several articles (dicts with id, title, summary, link) in one request.
+        Returns results keyed by article id. Articles the model drops or garbles
+        are left out; EvaluationPool retries them as requests of their own.
+        """
+        if len(articles) == 1:
+            article = articles[0]
+            return {article['id']: self.evaluate_post(article['title'], article['summary'], article['link'])}
+
+        self.logger.info(f"Evaluating batch of {len(articles)} posts")
+        prompt = self.build_batch_prompt(articles)
+        try:
+            gpt_response = self._chat(prompt, self.max_tokens * len(articles))
+            self.logger.debug(f"GPT Batch Response: {gpt_response}")
+            results = self.parse_batch_response(gpt_response)
+        except ValueError as e:
+            self.logger.warning(f"Unusable batch response: {str(e)}")
+            return {}
+
+        return {article['id']: results[article['id']] for article in articles if article['id'] in results}
@@ -0,0 +1,184 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+from cto_signal_scanner.utils.gpt_agent import GPTAgent
+from cto_signal_scanner.utils.prefilter import rating_value
+from cto_signal_scanner.utils.text_prep import estimate_tokens
+
+logger = logging.getLogger('gpt_agent')
+
+
+def tiered_routing_enabled() -> bool:
+    return os.getenv('LLM_ROUTING', 'single').lower() == 'tiered'
+
+
+class TierStats:
+    """Calls, latency and estimated token cost of one model tier."""
+
+    def __init__(self, model: str, cost_per_1k_tokens: float):
+        self.model = model
+        self.cost_per_1k_tokens = cost_per_1k_tokens
+        self.calls = 0
+        self.failures = 0
+        self.articles = 0
+        self.seconds = 0.0
+        self.tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, tokens: int, articles: int = 1, failed: bool = False):
+        with self._lock:
+            self.calls += 1
+            self.failures += int(failed)
+            self.articles += articles
+            self.seconds += seconds
+            self.tokens += tokens
+
+    @property
+    def cost(self) -> float:
+        return self.tokens / 1000 * self.cost_per_1k_tokens
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'model': self.model,
+                'calls': self.calls,
+                'failures': self.failures,
+                'articles': self.articles,
+                'avg_latency': self.seconds / self.calls if self.calls else 0.0,
+                'tokens': self.tokens,
+                'cost': round(self.cost, 4)
+            }
+
+
+def _result_tokens(result: Dict[str, str]) -> int:
+    return estimate_tokens(' '.join(str(value) for value in result.values()))
+
+
+class ModelRouter:
+    """
+    Rates every article with a fast local model and re-evaluates only the
+    ambiguous ones (a rating inside the escalation band, or output without a
+    usable rating) with the larger remote model. It offers the GPTAgent
+    evaluation interface, so EvaluationPool can use it in place of an agent.
+    """
+
+    def __init__(self, local_agent: Optional[GPTAgent] = None, remote_agent: Optional[GPTAgent] = None,
+                 escalate_min: Optional[float] = None, escalate_max: Optional[float] = None,
+                 local_cost: Optional[float] = None, remote_cost: Optional[float] = None):
+        """
+        Initialize the router.
+
+        Args:
+            local_agent: First-pass agent; defaults to the Ollama configuration
+            remote_agent: Escalation agent; defaults to the OpenAI configuration
+            escalate_min: Lowest local rating that is re-evaluated (ROUTER_ESCALATE_MIN, default 5)
+            escalate_max: Highest local rating that is re-evaluated (ROUTER_ESCALATE_MAX, default 7)
+            local_cost: Local model price per 1K tokens (ROUTER_LOCAL_COST_PER_1K, default 0)
+            remote_cost: Remote model price per 1K tokens (ROUTER_REMOTE_COST_PER_1K, default 0.002)
+        """
+        self.local = local_agent or GPTAgent(provider='ollama')
+        self.remote = remote_agent or GPTAgent(provider='openai')
+        self.escalate_min = escalate_min if escalate_min is not None else float(os.getenv('ROUTER_ESCALATE_MIN', 5))
+        self.escalate_max = escalate_max if escalate_max is not None else float(os.getenv('ROUTER_ESCALATE_MAX', 7))
+        local_cost = local_cost if local_cost is not None else float(os.getenv('ROUTER_LOCAL_COST_PER_1K', 0))
+        remote_cost = remote_cost if remote_cost is not None else float(os.getenv('ROUTER_REMOTE_COST_PER_1K', 0.002))
+
+        # The routed results depend on both models and the band, so all of them
+        # go into the name that selects the cache namespace
+        self.model = f"{self.local.model}>{self.remote.model}@{self.escalate_min:g}-{self.escalate_max:g}"
+        self.system_message = self.remote.system_message
+        self.max_tokens = self.remote.max_tokens
+        self.parallel = self.local.parallel
+        self.stats = {
+            'local': TierStats(self.local.model, local_cost),
+            'remote': TierStats(self.remote.model, remote_cost),
+        }
+        logger.info(f"Tiered routing: {self.local.model} first, ratings "
+                    f"{self.escalate_min:g}-{self.escalate_max:g} escalated to {self.remote.model}")
+
+    def get_current_prompt(self) -> str:
+        return self.remote.get_current_prompt()
+
+    def warm_up(self) -> bool:
+        # Only the local tier has a model to load
+        return self.local.warm_up()
+
+    def estimate_tokens(self, title: str, summary: str, link: str) -> int:
+        # Rate limits protect the remote quota; assume the article may be escalated
+        return self.remote.estimate_tokens(title, summary, link)
+
+    def estimate_batch_tokens(self, articles: List[Dict[str, str]]) -> int:
+        return self.remote.estimate_batch_tokens(articles)
+
+    def needs_escalation(self, result: Optional[Dict[str, str]]) -> bool:
+        if not result:
+            return True
+        rating = rating_value(result.get('rating'))
+        return rating is None or self.escalate_min <= rating <= self.escalate_max
+
+    def _call(self, tier: str, call: Callable, prompt_tokens: int, articles: Optional[int] = None):
+        """
+        Run one model call and record its latency and estimated tokens.
+        articles is the batch size for evaluate_batch calls, None for a single evaluation.
+        """
+        started = time.monotonic()
+        try:
+            result = call()
+        except Exception:
+            self.stats[tier].record(time.monotonic() - started, prompt_tokens, articles or 1, failed=True)
+            raise
+        completion = [result] if articles is None else result.values()
+        tokens = prompt_tokens + sum(_result_tokens(item) for item in completion)
+        self.stats[tier].record(time.monotonic() - started, tokens, articles or 1)
+        return result
+
+    def _prompt_tokens(self, agent: GPTAgent, articles: List[Dict[str, str]]) -> int:
+        # estimate_tokens includes the completion budget; count what came back instead
+        return sum(agent.estimate_tokens(a['title'], a['summary'], a['link']) - agent.max_tokens for a in articles)
+
+    def evaluate_post(self, title: str, summary: str, link: str,
+                      on_partial: Optional[Callable[[Dict[str, str]], None]] = None) -> Dict[str, str]:
+        """Evaluate with the local model, escalating ambiguous or failed evaluations."""
+        kwargs = {'on_partial': on_partial} if on_partial else {}
+        article = [{'title': title, 'summary': summary, 'link': link}]
+        try:
+            result = self._call('local', lambda: self.local.evaluate_post(title, summary, link, **kwargs),
+                                self._prompt_tokens(self.local, article))
+        except Exception as e:
+            logger.warning(f"Local model failed on {title}, escalating: {str(e)}")
+            result = None
+        if not self.needs_escalation(result):
+            return result
+
+        logger.info(f"Escalating to {self.remote.model}: {title}")
+        return self._call('remote', lambda: self.remote.evaluate_post(title, summary, link, **kwargs),
+                          self._prompt_tokens(self.remote, article))
+
+    def evaluate_batch(self, articles: List[Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+        """Evaluate a batch locally, then re-evaluate the ambiguous items as one remote batch."""
+        try:
+            results = self._call('local', lambda: self.local.evaluate_batch(articles),
+                                 self._prompt_tokens(self.local, articles), len(articles))
+        except Exception as e:
+            logger.warning(f"Local model failed on a batch of {len(articles)}, escalating: {str(e)}")
+            results = {}
+
+        escalated = [article for article in articles if self.needs_escalation(results.get(article['id']))]
+        if escalated:
+            logger.info(f"Escalating {len(escalated)} of {len(articles)} batched posts to {self.remote.model}")
+            results.update(self._call('remote', lambda: self.remote.evaluate_batch(escalated),
+                                      self._prompt_tokens(self.remote, escalated), len(escalated)))
+        return results
+
+    def get_stats(self) -> Dict[str, Dict]:
+        return {tier: stats.as_dict() for tier, stats in self.stats.items()}
+
+    def log_stats(self):
+        for tier, stats in self.get_stats().items():
+            logger.info(
+                f"{tier} tier ({stats['model']}): {stats['articles']} articles in {stats['calls']} calls, "
+                f"{stats['failures']} failed, avg latency {stats['avg_latency']:.2f}s, "
+                f"~{stats['tokens']} tokens, est. cost ${stats['cost']:.4f}"
+            )
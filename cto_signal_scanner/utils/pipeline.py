@@ -0,0 +1,160 @@
+import os
+import time
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input; each worker of the stage consumes one
+_END = object()
+
+
+class Stage:
+    """
+    One step of a pipeline: fn is applied to every input item by the stage's
+    own worker threads. fn returns the item to pass on, or None to drop it;
+    with fan_out it returns an iterable of items instead.
+    """
+
+    def __init__(self, name: str, fn: Callable[[Any], Any], workers: int = 1, fan_out: bool = False):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.fan_out = fan_out
+        self.processed = 0
+        self.emitted = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def process(self, item: Any) -> List[Any]:
+        """Apply fn to one item and return its outputs."""
+        started = time.monotonic()
+        try:
+            output = self.fn(item)
+            if self.fan_out:
+                outputs = [out for out in (output or []) if out is not None]
+            else:
+                outputs = [] if output is None else [output]
+        except Exception:
+            self._record(time.monotonic() - started, 0, failed=True)
+            raise
+        self._record(time.monotonic() - started, len(outputs))
+        return outputs
+
+    def _record(self, seconds: float, emitted: int, failed: bool = False):
+        with self._lock:
+            self.processed += 1
+            self.emitted += emitted
+            self.errors += int(failed)
+            self.seconds += seconds
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'processed': self.processed,
+                'emitted': self.emitted,
+                'errors': self.errors,
+                'seconds': round(self.seconds, 3)
+            }
+
+
+class Pipeline:
+    """
+    Runs items through a chain of stages connected by bounded queues. A stage
+    whose output queue is full blocks, so a slow stage holds back the stages
+    before it instead of letting their output pile up in memory. The outputs
+    of the last stage are discarded; it is the sink.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: Optional[int] = None,
+                 cancel_event: Optional[threading.Event] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            stages: Stages in order; names must be unique
+            queue_size: Items buffered between two stages (PIPELINE_QUEUE_SIZE, default 8)
+            cancel_event: Event that cancels the pipeline when set, for cancelling from outside
+        """
+        self.stages = list(stages)
+        self.queue_size = queue_size or int(os.getenv('PIPELINE_QUEUE_SIZE', 8))
+        self._cancelled = cancel_event or threading.Event()
+
+    def stage(self, name: str) -> Stage:
+        return next(stage for stage in self.stages if stage.name == name)
+
+    def replace(self, stage: Stage):
+        """Swap in a stage with the same name, e.g. a different sink or a test double."""
+        index = self.stages.index(self.stage(stage.name))
+        self.stages[index] = stage
+
+    def cancel(self):
+        """Stop processing; items still queued are drained without being processed."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def _work(self, index: int, queues: List[queue.Queue], remaining: List[int], lock: threading.Lock):
+        stage = self.stages[index]
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = inbox.get()
+            if item is _END:
+                break
+            if self.cancelled:
+                continue
+            try:
+                outputs = stage.process(item)
+            except Exception as e:
+                logger.error(f"Error in pipeline stage {stage.name}: {str(e)}", exc_info=True)
+                continue
+            if outbox is not None:
+                for output in outputs:
+                    outbox.put(output)
+
+        # The last worker of a stage to finish ends the next stage's input
+        with lock:
+            remaining[index] -= 1
+            last = remaining[index] == 0
+        if last and outbox is not None:
+            for _ in range(self.stages[index + 1].workers):
+                outbox.put(_END)
+
+    def run(self, items: Iterable[Any]):
+        """Feed items into the first stage and block until every stage has finished."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        remaining = [stage.workers for stage in self.stages]
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=self._work, args=(index, queues, remaining, lock),
+                             name=f"pipeline-{stage.name}-{worker}", daemon=True)
+            for index, stage in enumerate(self.stages)
+            for worker in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for item in items:
+                if self.cancelled:
+                    break
+                queues[0].put(item)
+        finally:
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_END)
+            for thread in threads:
+                thread.join()
+
+    def stats(self) -> Dict[str, Dict]:
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def log_stats(self):
+        for name, stats in self.stats().items():
+            logger.info(f"Stage {name} ({stats['workers']} workers): {stats['processed']} in, "
+                        f"{stats['emitted']} out, {stats['errors']} errors, {stats['seconds']:.2f}s busy")
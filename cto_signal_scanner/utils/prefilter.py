@@ -0,0 +1,185 @@
+import os
+import re
+import math
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Middle of the 1-10 rating scale, used before any ratings have been learned
+NEUTRAL_SCORE = 5.5
+
+# Cached ratings needed before the learned weights are used
+MIN_TRAINING_SAMPLES = 50
+# Words seen in fewer cached articles than this carry no learned weight
+MIN_TOKEN_COUNT = 3
+
+# Adjustments on the rating scale for phrases that reliably move relevance
+DEFAULT_KEYWORD_WEIGHTS = {
+    'vulnerability': 1.5,
+    'security': 1.0,
+    'breach': 1.5,
+    'outage': 1.5,
+    'deprecation': 1.0,
+    'end of life': 1.0,
+    'pricing': 1.0,
+    'acquisition': 1.0,
+    'generally available': 1.0,
+    'compliance': 0.5,
+    'regulation': 0.5,
+    'webinar': -2.0,
+    'register now': -2.0,
+    'join us': -1.5,
+    'meetup': -2.0,
+    'user group': -1.5,
+    'summit': -1.0,
+    'roadshow': -2.0,
+    'livestream': -1.5,
+    'recap': -1.0,
+    'customer story': -1.5,
+    'award': -1.0,
+    'giveaway': -2.0,
+    'hiring': -1.5,
+}
+
+# Categorical ratings on the 1-10 scale: Low 1-3, Medium 4-7, High 8-10
+CATEGORICAL_RATINGS = {'low': 2.0, 'medium': 5.5, 'high': 9.0}
+_CATEGORY_RE = re.compile(r'\W*(low|medium|high)\b', re.IGNORECASE)
+
+_TOKEN_RE = re.compile(r'[a-z0-9][a-z0-9+#.-]*[a-z0-9+#]|[a-z0-9]')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words of the text with HTML tags removed."""
+    text = re.sub(r'<[^>]+>', ' ', text or '')
+    return _TOKEN_RE.findall(text.lower())
+
+
+def article_text(title: str, summary: str) -> str:
+    """The text an article is scored on, and stored with its evaluation to train on."""
+    return f"{title} {summary}"
+
+
+def is_skipped(result: Dict[str, str]) -> bool:
+    """Whether a result is a pre-filter estimate rather than a model evaluation."""
+    return bool(result.get('skipped'))
+
+
+def parse_rating(value) -> Optional[float]:
+    """The first number in a rating string ("7", "7/10", "Rating: 7"), if it is on the 1-10 scale."""
+    match = re.search(r'\d+(?:\.\d+)?', str(value or ''))
+    if not match:
+        return None
+    rating = float(match.group())
+    return rating if 1 <= rating <= 10 else None
+
+
+def rating_value(value) -> Optional[float]:
+    """
+    A rating on the 1-10 scale: a number as parse_rating reads it, or a
+    High/Medium/Low rating (as the web app's default prompt asks for) at the
+    middle of its band.
+    """
+    rating = parse_rating(value)
+    if rating is None:
+        match = _CATEGORY_RE.match(str(value or ''))
+        rating = CATEGORICAL_RATINGS[match.group(1).lower()] if match else None
+    return rating
+
+
+class RelevanceScorer:
+    """
+    Cheap local estimate of an article's rating, used to skip the LLM for
+    articles that would clearly rate low. The estimate combines keyword
+    weights with per-word weights learned from cached evaluations; articles
+    scoring below the threshold get a "Skipped: low prior" result instead.
+    """
+
+    def __init__(self, threshold: Optional[float] = None,
+                 keyword_weights: Optional[Dict[str, float]] = None, smoothing: float = 5.0):
+        """
+        Initialize the scorer.
+
+        Args:
+            threshold: Estimated rating below which articles are skipped (PREFILTER_THRESHOLD, default 0 = off)
+            keyword_weights: Phrase to rating adjustment; defaults to DEFAULT_KEYWORD_WEIGHTS
+            smoothing: Pseudo-count that shrinks the weights of rarely seen words towards zero
+        """
+        self.threshold = threshold if threshold is not None else float(os.getenv('PREFILTER_THRESHOLD', 0))
+        self.keyword_weights = DEFAULT_KEYWORD_WEIGHTS if keyword_weights is None else keyword_weights
+        self.smoothing = smoothing
+        self.bias = NEUTRAL_SCORE
+        self.token_weights = {}
+        self.scored = 0
+        self.skipped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def train(self, samples: Iterable[Tuple[str, str]]) -> int:
+        """
+        Learn word weights from (text, rating) pairs, where text is the
+        article_text of the prepared article the model rated. Each word's weight is the
+        smoothed mean difference between the ratings of articles containing it
+        and the overall mean. Returns the number of usable samples; with fewer
+        than MIN_TRAINING_SAMPLES only the keyword weights are used.
+        """
+        documents = []
+        for text, rating in samples:
+            rating = rating_value(rating)
+            tokens = set(tokenize(text))
+            if rating is not None and tokens:
+                documents.append((tokens, rating))
+        if len(documents) < MIN_TRAINING_SAMPLES:
+            logger.info(f"Pre-filter has {len(documents)} rated articles to learn from, using keyword weights only")
+            return len(documents)
+
+        mean = sum(rating for _, rating in documents) / len(documents)
+        residuals = defaultdict(float)
+        counts = defaultdict(int)
+        for tokens, rating in documents:
+            for token in tokens:
+                residuals[token] += rating - mean
+                counts[token] += 1
+
+        self.bias = mean
+        self.token_weights = {
+            token: residuals[token] / (count + self.smoothing)
+            for token, count in counts.items() if count >= MIN_TOKEN_COUNT
+        }
+        logger.info(f"Pre-filter learned {len(self.token_weights)} word weights from {len(documents)} rated articles")
+        return len(documents)
+
+    def score(self, title: str, summary: str) -> float:
+        """Estimated rating on the 1-10 scale."""
+        text = article_text(title, summary)
+        tokens = set(tokenize(text))
+        weights = [self.token_weights[token] for token in tokens if token in self.token_weights]
+        # Averaging (scaled by sqrt of the count) keeps long summaries from drowning out short ones
+        learned = sum(weights) / math.sqrt(len(weights)) if weights else 0.0
+
+        normalized = ' '.join(tokenize(text))
+        keywords = sum(weight for phrase, weight in self.keyword_weights.items()
+                       if re.search(rf'\b{re.escape(phrase)}\b', normalized))
+        return max(1.0, min(10.0, self.bias + learned + keywords))
+
+    def should_skip(self, title: str, summary: str) -> Tuple[bool, float]:
+        """Score an article and count it; returns (skip, score)."""
+        score = self.score(title, summary)
+        skip = self.enabled and score < self.threshold
+        self.scored += 1
+        if skip:
+            self.skipped += 1
+        return skip, score
+
+    def skipped_result(self, summary: str, score: float) -> Dict[str, str]:
+        """Result used in place of an LLM evaluation for a skipped article."""
+        text = re.sub(r'\s+', ' ', re.sub(r'<[^>]+>', ' ', summary or '')).strip()
+        return {
+            'summary': text[:300],
+            'rating': f"{score:.0f}",
+            'rationale': f"Skipped: low prior (estimated {score:.1f}, threshold {self.threshold:g}); not sent to the model",
+            'skipped': True
+        }
@@ -0,0 +1,140 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from functools import partial
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Progress counters of a scan; publishing one of these events adds its count
+COUNTERS = ('feeds_total', 'feeds_fetched', 'feeds_failed', 'articles_found', 'articles_evaluated',
+            'cache_hits', 'articles_skipped')
+
+
+class ProgressBus:
+    """
+    In-process publish/subscribe for scan progress. Events go into one
+    shared, bounded log and a publish wakes all listeners with a single
+    notify_all; each listener keeps its own position in the log, so
+    publishing costs the same however many viewers are connected. A
+    listener that falls behind by more than the log holds skips the events
+    it missed; the counters it receives are always current.
+    """
+
+    def __init__(self, history: Optional[int] = None):
+        """
+        Initialize the bus.
+
+        Args:
+            history: Events kept for listeners that are behind or join a running scan (PROGRESS_HISTORY, default 2000)
+        """
+        self._log = deque(maxlen=history or int(os.getenv('PROGRESS_HISTORY', 2000)))
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._last_scan = 0
+        self._active: Dict[int, Dict[str, int]] = {}
+
+    def start(self) -> int:
+        """Begin a scan and return its ID, for publish and finish."""
+        with self._cond:
+            self._last_scan += 1
+            scan_id = self._last_scan
+            self._active[scan_id] = dict.fromkeys(COUNTERS, 0)
+            self._append(scan_id, 'started', None)
+        return scan_id
+
+    def publish(self, scan_id: int, event: str, count: int = 1, data=None):
+        """Publish an event of a running scan; counter events add count to their counter."""
+        with self._cond:
+            counters = self._active.get(scan_id)
+            if counters is None:
+                return
+            if event in counters:
+                counters[event] += count
+            self._append(scan_id, event, data)
+
+    def publisher(self, scan_id: int) -> Callable:
+        """publish bound to one scan: on_progress(event, count=1, data=None)."""
+        return partial(self.publish, scan_id)
+
+    def finish(self, scan_id: int, **data):
+        """End a scan; its listeners receive a 'finished' event with the final counters and data."""
+        with self._cond:
+            counters = self._active.pop(scan_id, None)
+            if counters is not None:
+                self._append(scan_id, 'finished', dict(counters, **data))
+
+    def progress(self, scan_id: int) -> Optional[Dict[str, int]]:
+        """Current counters of a running scan, or None once it has finished."""
+        with self._cond:
+            counters = self._active.get(scan_id)
+            return dict(counters) if counters is not None else None
+
+    @property
+    def scanning(self) -> bool:
+        with self._cond:
+            return bool(self._active)
+
+    def _append(self, scan_id: int, event: str, data):
+        self._seq += 1
+        self._log.append((self._seq, scan_id, event, data))
+        self._cond.notify_all()
+
+    def _since(self, cursor: int) -> List[Tuple]:
+        if not self._log or self._log[-1][0] <= cursor:
+            return []
+        # Sequence numbers in the log are consecutive
+        return list(islice(self._log, max(0, cursor - self._log[0][0] + 1), None))
+
+    def listen(self, heartbeat: float = 15.0, idle_timeout: Optional[float] = None
+               ) -> Iterator[Tuple[List[Tuple[str, object]], Optional[Dict[str, int]]]]:
+        """
+        Follow one scan: the oldest one running, or else the next to start.
+        Yields (events, progress) each time there is news, where events are
+        (event, data) pairs and progress the scan's counters at that point,
+        so a burst of counter events costs a listener one update. Yields
+        ([], None) after heartbeat seconds without news, and stops after the
+        scan's 'finished' event, or after idle_timeout seconds without a
+        scan to follow. Events of a scan already running when listen is
+        called are replayed as far as the log reaches back.
+        """
+        with self._cond:
+            scan_id = min(self._active) if self._active else None
+            cursor = self._log[0][0] - 1 if scan_id is not None and self._log else self._seq
+        return self._follow(scan_id, cursor, heartbeat, idle_timeout)
+
+    def _follow(self, scan_id: Optional[int], cursor: int, heartbeat: float, idle_timeout: Optional[float]):
+        deadline = time.monotonic() + idle_timeout if idle_timeout else None
+        last_sent = time.monotonic()
+        while True:
+            with self._cond:
+                batch = self._since(cursor)
+                if not batch:
+                    wait = heartbeat - (time.monotonic() - last_sent)
+                    if scan_id is None and deadline is not None:
+                        wait = min(wait, deadline - time.monotonic())
+                    self._cond.wait(max(0.0, wait))
+                    batch = self._since(cursor)
+                if batch:
+                    cursor = batch[-1][0]
+                if scan_id is None:
+                    scan_id = next((scan for _, scan, event, _ in batch if event == 'started'), None)
+                events = [(event, data) for _, scan, event, data in batch if scan == scan_id] \
+                    if scan_id is not None else []
+                progress = self._active.get(scan_id)
+                progress = dict(progress) if progress is not None else None
+
+            now = time.monotonic()
+            if events:
+                last_sent = now
+                yield events, progress
+                if any(event == 'finished' for event, _ in events):
+                    return
+            elif scan_id is None and deadline is not None and now >= deadline:
+                return
+            elif now - last_sent >= heartbeat:
+                last_sent = now
+                yield [], None
@@ -0,0 +1,361 @@
+import os
+import re
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 3
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_accessed REAL NOT NULL,
+    article TEXT,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_responses_created ON responses (created_at);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (namespace, last_accessed);
+CREATE TABLE IF NOT EXISTS namespaces (
+    namespace TEXT PRIMARY KEY,
+    prompt TEXT,
+    model TEXT,
+    system_message TEXT,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS claims (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+'''
+
+# Rows written before namespaces existed; adopted by the first namespace whose prompt matches
+LEGACY_NAMESPACE = ''
+
+
+def normalize_content(text: str) -> str:
+    """Collapse whitespace so formatting-only differences map to the same key."""
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def namespace_fingerprint(prompt: str, model: str, system_message: str) -> str:
+    """Identify the evaluation setup that produced a response."""
+    payload = json.dumps([prompt, model, system_message])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class ResponseCache:
+    """
+    SQLite store for GPT evaluations, keyed by a hash of the normalized article
+    content. Responses live in namespaces fingerprinted by prompt, model and
+    system message, so switching prompts keeps earlier evaluations around.
+    Entries are written as they are produced and evicted by age, by
+    least-recent use within a namespace, and by dropping the least recently
+    used namespaces. Processes sharing the file can claim a key while they
+    evaluate it, so others wait for the result instead of repeating the call.
+    """
+
+    def __init__(self, db_path, max_entries: Optional[int] = None, max_age_days: Optional[float] = None,
+                 max_namespaces: Optional[int] = None, shared_lock: Optional[bool] = None,
+                 claim_ttl: Optional[float] = None):
+        """
+        Open (or create) the cache.
+
+        Args:
+            db_path: SQLite database file
+            max_entries: Entries kept per namespace (GPT_CACHE_MAX_ENTRIES, default 50000)
+            max_age_days: Entries older than this are evicted (GPT_CACHE_MAX_AGE_DAYS, default 180)
+            max_namespaces: Namespaces kept, least recently used dropped first (GPT_CACHE_MAX_NAMESPACES, default 5)
+            shared_lock: Claim keys across processes while evaluating them (GPT_CACHE_SHARED_LOCK, default false)
+            claim_ttl: Seconds before an unreleased claim lapses (GPT_CACHE_CLAIM_TTL, default 300)
+        """
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries or int(os.getenv('GPT_CACHE_MAX_ENTRIES', 50000))
+        self.max_age_days = max_age_days if max_age_days is not None else \
+            float(os.getenv('GPT_CACHE_MAX_AGE_DAYS', 180))
+        self.max_namespaces = max_namespaces or int(os.getenv('GPT_CACHE_MAX_NAMESPACES', 5))
+        self.shared_lock = shared_lock if shared_lock is not None else \
+            os.getenv('GPT_CACHE_SHARED_LOCK', 'false').lower() in ('true', '1', 'yes')
+        self.claim_ttl = claim_ttl if claim_ttl is not None else float(os.getenv('GPT_CACHE_CLAIM_TTL', 300))
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.namespace = LEGACY_NAMESPACE
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._migrate()
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+
+    def _migrate(self):
+        """
+        Move un-namespaced responses from the version 1 layout into the legacy
+        namespace, and add the article text column of version 3.
+        """
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(responses)')]
+        if version >= SCHEMA_VERSION or not columns:
+            return
+        if 'namespace' in columns:
+            if 'article' not in columns:
+                with self.conn:
+                    self.conn.execute('ALTER TABLE responses ADD COLUMN article TEXT')
+            return
+        with self.conn:
+            self.conn.execute('DROP INDEX IF EXISTS idx_responses_created')
+            self.conn.execute('DROP INDEX IF EXISTS idx_responses_accessed')
+            self.conn.execute('ALTER TABLE responses RENAME TO responses_v1')
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(
+                'INSERT INTO responses (namespace, key, result, created_at, last_accessed) '
+                'SELECT ?, key, result, created_at, last_accessed FROM responses_v1',
+                (LEGACY_NAMESPACE,)
+            )
+            self.conn.execute('DROP TABLE responses_v1')
+
+    @staticmethod
+    def cache_key(title: str, summary: str, link: str) -> str:
+        """Content-addressed key for an article."""
+        content = normalize_content(f"{title}:{summary}:{link}")
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def use_namespace(self, prompt: str, model: str, system_message: str) -> str:
+        """
+        Select (creating if needed) the namespace for an evaluation setup.
+        Responses cached before namespaces existed are adopted when the prompt matches.
+        """
+        namespace = namespace_fingerprint(prompt, model, system_message)
+        now = time.time()
+        with self._lock, self.conn:
+            exists = self.conn.execute(
+                'SELECT 1 FROM namespaces WHERE namespace = ?', (namespace,)
+            ).fetchone()
+            if exists:
+                self.conn.execute('UPDATE namespaces SET last_used = ? WHERE namespace = ?', (now, namespace))
+            else:
+                logger.info(f"Creating GPT cache namespace {namespace} for model {model}")
+                self.conn.execute(
+                    'INSERT INTO namespaces (namespace, prompt, model, system_message, created_at, last_used) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (namespace, prompt, model, system_message, now, now)
+                )
+                legacy_prompt = self.conn.execute(
+                    "SELECT value FROM meta WHERE name = 'prompt'"
+                ).fetchone()
+                if legacy_prompt and legacy_prompt[0] == prompt:
+                    adopted = self.conn.execute(
+                        'UPDATE OR IGNORE responses SET namespace = ? WHERE namespace = ?',
+                        (namespace, LEGACY_NAMESPACE)
+                    ).rowcount
+                    self.conn.execute("DELETE FROM meta WHERE name = 'prompt'")
+                    logger.info(f"Adopted {adopted} cached responses into namespace {namespace}")
+        self.namespace = namespace
+        return namespace
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT result FROM responses WHERE namespace = ? AND key = ?', (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                return None
+            with self.conn:
+                self.conn.execute(
+                    'UPDATE responses SET last_accessed = ? WHERE namespace = ? AND key = ?',
+                    (time.time(), self.namespace, key)
+                )
+        return json.loads(row[0])
+
+    def put(self, key: str, result: Dict[str, str], article: Optional[str] = None):
+        """Store a response; article is the text that was evaluated, kept for training the pre-filter."""
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses (namespace, key, result, created_at, last_accessed, article) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (self.namespace, key, json.dumps(result), now, now, article)
+            )
+
+    def claim(self, key: str) -> bool:
+        """Claim a key for evaluation; False while another owner holds an unexpired claim."""
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                'DELETE FROM claims WHERE namespace = ? AND key = ? AND expires_at < ?',
+                (self.namespace, key, now)
+            )
+            self.conn.execute(
+                'INSERT OR IGNORE INTO claims (namespace, key, owner, expires_at) VALUES (?, ?, ?, ?)',
+                (self.namespace, key, self.owner, now + self.claim_ttl)
+            )
+            row = self.conn.execute(
+                'SELECT owner FROM claims WHERE namespace = ? AND key = ?', (self.namespace, key)
+            ).fetchone()
+        return row is not None and row[0] == self.owner
+
+    def release(self, key: str):
+        with self._lock, self.conn:
+            self.conn.execute(
+                'DELETE FROM claims WHERE namespace = ? AND key = ? AND owner = ?',
+                (self.namespace, key, self.owner)
+            )
+
+    def is_claimed(self, key: str) -> bool:
+        """Whether any owner holds an unexpired claim on key."""
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT 1 FROM claims WHERE namespace = ? AND key = ? AND expires_at >= ?',
+                (self.namespace, key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def wait_for(self, key: str, poll_interval: float = 0.5) -> Optional[Dict[str, str]]:
+        """
+        Wait while another owner's claim on key is held. Returns the cached
+        response, or None if the claim was released or lapsed without one.
+        """
+        while True:
+            result = self.get(key)
+            if result is not None or not self.is_claimed(key):
+                return result
+            time.sleep(poll_interval)
+
+    def __len__(self) -> int:
+        """Number of responses in the current namespace."""
+        with self._lock:
+            return self.conn.execute(
+                'SELECT COUNT(*) FROM responses WHERE namespace = ?', (self.namespace,)
+            ).fetchone()[0]
+
+    def recent_results(self, limit: int = 5000) -> List[Dict[str, str]]:
+        """The most recently created responses in the current namespace."""
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT result FROM responses WHERE namespace = ? ORDER BY created_at DESC LIMIT ?',
+                (self.namespace, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def training_samples(self, limit: int = 5000) -> List[Tuple[str, str]]:
+        """(article text, rating) of the most recent responses in the current namespace stored with their article."""
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT article, result FROM responses WHERE namespace = ? AND article IS NOT NULL '
+                'ORDER BY created_at DESC LIMIT ?',
+                (self.namespace, limit)
+            ).fetchall()
+        return [(article, json.loads(result).get('rating')) for article, result in rows]
+
+    def namespaces(self) -> List[Dict]:
+        """Describe every namespace with its entry count, most recently used first."""
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT n.namespace, n.model, n.created_at, n.last_used, COUNT(r.key) '
+                'FROM namespaces n LEFT JOIN responses r ON r.namespace = n.namespace '
+                'GROUP BY n.namespace ORDER BY n.last_used DESC'
+            ).fetchall()
+        return [
+            {'namespace': row[0], 'model': row[1], 'created_at': row[2], 'last_used': row[3], 'entries': row[4]}
+            for row in rows
+        ]
+
+    def get_meta(self, name: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: str):
+        with self._lock, self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)', (name, value))
+
+    def evict(self) -> int:
+        """
+        Remove expired entries, namespaces beyond max_namespaces (least recently
+        used first), and the least recently used entries beyond max_entries in
+        each remaining namespace.
+        """
+        cutoff = time.time() - self.max_age_days * 86400
+        with self._lock, self.conn:
+            removed = self.conn.execute('DELETE FROM responses WHERE created_at < ?', (cutoff,)).rowcount
+
+            stale_namespaces = [row[0] for row in self.conn.execute(
+                'SELECT namespace FROM namespaces ORDER BY last_used DESC LIMIT -1 OFFSET ?',
+                (self.max_namespaces,)
+            )]
+            for namespace in stale_namespaces:
+                removed += self.conn.execute('DELETE FROM responses WHERE namespace = ?', (namespace,)).rowcount
+                self.conn.execute('DELETE FROM namespaces WHERE namespace = ?', (namespace,))
+            if stale_namespaces:
+                logger.info(f"Dropped GPT cache namespaces: {', '.join(stale_namespaces)}")
+
+            for (namespace,) in self.conn.execute('SELECT DISTINCT namespace FROM responses').fetchall():
+                removed += self.conn.execute(
+                    'DELETE FROM responses WHERE namespace = ? AND key IN ('
+                    ' SELECT key FROM responses WHERE namespace = ?'
+                    ' ORDER BY last_accessed DESC LIMIT -1 OFFSET ?)',
+                    (namespace, namespace, self.max_entries)
+                ).rowcount
+        if removed:
+            logger.info(f"Evicted {removed} cached GPT responses")
+        return removed
+
+    def compact(self) -> int:
+        """Evict, then rebuild the database file to reclaim space."""
+        removed = self.evict()
+        with self._lock:
+            self.conn.execute('VACUUM')
+        return removed
+
+    def import_json(self, json_path) -> int:
+        """
+        Import responses from the legacy gpt_cache.json format. They land in the
+        legacy namespace and are adopted by the namespace using the same prompt.
+        """
+        json_path = Path(json_path)
+        if not json_path.exists():
+            return 0
+        try:
+            with open(json_path, 'r') as f:
+                legacy = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read legacy GPT cache {json_path}: {str(e)}")
+            return 0
+
+        now = time.time()
+        rows = [
+            (LEGACY_NAMESPACE, hashlib.sha256(normalize_content(old_key).encode('utf-8')).hexdigest(),
+             json.dumps(result), now, now)
+            for old_key, result in legacy.get('responses', {}).items()
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO responses (namespace, key, result, created_at, last_accessed) '
+                'VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+        if legacy.get('prompt'):
+            self.set_meta('prompt', legacy['prompt'])
+        logger.info(f"Imported {len(rows)} responses from {json_path}")
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
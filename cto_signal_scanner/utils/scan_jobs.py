@@ -0,0 +1,374 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from cto_signal_scanner.utils.sqlite_tx import write_transaction
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS scan_jobs (
+    id TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    params_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    heartbeat_at REAL,
+    worker TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    pdf_path TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_scan_jobs_status ON scan_jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS idx_scan_jobs_params ON scan_jobs (params_key, status);
+CREATE TABLE IF NOT EXISTS scan_job_results (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+);
+'''
+
+JOB_COLUMNS = ('id', 'params', 'status', 'created_at', 'started_at', 'finished_at', 'worker',
+               'cancel_requested', 'pdf_path', 'error')
+
+
+def params_key(params: Dict) -> str:
+    """Identify a scan request, so identical pending requests share one job."""
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class JobStore:
+    """
+    SQLite queue of scan jobs and the results they have produced so far.
+    Several processes can share the file: a queued job is claimed by exactly
+    one worker, and a running job whose worker stops sending heartbeats is
+    queued again.
+    """
+
+    def __init__(self, db_path, stale_after: Optional[float] = None, history_days: Optional[float] = None):
+        """
+        Open (or create) the queue.
+
+        Args:
+            db_path: SQLite database file
+            stale_after: Seconds without a heartbeat after which a running job is requeued (SCAN_JOB_STALE_AFTER, default 120)
+            history_days: Finished jobs older than this are pruned (SCAN_JOB_HISTORY_DAYS, default 7)
+        """
+        self.db_path = Path(db_path)
+        self.stale_after = stale_after if stale_after is not None else \
+            float(os.getenv('SCAN_JOB_STALE_AFTER', 120))
+        self.history_days = history_days if history_days is not None else \
+            float(os.getenv('SCAN_JOB_HISTORY_DAYS', 7))
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30,
+                                    isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def _write(self):
+        return write_transaction(self.conn, self._lock)
+
+    def submit(self, params: Dict) -> Tuple[str, bool]:
+        """
+        Queue a scan job. Returns (job_id, merged); merged is True when an
+        identical job was already queued or running and its ID is returned.
+        """
+        key = params_key(params)
+        now = time.time()
+        with self._write():
+            row = self.conn.execute(
+                'SELECT id FROM scan_jobs WHERE params_key = ? AND cancel_requested = 0 AND '
+                '(status = ? OR (status = ? AND heartbeat_at >= ?)) ORDER BY created_at LIMIT 1',
+                (key, QUEUED, RUNNING, now - self.stale_after)
+            ).fetchone()
+            if row:
+                return row[0], True
+            job_id = uuid.uuid4().hex
+            self.conn.execute(
+                'INSERT INTO scan_jobs (id, params, params_key, status, created_at) VALUES (?, ?, ?, ?, ?)',
+                (job_id, json.dumps(params), key, QUEUED, now)
+            )
+        return job_id, False
+
+    def claim(self, worker: str) -> Optional[Dict]:
+        """Take the oldest queued job, requeueing jobs of workers that stopped sending heartbeats first."""
+        now = time.time()
+        with self._write():
+            requeued = self.conn.execute(
+                'UPDATE scan_jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat_at < ?',
+                (QUEUED, RUNNING, now - self.stale_after)
+            ).rowcount
+            if requeued:
+                logger.warning(f"Requeued {requeued} scan jobs whose worker stopped responding")
+            row = self.conn.execute(
+                'SELECT id FROM scan_jobs WHERE status = ? ORDER BY created_at LIMIT 1', (QUEUED,)
+            ).fetchone()
+            if row:
+                self.conn.execute(
+                    'UPDATE scan_jobs SET status = ?, worker = ?, started_at = ?, heartbeat_at = ? WHERE id = ?',
+                    (RUNNING, worker, now, now, row[0])
+                )
+                # A requeued job starts over
+                self.conn.execute('DELETE FROM scan_job_results WHERE job_id = ?', (row[0],))
+        return self.get(row[0]) if row else None
+
+    def heartbeat(self, job_id: str, worker: str) -> Tuple[bool, bool]:
+        """
+        Record that the job's worker is alive. Returns (held, cancel_requested);
+        held is False once the job was requeued and possibly claimed by
+        another worker, which then owns it.
+        """
+        with self._write():
+            held = self.conn.execute(
+                'UPDATE scan_jobs SET heartbeat_at = ? WHERE id = ? AND worker = ? AND status = ?',
+                (time.time(), job_id, worker, RUNNING)
+            ).rowcount > 0
+            row = self.conn.execute('SELECT cancel_requested FROM scan_jobs WHERE id = ?', (job_id,)).fetchone()
+        return held, bool(row and row[0])
+
+    def _holds(self, job_id: str, worker: str) -> bool:
+        return self.conn.execute(
+            'SELECT 1 FROM scan_jobs WHERE id = ? AND worker = ? AND status = ?', (job_id, worker, RUNNING)
+        ).fetchone() is not None
+
+    def add_result(self, job_id: str, worker: str, result: Dict) -> bool:
+        """Record a result of a running job; ignored (False) when the worker no longer holds it."""
+        with self._write():
+            if not self._holds(job_id, worker):
+                return False
+            self.conn.execute(
+                'INSERT INTO scan_job_results (job_id, seq, result) VALUES '
+                '(?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM scan_job_results WHERE job_id = ?), ?)',
+                (job_id, job_id, json.dumps(result))
+            )
+        return True
+
+    def results(self, job_id: str, after: int = 0) -> List[Tuple[int, Dict]]:
+        """(seq, result) pairs recorded after seq `after`, in the order they finished."""
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT seq, result FROM scan_job_results WHERE job_id = ? AND seq > ? ORDER BY seq',
+                (job_id, after)
+            ).fetchall()
+        return [(seq, json.loads(result)) for seq, result in rows]
+
+    def replace_results(self, job_id: str, worker: str, results: List[Dict]) -> bool:
+        """Store a finished job's results in report order; ignored (False) when the worker no longer holds it."""
+        with self._write():
+            if not self._holds(job_id, worker):
+                return False
+            self.conn.execute('DELETE FROM scan_job_results WHERE job_id = ?', (job_id,))
+            self.conn.executemany(
+                'INSERT INTO scan_job_results (job_id, seq, result) VALUES (?, ?, ?)',
+                [(job_id, seq, json.dumps(result)) for seq, result in enumerate(results, 1)]
+            )
+        return True
+
+    def finish(self, job_id: str, worker: str, status: str, pdf_path: Optional[str] = None,
+               error: Optional[str] = None) -> bool:
+        """Record a job's outcome; ignored (False) when the worker no longer holds it."""
+        with self._lock:
+            return self.conn.execute(
+                'UPDATE scan_jobs SET status = ?, finished_at = ?, pdf_path = ?, error = ? '
+                'WHERE id = ? AND worker = ? AND status = ?',
+                (status, time.time(), pdf_path, error, job_id, worker, RUNNING)
+            ).rowcount > 0
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """
+        Request cancellation. A queued job is cancelled at once, a running one
+        when its worker next sends a heartbeat. Returns the job's status, or
+        None for an unknown job.
+        """
+        with self._write():
+            self.conn.execute(
+                'UPDATE scan_jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?',
+                (CANCELLED, time.time(), job_id, QUEUED)
+            )
+            self.conn.execute(
+                'UPDATE scan_jobs SET cancel_requested = 1 WHERE id = ? AND status = ?', (job_id, RUNNING)
+            )
+            row = self.conn.execute('SELECT status FROM scan_jobs WHERE id = ?', (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute(
+                f'SELECT {", ".join(JOB_COLUMNS)} FROM scan_jobs WHERE id = ?', (job_id,)
+            ).fetchone()
+            count = self.conn.execute(
+                'SELECT COUNT(*) FROM scan_job_results WHERE job_id = ?', (job_id,)
+            ).fetchone()[0]
+        if row is None:
+            return None
+        job = dict(zip(JOB_COLUMNS, row))
+        job['params'] = json.loads(job['params'])
+        job['cancel_requested'] = bool(job['cancel_requested'])
+        job['result_count'] = count
+        return job
+
+    def prune(self) -> int:
+        cutoff = time.time() - self.history_days * 86400
+        placeholders = ', '.join('?' * len(FINISHED))
+        with self._write():
+            old = f'SELECT id FROM scan_jobs WHERE status IN ({placeholders}) AND finished_at < ?'
+            self.conn.execute(f'DELETE FROM scan_job_results WHERE job_id IN ({old})', (*FINISHED, cutoff))
+            removed = self.conn.execute(f'DELETE FROM scan_jobs WHERE id IN ({old})', (*FINISHED, cutoff)).rowcount
+        return removed
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class JobWorkerPool:
+    """
+    Worker threads that claim scan jobs from a JobStore and run them.
+    run_job(params, on_result, cancel) performs one scan: it passes each
+    article result to on_result(result, final) as it finishes, should stop
+    early once the cancel Event is set, and returns (results, pdf_path).
+    """
+
+    def __init__(self, store: JobStore, run_job: Callable, workers: Optional[int] = None,
+                 poll_interval: float = 2.0, heartbeat_interval: float = 10.0):
+        """
+        Initialize the pool.
+
+        Args:
+            store: Queue to take jobs from
+            run_job: Function that runs one scan
+            workers: Scans run at once (SCAN_WORKERS, default 1)
+            poll_interval: Seconds between checks for jobs queued by other processes
+            heartbeat_interval: Seconds between heartbeats (and cancellation checks) of a running job
+        """
+        self.store = store
+        self.run_job = run_job
+        self.workers = workers if workers is not None else int(os.getenv('SCAN_WORKERS', 1))
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_id = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wake = threading.Condition()
+        self._stopped = threading.Event()
+        self._threads = []
+        # Cancel events of the jobs running in this process
+        self._running: Dict[str, threading.Event] = {}
+        self._running_lock = threading.Lock()
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self.run_forever, name=f"scan-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        """Wake an idle worker after a job was queued in this process."""
+        with self._wake:
+            self._wake.notify()
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a job; one running in this process is signalled at once rather than on its next heartbeat."""
+        status = self.store.cancel(job_id)
+        with self._running_lock:
+            event = self._running.get(job_id)
+        if event is not None:
+            event.set()
+        return status
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stopped.set()
+        with self._wake:
+            self._wake.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_forever(self):
+        """Claim and run jobs until stopped; also the loop of a standalone worker process."""
+        while not self._stopped.is_set():
+            try:
+                job = self.store.claim(self.worker_id)
+            except Exception as e:
+                logger.error(f"Error claiming scan job: {str(e)}", exc_info=True)
+                job = None
+            if job is None:
+                with self._wake:
+                    self._wake.wait(self.poll_interval)
+                continue
+            self.run(job)
+            self._prune()
+
+    def _prune(self):
+        # Finished jobs older than the store's history_days, with their results
+        try:
+            removed = self.store.prune()
+        except Exception as e:
+            logger.error(f"Error pruning scan jobs: {str(e)}", exc_info=True)
+            return
+        if removed:
+            logger.info(f"Pruned {removed} finished scan jobs")
+
+    def _beat(self, job_id: str, cancel: threading.Event, lost: threading.Event, done: threading.Event):
+        while not done.wait(self.heartbeat_interval):
+            try:
+                held, cancel_requested = self.store.heartbeat(job_id, self.worker_id)
+            except Exception as e:
+                logger.warning(f"Could not send heartbeat for scan job {job_id}: {str(e)}")
+                continue
+            if not held:
+                logger.warning(f"Lost scan job {job_id} to another worker, stopping it")
+                lost.set()
+                cancel.set()
+                return
+            if cancel_requested:
+                cancel.set()
+
+    def run(self, job: Dict):
+        """Run one claimed job and record its outcome."""
+        job_id = job['id']
+        # lost is set when the job was requeued and may be running elsewhere;
+        # its outcome then belongs to the new owner
+        cancel, lost, done = threading.Event(), threading.Event(), threading.Event()
+        with self._running_lock:
+            self._running[job_id] = cancel
+        beat = threading.Thread(target=self._beat, args=(job_id, cancel, lost, done), daemon=True)
+        beat.start()
+
+        def on_result(result, final):
+            if final and not lost.is_set() and not self.store.add_result(job_id, self.worker_id, result):
+                lost.set()
+                cancel.set()
+
+        logger.info(f"Running scan job {job_id}: {job['params']}")
+        try:
+            results, pdf_path = self.run_job(job['params'], on_result, cancel)
+            status = CANCELLED if cancel.is_set() else SUCCEEDED
+            kept = not lost.is_set() and self.store.replace_results(job_id, self.worker_id, results) \
+                and self.store.finish(job_id, self.worker_id, status, pdf_path=pdf_path)
+            if kept:
+                logger.info(f"Scan job {job_id} {status} with {len(results)} articles")
+            else:
+                logger.warning(f"Scan job {job_id} was taken over by another worker, its outcome was dropped")
+        except Exception as e:
+            logger.error(f"Scan job {job_id} failed: {str(e)}", exc_info=True)
+            self.store.finish(job_id, self.worker_id, FAILED, error=str(e))
+        finally:
+            with self._running_lock:
+                del self._running[job_id]
+            done.set()
+            beat.join()
@@ -0,0 +1,88 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from cto_signal_scanner.utils.dedup import canonicalize_url
+from cto_signal_scanner.utils.feed_cache import MAX_DAYS_BACK
+from cto_signal_scanner.utils.feed_parser import FeedEntry
+
+
+def entry_id(entry: FeedEntry) -> str:
+    """Stable ID of a feed entry: its GUID, else its canonical link."""
+    return entry.guid or canonicalize_url(entry.link) or entry.title
+
+
+class SeenIndex:
+    """
+    Entries a scan has already handled, by entry ID, with when they were
+    first seen and the result they got. An incremental scan evaluates only
+    entries missing from the index and reports the stored results for the
+    rest. Results are only reused for the cache namespace (prompt, model and
+    system message) that produced them.
+    """
+
+    def __init__(self, data: Optional[Dict] = None, namespace: str = ''):
+        """
+        Initialize the index.
+
+        Args:
+            data: Stored index, as returned by to_dict()
+            namespace: Cache namespace of the current agent
+        """
+        self.entries = dict(data or {})
+        self.namespace = namespace
+        self.added = 0
+        self._lock = threading.Lock()
+
+    def is_seen(self, entry: FeedEntry) -> bool:
+        with self._lock:
+            stored = self.entries.get(entry_id(entry))
+        return stored is not None and stored.get('namespace') == self.namespace
+
+    def add(self, entry: FeedEntry, feed_url: str, result: Dict[str, str]):
+        """Record an entry with its result dict (as built by build_result)."""
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            previous = self.entries.get(entry_id(entry), {})
+            self.entries[entry_id(entry)] = {
+                'feed': feed_url,
+                'namespace': self.namespace,
+                'first_seen': previous.get('first_seen', now),
+                'published': entry.published.isoformat() if entry.published else now,
+                'result': result
+            }
+            self.added += 1
+
+    def results(self, feed_url: str, cutoff_date: datetime) -> List[Dict[str, str]]:
+        """Stored results of a feed published since cutoff_date, newest first."""
+        with self._lock:
+            stored = [
+                item for item in self.entries.values()
+                if item['feed'] == feed_url and item.get('namespace') == self.namespace
+                and datetime.fromisoformat(item['published']) >= cutoff_date
+            ]
+        stored.sort(key=lambda item: item['published'], reverse=True)
+        return [item['result'] for item in stored]
+
+    def merge(self, data: Dict) -> int:
+        """Add the entries of another copy of the index that this one lacks. Returns how many were added."""
+        with self._lock:
+            missing = {key: item for key, item in (data or {}).items() if key not in self.entries}
+            self.entries.update(missing)
+        return len(missing)
+
+    def prune(self, max_days: int = MAX_DAYS_BACK) -> int:
+        """Drop entries published before the longest scan window. Returns how many were removed."""
+        oldest = (datetime.utcnow() - timedelta(days=max_days)).isoformat()
+        with self._lock:
+            stale = [key for key, item in self.entries.items() if item['published'] < oldest]
+            for key in stale:
+                del self.entries[key]
+        return len(stale)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return dict(self.entries)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self.entries)
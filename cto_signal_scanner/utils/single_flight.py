@@ -0,0 +1,99 @@
+import logging
+import threading
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _copy(source: Future, target: Future):
+    """Settle target like the finished source, unless its owner already cancelled it."""
+    try:
+        if source.cancelled():
+            target.cancel()
+        elif source.exception() is not None:
+            target.set_exception(source.exception())
+        else:
+            target.set_result(source.result())
+    except InvalidStateError:
+        pass
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent work by key: the first caller starts it and callers
+    arriving while it is still running share its outcome. Every caller gets
+    a Future of its own, so cancelling one does not touch the shared work;
+    when the starting caller cancels the work itself (say its scan is
+    cancelled), the callers that joined it start it again. Keys are
+    forgotten as soon as their work completes.
+    """
+
+    def __init__(self, max_waiters: int = 4):
+        """
+        Initialize the group.
+
+        Args:
+            max_waiters: Threads for run_waiter, used to wait on work owned by other processes
+        """
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._waiters = ThreadPoolExecutor(max_workers=max_waiters, thread_name_prefix='single-flight')
+
+    def do(self, key: Hashable, start: Callable[[], Future]) -> Tuple[Future, bool]:
+        """
+        Return a Future for the outcome of the work in flight for key, calling
+        start() to begin it when there is none. The second value is True when
+        work already in flight was joined.
+        """
+        with self._lock:
+            flight = self._in_flight.get(key)
+            shared = flight is not None
+            if not shared:
+                flight = Future()
+                self._in_flight[key] = flight
+        if not shared:
+            flight.add_done_callback(lambda done: self._forget(key, done))
+            # start() may do I/O (cache lookups, claims), so it runs outside the lock
+            try:
+                started = start()
+            except Exception as e:
+                flight.set_exception(e)
+            else:
+                started.add_done_callback(lambda done: _copy(done, flight))
+        own = Future()
+        flight.add_done_callback(lambda done: self._settle(key, start, done, own, restart=shared))
+        return own, shared
+
+    def _settle(self, key: Hashable, start: Callable[[], Future], flight: Future, own: Future, restart: bool):
+        if flight.cancelled() and restart and not own.done():
+            again, _ = self.do(key, start)
+            again.add_done_callback(lambda done: _copy(done, own))
+        else:
+            _copy(flight, own)
+
+    def _forget(self, key: Hashable, future: Future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def run_waiter(self, fn: Callable, *args) -> Future:
+        """Run a blocking wait off the caller's thread (and off the evaluation workers)."""
+        return self._waiters.submit(fn, *args)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._in_flight)
+
+
+_default_group = None
+_default_group_lock = threading.Lock()
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide group, so overlapping scans share evaluations."""
+    global _default_group
+    with _default_group_lock:
+        if _default_group is None:
+            _default_group = SingleFlight()
+        return _default_group
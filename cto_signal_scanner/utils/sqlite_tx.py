@@ -0,0 +1,21 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+@contextmanager
+def write_transaction(conn: sqlite3.Connection, lock: threading.Lock):
+    """
+    Run the block in one write transaction on an autocommit connection
+    (isolation_level=None), committing when it completes and rolling back
+    when it raises. BEGIN IMMEDIATE takes the write lock up front, so
+    check-then-write sequences are atomic across processes sharing the file.
+    """
+    with lock:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
@@ -0,0 +1,117 @@
+import os
+import re
+import logging
+import threading
+from typing import List, Optional
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# Rough characters per token for English text, as used for rate limiting
+CHARS_PER_TOKEN = 4
+
+# Elements that never carry article text
+DROP_TAGS = ['script', 'style', 'img', 'picture', 'svg', 'iframe', 'video', 'audio', 'figure', 'noscript', 'form']
+
+# Feed boilerplate appended by blogging platforms
+BOILERPLATE_PATTERNS = [
+    re.compile(r'The post .{1,300}? appeared first on .{1,200}?\.', re.IGNORECASE),
+    re.compile(r'\b(?:Continue reading|Read more|Read the full (?:story|post|article))\b.{0,80}$', re.IGNORECASE),
+]
+
+_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9"\'(])')
+_WORD_RE = re.compile(r'[A-Za-z0-9][\w.+#-]*')
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or '') + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def html_to_text(html: str) -> str:
+    """Plain text of an HTML fragment, without media, scripts or feed boilerplate."""
+    if not html:
+        return ''
+    if '<' in html or '&' in html:
+        soup = BeautifulSoup(html, 'html.parser')
+        for element in soup(DROP_TAGS):
+            element.decompose()
+        text = soup.get_text(' ')
+    else:
+        text = html
+    for pattern in BOILERPLATE_PATTERNS:
+        text = pattern.sub(' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _sentence_score(sentence: str, title_words: set) -> float:
+    """How much a sentence is likely to tell the model: numbers, names and title overlap."""
+    words = _WORD_RE.findall(sentence)
+    if not words:
+        return 0.0
+    numbers = sum(1 for word in words if any(char.isdigit() for char in word))
+    names = sum(1 for word in words[1:] if word[0].isupper())
+    overlap = sum(1 for word in words if word.lower() in title_words)
+    return (2 * numbers + names + 2 * overlap) / len(words) ** 0.5
+
+
+def _cut_words(text: str, max_tokens: int) -> str:
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(' ', 1)[0] + '…'
+
+
+def truncate_to_budget(text: str, max_tokens: int, title: str = '') -> str:
+    """
+    Cut text to about max_tokens. The lead sentence is always kept; the
+    remaining budget goes to the most informative sentences, which stay in
+    their original order.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    sentences = _SENTENCE_RE.split(text)
+    lead = _cut_words(sentences[0], max_tokens)
+    budget = max_tokens - estimate_tokens(lead)
+    title_words = {word.lower() for word in _WORD_RE.findall(title) if len(word) > 3}
+
+    ranked = sorted(range(1, len(sentences)),
+                    key=lambda index: _sentence_score(sentences[index], title_words), reverse=True)
+    chosen: List[int] = []
+    for index in ranked:
+        cost = estimate_tokens(sentences[index]) + 1
+        if cost <= budget:
+            chosen.append(index)
+            budget -= cost
+    return ' '.join([lead] + [sentences[index] for index in sorted(chosen)])
+
+
+class TextPreparer:
+    """
+    Turns feed summaries into clean text within a token budget before they
+    are hashed for the cache, checked for duplicates and sent to the model.
+    Keeps running totals so each scan can report the tokens it saved.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None):
+        """
+        Initialize the preparer.
+
+        Args:
+            max_tokens: Token budget per article summary (ARTICLE_TOKEN_BUDGET, default 400)
+        """
+        self.max_tokens = max_tokens or int(os.getenv('ARTICLE_TOKEN_BUDGET', 400))
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, summary: str, title: str = '') -> str:
+        text = truncate_to_budget(html_to_text(summary), self.max_tokens, title)
+        with self._lock:
+            self.tokens_in += estimate_tokens(summary)
+            self.tokens_out += estimate_tokens(text)
+        return text
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_in - self.tokens_out
@@ -0,0 +1,317 @@
+import os
+import abc
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from cto_signal_scanner.utils.sqlite_tx import write_transaction
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Task(NamedTuple):
+    """A claimed unit of work of one run."""
+    id: int
+    run_id: str
+    kind: str
+    key: str
+    payload: Any
+    attempts: int
+
+
+class WorkQueue(abc.ABC):
+    """
+    Interface of the task queues scanner nodes share. Tasks belong to a run
+    and are unique by (run_id, kind, key). A claimed task is leased to one
+    worker until the lease expires; the worker extends it with heartbeats,
+    and a task whose lease lapses is handed to the next worker that claims,
+    up to max_attempts claims in all. Backends implement every abstract method.
+    """
+
+    # Seconds a claim or heartbeat holds a task
+    lease_seconds = 60.0
+
+    @abc.abstractmethod
+    def put(self, run_id: str, kind: str, key: str, payload: Any) -> bool:
+        """Add a task; returns False when the run already has a task of this kind and key."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def claim(self, worker: str, limit: int = 1, kinds: Optional[Iterable[str]] = None,
+              run_id: Optional[str] = None) -> List[Task]:
+        """Lease up to limit pending or lapsed tasks, oldest first, optionally only of some kinds or one run."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def heartbeat(self, worker: str, task_ids: Iterable[int]) -> List[int]:
+        """Extend the leases of the worker's tasks; returns the IDs it still holds."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def complete(self, worker: str, task_id: int, result: Any) -> bool:
+        """Record a task's result; ignored (False) when the worker has lost the lease."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def fail(self, worker: str, task_id: int, error: str):
+        """Give a task back after an error; it fails for good after max_attempts claims."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def unfinished(self, run_id: str) -> int:
+        """Tasks of the run that are neither done nor failed."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def results(self, run_id: str, kind: str) -> Dict[str, Any]:
+        """Results of the run's finished tasks of a kind, by key."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def failures(self, run_id: str) -> Dict[str, str]:
+        """Errors of the run's failed tasks, by kind and key."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def purge(self, run_id: str):
+        """Drop all tasks of a run."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS work_tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    UNIQUE (run_id, kind, key)
+);
+CREATE INDEX IF NOT EXISTS idx_work_tasks_status ON work_tasks (status, lease_expires);
+'''
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    WorkQueue in a SQLite file, for workers on one host or on hosts sharing
+    a filesystem with working locks. Claims run in BEGIN IMMEDIATE
+    transactions, so each task is leased to exactly one worker at a time.
+    """
+
+    def __init__(self, db_path, lease_seconds: Optional[float] = None, max_attempts: Optional[int] = None):
+        """
+        Open (or create) the queue.
+
+        Args:
+            db_path: SQLite database file
+            lease_seconds: Lease of a claimed task, extended by each heartbeat (WORK_QUEUE_LEASE, default 60)
+            max_attempts: Claims of a task before it fails for good (WORK_QUEUE_MAX_ATTEMPTS, default 3)
+        """
+        self.db_path = Path(db_path)
+        self.lease_seconds = lease_seconds or float(os.getenv('WORK_QUEUE_LEASE', 60))
+        self.max_attempts = max_attempts or int(os.getenv('WORK_QUEUE_MAX_ATTEMPTS', 3))
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30,
+                                    isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+
+    def _write(self):
+        return write_transaction(self.conn, self._lock)
+
+    def put(self, run_id: str, kind: str, key: str, payload: Any) -> bool:
+        with self._write():
+            return self.conn.execute(
+                'INSERT OR IGNORE INTO work_tasks (run_id, kind, key, payload, status, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (run_id, kind, key, json.dumps(payload), PENDING, time.time())
+            ).rowcount > 0
+
+    def claim(self, worker: str, limit: int = 1, kinds: Optional[Iterable[str]] = None,
+              run_id: Optional[str] = None) -> List[Task]:
+        with self._write():
+            now = time.time()
+            # Tasks that have used up their claims are not handed out again
+            exhausted = self.conn.execute(
+                'UPDATE work_tasks SET status = ?, worker = NULL, error = COALESCE(error, ?) '
+                'WHERE status = ? AND lease_expires < ? AND attempts >= ?',
+                (FAILED, 'lease expired', LEASED, now, self.max_attempts)
+            ).rowcount
+            if exhausted:
+                logger.warning(f"{exhausted} tasks failed after {self.max_attempts} expired leases")
+            where = ['(status = ? OR (status = ? AND lease_expires < ?))']
+            params = [PENDING, LEASED, now]
+            if kinds:
+                kinds_list = list(kinds)
+                where.append(f"kind IN ({', '.join('?' * len(kinds_list))})")
+                params.extend(kinds_list)
+            if run_id:
+                where.append('run_id = ?')
+                params.append(run_id)
+            rows = self.conn.execute(
+                f"SELECT id, run_id, kind, key, payload, attempts, status FROM work_tasks "
+                f"WHERE {' AND '.join(where)} ORDER BY id LIMIT ?",
+                params + [limit]
+            ).fetchall()
+            lapsed = sum(1 for row in rows if row[6] == LEASED)
+            if lapsed:
+                logger.warning(f"Reclaimed {lapsed} tasks whose worker stopped sending heartbeats")
+            self.conn.executemany(
+                'UPDATE work_tasks SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 '
+                'WHERE id = ?',
+                [(LEASED, worker, now + self.lease_seconds, row[0]) for row in rows]
+            )
+            return [Task(row[0], row[1], row[2], row[3], json.loads(row[4]), row[5] + 1) for row in rows]
+
+    def heartbeat(self, worker: str, task_ids: Iterable[int]) -> List[int]:
+        task_ids = list(task_ids)
+        if not task_ids:
+            return []
+        with self._write():
+            placeholders = ', '.join('?' * len(task_ids))
+            self.conn.execute(
+                f"UPDATE work_tasks SET lease_expires = ? WHERE worker = ? AND status = ? "
+                f"AND id IN ({placeholders})",
+                [time.time() + self.lease_seconds, worker, LEASED] + task_ids
+            )
+            return [row[0] for row in self.conn.execute(
+                f"SELECT id FROM work_tasks WHERE worker = ? AND status = ? AND id IN ({placeholders})",
+                [worker, LEASED] + task_ids
+            )]
+
+    def complete(self, worker: str, task_id: int, result: Any) -> bool:
+        with self._write():
+            return self.conn.execute(
+                'UPDATE work_tasks SET status = ?, result = ?, lease_expires = NULL '
+                'WHERE id = ? AND worker = ? AND status = ?',
+                (DONE, json.dumps(result), task_id, worker, LEASED)
+            ).rowcount > 0
+
+    def fail(self, worker: str, task_id: int, error: str):
+        with self._write():
+            self.conn.execute(
+                'UPDATE work_tasks SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, '
+                'worker = NULL, lease_expires = NULL, error = ? WHERE id = ? AND worker = ? AND status = ?',
+                (self.max_attempts, FAILED, PENDING, error, task_id, worker, LEASED)
+            )
+
+    def unfinished(self, run_id: str) -> int:
+        with self._lock:
+            return self.conn.execute(
+                'SELECT COUNT(*) FROM work_tasks WHERE run_id = ? AND status IN (?, ?)', (run_id, PENDING, LEASED)
+            ).fetchone()[0]
+
+    def results(self, run_id: str, kind: str) -> Dict[str, Any]:
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT key, result FROM work_tasks WHERE run_id = ? AND kind = ? AND status = ?',
+                (run_id, kind, DONE)
+            ).fetchall()
+        return {key: json.loads(result) for key, result in rows}
+
+    def failures(self, run_id: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT kind, key, error FROM work_tasks WHERE run_id = ? AND status = ?', (run_id, FAILED)
+            ).fetchall()
+        return {f"{kind}:{key}": error for kind, key, error in rows}
+
+    def purge(self, run_id: str):
+        with self._write():
+            self.conn.execute('DELETE FROM work_tasks WHERE run_id = ?', (run_id,))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+# Backends by URL scheme; register others (e.g. a Redis or Postgres queue) with register_backend
+BACKENDS: Dict[str, Callable[[str], WorkQueue]] = {
+    'sqlite': lambda location: SQLiteWorkQueue(location),
+}
+
+
+def register_backend(scheme: str, factory: Callable[[str], WorkQueue]):
+    """Make open_work_queue build scheme://location URLs with factory(location)."""
+    BACKENDS[scheme] = factory
+
+
+def open_work_queue(url: str) -> WorkQueue:
+    """
+    Open the queue at a URL such as sqlite:///var/lib/scanner/work_queue.sqlite3
+    (an absolute path) or sqlite://work_queue.sqlite3 (relative).
+    """
+    scheme, separator, location = url.partition('://')
+    if not separator or scheme not in BACKENDS:
+        raise ValueError(f"Unsupported work queue URL: {url}")
+    return BACKENDS[scheme](location)
+
+
+class LeaseKeeper:
+    """
+    Sends heartbeats for the tasks a worker holds from a background thread,
+    every third of the lease, so long-running tasks keep their leases.
+    Tasks whose lease was lost anyway are recorded in lost.
+    """
+
+    def __init__(self, queue: WorkQueue, worker: str, interval: float):
+        self.queue = queue
+        self.worker = worker
+        self.interval = interval
+        self.lost = set()
+        self._held = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='work-queue-heartbeat', daemon=True)
+        self._thread.start()
+
+    def hold(self, task_id: int):
+        with self._lock:
+            self._held.add(task_id)
+
+    def release(self, task_id: int):
+        with self._lock:
+            self._held.discard(task_id)
+            self.lost.discard(task_id)
+
+    @property
+    def held(self) -> int:
+        with self._lock:
+            return len(self._held)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            with self._lock:
+                held = set(self._held)
+            try:
+                kept = set(self.queue.heartbeat(self.worker, held))
+            except Exception as e:
+                logger.error(f"Error sending task heartbeats: {str(e)}", exc_info=True)
+                continue
+            if held - kept:
+                logger.warning(f"Lost the lease of {len(held - kept)} tasks")
+                with self._lock:
+                    self.lost |= (held - kept) & self._held
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
@@ -3,6 +3,7 @@ import os
 import json
 import logging
 import feedparser
+import threading
 from pathlib import Path
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
@@ -13,9 +14,15 @@ from flask_limiter.util import get_remote_address
 from flask_session import Session
 from cto_signal_scanner.utils.feed_manager import FeedManager
 from cto_signal_scanner.utils.gpt_agent import GPTAgent
-from cto_signal_scanner.utils.pdf_generator import ReportGenerator
-from cto_signal_scanner.main import fetch_and_process_feeds
-import time
+from cto_signal_scanner.main import (
+    ARTICLE_STORE_FILE, FEEDS, PRECOMPUTED_REPORTS_DIR, SCAN_JOBS_FILE, create_scan_agent, run_scan_job,
+    scan_namespace
+)
+from cto_signal_scanner.utils.model_router import tiered_routing_enabled
+from cto_signal_scanner.utils.article_store import ArticleStore
+from cto_signal_scanner.utils.scan_jobs import FINISHED, JobStore, JobWorkerPool
+from cto_signal_scanner.utils.progress import ProgressBus
+from cto_signal_scanner.utils.evaluation_pool import get_concurrency_limiter, get_rate_limiter
 
 # Load environment variables
 load_dotenv()
@@ -47,6 +54,7 @@ app.config['SESSION_FILE_DIR'] = str(BASE_DIR / 'flask_session')
 app.config['SESSION_PERMANENT'] = True
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=7)
 app.config['REPORTS_FOLDER'] = BASE_DIR / 'reports'
+app.config['PRECOMPUTED_REPORTS_FOLDER'] = PRECOMPUTED_REPORTS_DIR
 app.config['SETTINGS_FILE'] = BASE_DIR / 'settings.json'
 app.config['PORT'] = PORT  # Set the port in Flask config
 
@@ -82,13 +90,43 @@ os.makedirs(app.config['REPORTS_FOLDER'], mode=0o700, exist_ok=True)
 # Initialize managers
 feed_manager = FeedManager(str(BASE_DIR / 'feeds.json'))
 gpt_agent = GPTAgent()
+threading.Thread(target=gpt_agent.warm_up, name='llm-warm-up', daemon=True).start()
+
+# Reports precomputed by the scheduler are served while younger than this
+REPORT_MAX_AGE = float(os.getenv('REPORT_MAX_AGE', 2 * float(os.getenv('SCHEDULE_INTERVAL', 60))))
+
+def current_report_namespace():
+    """Namespace of the results the current settings produce; precomputed reports of others are not served."""
+    return scan_namespace(create_scan_agent() if tiered_routing_enabled() else gpt_agent)
+
+report_namespace = current_report_namespace()
+
+# Scan progress and streamed article results, published to /scan_progress viewers
+progress_bus = ProgressBus()
+PROGRESS_HEARTBEAT = float(os.getenv('PROGRESS_HEARTBEAT', 15))
+PROGRESS_IDLE_TIMEOUT = float(os.getenv('PROGRESS_IDLE_TIMEOUT', 300))
+
+def run_web_scan(params, on_result, cancel):
+    """Run a scan job, streaming its progress and each article to /scan_progress as it is evaluated."""
+    scan_id = progress_bus.start()
+
+    def publish(result, final):
+        progress_bus.publish(scan_id, 'article', data={'final': final, 'article': result})
+        on_result(result, final)
+
+    failed = True
+    try:
+        results, pdf_path = run_scan_job(params, publish, cancel, on_progress=progress_bus.publisher(scan_id))
+        app_logger.info(f"Scan completed. Found {len(results)} articles")
+        failed = False
+        return results, pdf_path
+    finally:
+        progress_bus.finish(scan_id, failed=failed, cancelled=cancel.is_set())
 
-# Global variables for progress tracking
-scan_progress = {
-    'total_articles': 0,
-    'assessed_articles': 0,
-    'is_scanning': False
-}
+# Scans run as background jobs; SCAN_WORKERS=0 leaves them to `main.py --worker` processes
+job_store = JobStore(SCAN_JOBS_FILE)
+job_workers = JobWorkerPool(job_store, run_web_scan)
+job_workers.start()
 
 def load_settings():
     """Load settings from JSON file or return defaults"""
@@ -135,8 +173,10 @@ def save_settings(settings):
         os.environ['USE_OLLAMA'] = 'false'
     
     # Reinitialize GPT agent with new settings
-    global gpt_agent
+    global gpt_agent, report_namespace
     gpt_agent = GPTAgent()
+    report_namespace = current_report_namespace()
+    threading.Thread(target=gpt_agent.warm_up, name='llm-warm-up', daemon=True).start()
 
 @app.route('/')
 def index():
@@ -220,15 +260,38 @@ def remove_feed():
 
 @app.route('/scan_progress')
 def scan_progress_stream():
+    """
+    Server-sent events for the running scan, or the next one to start:
+    'article' events with streamed results, unnamed progress messages with
+    the counters, and a 'done' event before the stream closes. Quiet periods
+    get a comment line every PROGRESS_HEARTBEAT seconds.
+    """
     def generate():
-        while True:
-            if scan_progress['is_scanning']:
-                yield f"data: {json.dumps(scan_progress)}\n\n"
-            else:
-                yield "data: {\"is_scanning\": false}\n\n"
-            time.sleep(1)
-    
-    return Response(generate(), mimetype='text/event-stream')
+        for events, progress in progress_bus.listen(PROGRESS_HEARTBEAT, PROGRESS_IDLE_TIMEOUT):
+            if not events:
+                yield ": heartbeat\n\n"
+                continue
+            for event, data in events:
+                if event == 'article':
+                    yield f"event: article\ndata: {json.dumps(data)}\n\n"
+                elif event == 'finished':
+                    yield f"event: done\ndata: {json.dumps(dict(data, is_scanning=False))}\n\n"
+            if progress is not None:
+                yield f"data: {json.dumps(dict(progress, is_scanning=True))}\n\n"
+
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/llm_stats')
+def llm_stats():
+    """Current LLM concurrency limit, observed latency and errors, and recent limit changes."""
+    rate_limiter = get_rate_limiter()
+    return jsonify({
+        'concurrency': get_concurrency_limiter().stats(),
+        'rate_limits': {
+            'requests_per_minute': rate_limiter.requests_per_minute,
+            'tokens_per_minute': rate_limiter.tokens_per_minute
+        }
+    })
 
 @app.route('/scan', methods=['POST'])
 def scan():
@@ -256,52 +319,121 @@ def scan():
                 'error': 'days_back must be an integer between 1 and 30'
             }), 400
 
-        app_logger.info(f"Starting scan for {days_back} days back")
-        
-        # Reset progress
-        scan_progress['total_articles'] = 0
-        scan_progress['assessed_articles'] = 0
-        scan_progress['is_scanning'] = True
-        
-        # Fetch results
-        results, pdf_path = fetch_and_process_feeds(days_back)
-        app_logger.info(f"Scan completed. Found {len(results)} articles")
-        
-        # Create PDF report
-        pdf_generator = ReportGenerator()
-        pdf_generator.add_header(f"CTO Signal Scanner Report - Last {days_back} Days")
-        
-        # Add articles to PDF
-        for article in results:
-            pdf_generator.add_article(
-                title=article['title'],
-                link=article['link'],
-                summary=article['summary'],
-                rating=article['rating'],
-                rationale=article['rationale']
-            )
-        
-        # Update final progress
-        scan_progress['total_articles'] = len(results)
-        scan_progress['assessed_articles'] = len(results)
-        scan_progress['is_scanning'] = False
-        
+        incremental = data.get('incremental')
+        if incremental is not None and not isinstance(incremental, bool):
+            app_logger.warning(f"Invalid incremental value received: {incremental}")
+            return jsonify({
+                'success': False,
+                'error': 'incremental must be a boolean'
+            }), 400
+
+        force = data.get('force', False)
+        if not isinstance(force, bool):
+            app_logger.warning(f"Invalid force value received: {force}")
+            return jsonify({
+                'success': False,
+                'error': 'force must be a boolean'
+            }), 400
+
+        # Identical requests waiting or running share one job. A window covered
+        # by a recent scan is answered from the article store unless forced
+        params = {'days_back': days_back, 'incremental': incremental, 'force': force}
+        job_id, merged = job_store.submit(params)
+        job_workers.notify()
+        app_logger.info(f"{'Joined' if merged else 'Queued'} scan job {job_id} for {days_back} days back")
+
         return jsonify({
             'success': True,
-            'results': results,
-            'pdf_path': pdf_path,
-            'article_count': len(results),
-            'assessed_count': len(results)
-        })
+            'job_id': job_id,
+            'merged': merged,
+            'status': job_store.get(job_id)['status']
+        }), 202
 
     except Exception as e:
-        app_logger.error(f"Error during scan: {str(e)}", exc_info=True)
-        scan_progress['is_scanning'] = False
+        app_logger.error(f"Error queueing scan: {str(e)}", exc_info=True)
         return jsonify({
             'success': False,
-            'error': f'An error occurred during the scan: {str(e)}'
+            'error': f'An error occurred while queueing the scan: {str(e)}'
         }), 500
 
+@app.route('/jobs/<job_id>')
+@limiter.limit("120 per minute")
+def job_status(job_id):
+    """Status of a scan job and how many results it has produced so far."""
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
+
+@app.route('/jobs/<job_id>/results')
+@limiter.limit("120 per minute")
+def job_results(job_id):
+    """
+    Results of a scan job recorded after the `after` cursor: articles in the
+    order they were evaluated while the job runs, the report in feed order
+    once it has finished.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    rows = job_store.results(job_id, after=request.args.get('after', 0, type=int))
+    return jsonify({
+        'success': True,
+        'status': job['status'],
+        'finished': job['status'] in FINISHED,
+        'results': [result for _, result in rows],
+        'next': rows[-1][0] if rows else request.args.get('after', 0, type=int),
+        'pdf_path': job['pdf_path']
+    })
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    status = job_workers.cancel(job_id)
+    if status is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    app_logger.info(f"Cancellation requested for scan job {job_id} ({status})")
+    return jsonify({'success': True, 'status': status})
+
+@app.route('/search')
+@limiter.limit("60 per minute")
+def search():
+    """Full-text search over stored articles: q, optional days_back, min_rating and limit."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': 'Missing required parameter: q'}), 400
+    try:
+        days_back = request.args.get('days_back', type=int)
+        min_rating = request.args.get('min_rating', type=float)
+        limit = min(request.args.get('limit', 50, type=int), 200)
+        since = datetime.utcnow() - timedelta(days=days_back) if days_back else None
+        store = ArticleStore(ARTICLE_STORE_FILE)
+        try:
+            results = store.search(query, since=since, min_rating=min_rating, limit=limit)
+        finally:
+            store.close()
+        return jsonify({'success': True, 'results': results, 'count': len(results)})
+    except Exception as e:
+        app_logger.error(f"Error searching articles: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'error': 'An error occurred while searching'}), 500
+
+@app.route('/reports/<int:days_back>')
+@limiter.limit("120 per minute")
+def precomputed_report(days_back):
+    """Results of a window precomputed by the scheduler, when recent enough; 404 means a scan is needed."""
+    try:
+        store = ArticleStore(ARTICLE_STORE_FILE)
+        try:
+            report = store.latest_report(report_namespace, FEEDS, days_back, REPORT_MAX_AGE)
+        finally:
+            store.close()
+        if report is None:
+            return jsonify({'success': False, 'error': 'No recent precomputed report for this window'}), 404
+        download_url = f"/download/{Path(report['pdf_path']).name}" if report['pdf_path'] else None
+        return jsonify({'success': True, **report, 'download_url': download_url})
+    except Exception as e:
+        app_logger.error(f"Error loading precomputed report: {str(e)}", exc_info=True)
+        return jsonify({'success': False, 'error': 'An error occurred while loading the report'}), 500
+
 @app.route('/download/<path:filename>')
 @limiter.limit("30 per minute")  # Limit download requests
 def download_file(filename):
@@ -310,13 +442,18 @@ def download_file(filename):
         if not all(c.isalnum() or c in '._-' for c in filename):
             return jsonify({'error': 'Invalid filename format'}), 400
             
-        # Ensure the file is within the reports directory
-        file_path = app.config['REPORTS_FOLDER'] / filename
-        if not str(file_path.resolve()).startswith(str(app.config['REPORTS_FOLDER'].resolve())):
-            return jsonify({'error': 'Invalid file path'}), 400
+        # Ensure the file is within the reports directory, or the scheduler's precomputed reports
+        file_path = None
+        for folder in (app.config['REPORTS_FOLDER'], app.config['PRECOMPUTED_REPORTS_FOLDER']):
+            candidate = folder / filename
+            if not str(candidate.resolve()).startswith(str(folder.resolve())):
+                return jsonify({'error': 'Invalid file path'}), 400
+            if candidate.exists():
+                file_path = candidate
+                break
         
         # Check if file exists
-        if not file_path.exists():
+        if file_path is None:
             return jsonify({'error': 'Report file not found. It may have been deleted or not generated yet.'}), 404
             
         # Check file size to prevent large file downloads
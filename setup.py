@@ -21,4 +21,9 @@ setup(
         "httpx==0.25.2",
         "pydantic==2.11.3",
     ],
+    entry_points={
+        "console_scripts": [
+            "cto-scanner-scheduler=cto_signal_scanner.scheduler:main",
+        ],
+    },
 ) 
\ No newline at end of file
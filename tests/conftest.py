@@ -1,5 +1,7 @@
 import pytest
+from datetime import datetime, timedelta
 from unittest.mock import MagicMock
+from cto_signal_scanner.main import ScanStages
 
 @pytest.fixture
 def mock_feed_entry():
@@ -19,4 +21,18 @@ def mock_openai_response():
             }
         )
     ]
-    return mock_response 
\ No newline at end of file
+    return mock_response
+
+@pytest.fixture
+def queue_entries():
+    """
+    Run the entries of one feed through a scan's filter, dedup, evaluate and
+    sink stages; returns the (entry, cache_key, future) tuples in feed order.
+    """
+    def queue(entries, eval_pool, gpt_cache, cutoff_date=None, **kwargs):
+        stages = ScanStages(cutoff_date or datetime.utcnow() - timedelta(days=1), eval_pool, gpt_cache,
+                            fetcher=MagicMock(), max_in_flight=100, **kwargs)
+        for item in stages.filter(('https://example.com/feed', entries)):
+            stages.sink(stages.evaluate(stages.dedup(item)))
+        return stages.queued('https://example.com/feed')
+    return queue
@@ -0,0 +1,205 @@
+import time
+import sqlite3
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from cto_signal_scanner.main import FeedDownload, fetch_and_process_feeds
+from cto_signal_scanner.utils.article_store import ArticleStore
+from cto_signal_scanner.utils.feed_parser import FeedEntry
+
+FEEDS = ['https://a.example.com/feed', 'https://b.example.com/feed']
+
+VERSION_1_SCHEMA = '''
+CREATE TABLE articles (
+    id INTEGER PRIMARY KEY,
+    canonical_url TEXT NOT NULL UNIQUE,
+    feed TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    summary TEXT NOT NULL DEFAULT '',
+    rating TEXT NOT NULL DEFAULT '',
+    rating_value REAL,
+    rationale TEXT NOT NULL DEFAULT '',
+    published TEXT NOT NULL,
+    evaluated_at REAL NOT NULL
+);
+CREATE INDEX idx_articles_published ON articles (namespace, published);
+CREATE VIRTUAL TABLE articles_fts USING fts5(title, summary, content='articles', content_rowid='id');
+CREATE TRIGGER articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, summary) VALUES (new.id, new.title, new.summary);
+END;
+'''
+
+def _result(title, hours_old=0, rating='5', summary=None):
+    return {'title': title, 'link': f'https://example.com/{title}?utm_source=rss', 'summary': summary or title,
+            'rating': rating, 'rationale': '', 'date': (datetime.utcnow() - timedelta(hours=hours_old)).isoformat()}
+
+@pytest.fixture
+def store(tmp_path):
+    store = ArticleStore(tmp_path / 'articles.sqlite3', max_age_minutes=60)
+    yield store
+    store.close()
+
+def test_window_follows_feed_order_then_newest_first(store):
+    store.add_results('ns', FEEDS[1], [_result('b-new', 1)])
+    store.add_results('ns', FEEDS[0], [_result('a-old', 30), _result('a-new', 2), _result('a-stale', 100)])
+    titles = [r['title'] for r in store.window('ns', datetime.utcnow() - timedelta(days=2), FEEDS)]
+    assert titles == ['a-new', 'a-old', 'b-new']
+    assert store.window('other', datetime.utcnow() - timedelta(days=2), FEEDS) == []
+
+def test_reevaluation_replaces_the_row_for_a_canonical_url(store):
+    store.add_results('ns', FEEDS[0], [_result('post', rating='3')])
+    store.add_results('ns', FEEDS[0], [dict(_result('post', rating='9'), link='https://example.com/post')])
+    assert len(store) == 1
+    assert store.search('post')[0]['rating'] == '9'
+
+def test_narrower_window_of_a_recent_scan_is_fresh(store):
+    store.record_scan('ns', FEEDS, datetime.utcnow() - timedelta(days=30))
+    assert store.is_fresh('ns', FEEDS, datetime.utcnow() - timedelta(days=7))
+    assert not store.is_fresh('ns', FEEDS[:1], datetime.utcnow() - timedelta(days=7))
+    assert not store.is_fresh('other', FEEDS, datetime.utcnow() - timedelta(days=7))
+
+def test_wider_window_or_old_scan_is_not_fresh(store, tmp_path):
+    store.record_scan('ns', FEEDS, datetime.utcnow() - timedelta(days=7))
+    assert not store.is_fresh('ns', FEEDS, datetime.utcnow() - timedelta(days=30))
+    assert not ArticleStore(tmp_path / 'articles.sqlite3', max_age_minutes=0).is_fresh(
+        'ns', FEEDS, datetime.utcnow() - timedelta(days=1))
+
+def test_scan_in_another_namespace_keeps_rows_and_freshness(store):
+    store.add_results('ns', FEEDS[0], [_result('post', rating='3'), _result('other-post', rating='4')])
+    store.record_scan('ns', FEEDS, datetime.utcnow() - timedelta(days=30))
+    time.sleep(0.01)
+    # A scan in another namespace that never finishes still stores its results
+    store.add_results('other', FEEDS[0], [_result('post', rating='9')])
+    assert store.is_fresh('ns', FEEDS, datetime.utcnow() - timedelta(days=7))
+    window = store.window('ns', datetime.utcnow() - timedelta(days=7), FEEDS)
+    assert {(r['title'], r['rating']) for r in window} == {('post', '3'), ('other-post', '4')}
+    # Search finds each article once, with its latest evaluation
+    assert sorted(r['rating'] for r in store.search('post')) == ['4', '9']
+
+def test_version_1_store_is_rebuilt_per_namespace(tmp_path):
+    path = tmp_path / 'articles.sqlite3'
+    conn = sqlite3.connect(str(path))
+    conn.executescript(VERSION_1_SCHEMA)
+    conn.execute(
+        "INSERT INTO articles (canonical_url, feed, namespace, title, link, summary, rating, rating_value, "
+        "rationale, published, evaluated_at) VALUES ('https://example.com/post', ?, 'ns', 'post', "
+        "'https://example.com/post', 'Kubernetes security', 'High', NULL, '', ?, 1)",
+        (FEEDS[0], datetime.utcnow().isoformat())
+    )
+    conn.execute("INSERT INTO articles_fts (rowid, title, summary) VALUES (1, 'post', 'Kubernetes security')")
+    conn.commit()
+    conn.close()
+
+    store = ArticleStore(path, max_age_minutes=60)
+    try:
+        store.add_results('other', FEEDS[0], [dict(_result('post', rating='2'), link='https://example.com/post')])
+        assert len(store) == 2
+        assert [r['rating'] for r in store.window('ns', datetime.utcnow() - timedelta(days=1), FEEDS)] == ['High']
+        assert store.search('kubernetes', min_rating=7) == []
+        assert [r['title'] for r in store.search('post')] == ['post']
+    finally:
+        store.close()
+    reopened = ArticleStore(path)
+    assert len(reopened) == 2
+    reopened.close()
+
+def test_search_ranks_filters_and_ignores_fts_syntax(store):
+    store.add_results('ns', FEEDS[0], [
+        _result('kubernetes-cost', rating='8', summary='Kubernetes cost controls for platform teams'),
+        _result('kubernetes-intro', rating='3', summary='An introduction to Kubernetes'),
+        _result('old-kubernetes', hours_old=24 * 40, rating='9', summary='Kubernetes history'),
+        _result('databases', rating='7', summary='Postgres at scale'),
+    ])
+    titles = {r['title'] for r in store.search('kubernetes')}
+    assert titles == {'kubernetes-cost', 'kubernetes-intro', 'old-kubernetes'}
+    assert [r['title'] for r in store.search('kube', min_rating=5,
+                                             since=datetime.utcnow() - timedelta(days=7))] == ['kubernetes-cost']
+    assert store.search('"unbalanced AND (') == []
+    assert store.search('   ') == []
+
+def test_word_ratings_are_searchable_by_min_rating(store):
+    store.add_results('ns', FEEDS[0], [
+        _result('kubernetes-numeric', rating='8', summary='Kubernetes upgrades'),
+        _result('kubernetes-high', rating='High', summary='Kubernetes security'),
+        _result('kubernetes-low', rating='Low - marketing', summary='Kubernetes webinar'),
+    ])
+    titles = {r['title'] for r in store.search('kubernetes', min_rating=7)}
+    assert titles == {'kubernetes-numeric', 'kubernetes-high'}
+
+def test_recent_window_is_answered_from_the_store(tmp_path):
+    agent = MagicMock()
+    agent.get_current_prompt.return_value = 'prompt'
+    agent.model = 'test-model'
+    agent.system_message = 'system'
+    agent.parallel = 0
+    agent.evaluate_post.side_effect = lambda title, summary, link: {'summary': title, 'rating': '5', 'rationale': ''}
+    entries = [FeedEntry(title, f'https://example.com/{title}', title, datetime.utcnow() - timedelta(days=days))
+               for title, days in (('recent', 1), ('older', 5))]
+    namespaces = []
+
+    def scan(days_back):
+        with patch('cto_signal_scanner.main.FEEDS', FEEDS[:1]), \
+             patch('cto_signal_scanner.main.download_feed',
+                   side_effect=lambda url, *args: FeedDownload(url, entries=entries)) as download, \
+             patch('cto_signal_scanner.main.GPTAgent', return_value=agent), \
+             patch('cto_signal_scanner.main.ReportGenerator'), \
+             patch('cto_signal_scanner.main.GPT_CACHE_FILE', tmp_path / 'gpt_cache.sqlite3'), \
+             patch('cto_signal_scanner.main.CACHE_FILE', tmp_path / 'processed_entries.json'), \
+             patch('cto_signal_scanner.main.ARTICLE_STORE_FILE', tmp_path / 'articles.sqlite3'), \
+             patch('cto_signal_scanner.main.FeedCache'):
+            results = fetch_and_process_feeds(days_back=days_back, on_namespace=namespaces.append)[0]
+        return [r['title'] for r in results], download.call_count
+
+    assert scan(7) == (['recent', 'older'], 1)
+    assert scan(3) == (['recent'], 0)
+    assert scan(14)[1] == 1
+    # Every scan reports the namespace its results are stored under
+    assert len(namespaces) == 3 and len(set(namespaces)) == 1
+    store = ArticleStore(tmp_path / 'articles.sqlite3')
+    assert len(store.window(namespaces[0], datetime.utcnow() - timedelta(days=7), FEEDS[:1])) == 2
+    store.close()
+
+def test_prefilter_estimates_are_reported_but_not_stored(tmp_path, monkeypatch):
+    monkeypatch.setenv('PREFILTER_THRESHOLD', '4')
+    agent = MagicMock()
+    agent.get_current_prompt.return_value = 'prompt'
+    agent.model = 'test-model'
+    agent.system_message = 'system'
+    agent.parallel = 0
+    agent.evaluate_post.side_effect = lambda title, summary, link: {'summary': title, 'rating': '8', 'rationale': ''}
+    entries = [FeedEntry(title, f'https://example.com/{index}', title, datetime.utcnow() - timedelta(hours=1))
+               for index, title in enumerate(('Critical vulnerability disclosed', 'Join us at the webinar meetup'))]
+    with patch('cto_signal_scanner.main.FEEDS', FEEDS[:1]), \
+         patch('cto_signal_scanner.main.download_feed',
+               side_effect=lambda url, *args: FeedDownload(url, entries=entries)), \
+         patch('cto_signal_scanner.main.GPTAgent', return_value=agent), \
+         patch('cto_signal_scanner.main.ReportGenerator'), \
+         patch('cto_signal_scanner.main.GPT_CACHE_FILE', tmp_path / 'gpt_cache.sqlite3'), \
+         patch('cto_signal_scanner.main.CACHE_FILE', tmp_path / 'processed_entries.json'), \
+         patch('cto_signal_scanner.main.ARTICLE_STORE_FILE', tmp_path / 'articles.sqlite3'), \
+         patch('cto_signal_scanner.main.FeedCache'):
+        results = fetch_and_process_feeds(days_back=1)[0]
+
+    assert [r['title'] for r in results] == [entry.title for entry in entries]
+    store = ArticleStore(tmp_path / 'articles.sqlite3')
+    assert [r['title'] for r in store.search('vulnerability')] == ['Critical vulnerability disclosed']
+    assert store.search('webinar') == []
+    store.close()
+
+def test_store_is_closed_when_scan_setup_fails(tmp_path):
+    agent = MagicMock()
+    agent.get_current_prompt.return_value = 'prompt'
+    agent.model = 'test-model'
+    agent.system_message = 'system'
+    store = MagicMock()
+    store.is_fresh.return_value = False
+    with patch('cto_signal_scanner.main.FEEDS', FEEDS[:1]), \
+         patch('cto_signal_scanner.main.GPTAgent', return_value=agent), \
+         patch('cto_signal_scanner.main.ReportGenerator'), \
+         patch('cto_signal_scanner.main.ArticleStore', return_value=store), \
+         patch('cto_signal_scanner.main.FeedCache', side_effect=OSError('disk full')):
+        with pytest.raises(OSError):
+            fetch_and_process_feeds(days_back=1)
+    store.close.assert_called_once()
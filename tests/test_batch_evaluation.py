@@ -0,0 +1,109 @@
+import os
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+from cto_signal_scanner.utils.gpt_agent import GPTAgent
+from cto_signal_scanner.utils.evaluation_pool import EvaluationPool, RateLimiter
+
+@pytest.fixture
+def agent():
+    with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key', 'USE_OLLAMA': 'false'}):
+        return GPTAgent()
+
+def _articles(count):
+    return [
+        {'id': str(i), 'title': f'Title {i}', 'summary': f'Summary {i}', 'link': f'https://example.com/{i}'}
+        for i in range(count)
+    ]
+
+def _answer(ids):
+    return json.dumps({i: {'summary': f's{i}', 'rating': 7, 'rationale': f'r{i}'} for i in ids})
+
+def test_parse_batch_response_handles_fenced_json():
+    response = "```json\n" + _answer(['0', '1']) + "\n```"
+    results = GPTAgent.parse_batch_response(response)
+    assert results['1'] == {'summary': 's1', 'rating': '7', 'rationale': 'r1'}
+
+def test_parse_batch_response_skips_garbled_items():
+    response = json.dumps({'0': {'summary': 's0', 'rating': '5', 'rationale': ''}, '1': 'oops', '2': {'summary': ''}})
+    assert list(GPTAgent.parse_batch_response(response)) == ['0']
+
+def test_evaluate_batch_sends_one_request(agent):
+    with patch.object(agent, '_chat', return_value=_answer(['0', '1', '2'])) as mock_chat:
+        results = agent.evaluate_batch(_articles(3))
+    assert mock_chat.call_count == 1
+    assert sorted(results) == ['0', '1', '2']
+    prompt = mock_chat.call_args[0][0]
+    assert 'Title 2' in prompt and '"id": "2"' in prompt
+
+def test_evaluate_batch_leaves_out_dropped_items(agent):
+    with patch.object(agent, '_chat', return_value=_answer(['0', '2'])) as mock_chat:
+        results = agent.evaluate_batch(_articles(3))
+    assert mock_chat.call_count == 1
+    assert sorted(results) == ['0', '2']
+
+def test_evaluate_batch_unparseable_response_returns_nothing(agent):
+    with patch.object(agent, '_chat', return_value="I cannot produce JSON"):
+        assert agent.evaluate_batch(_articles(3)) == {}
+
+def test_pool_retries_dropped_items_under_the_rate_limit(agent):
+    responses = [_answer(['0', '2']), 'Summary: s1\nRating: 4\nRationale: r1']
+    rate_limiter = MagicMock(spec=RateLimiter)
+    pool = EvaluationPool(agent, max_workers=2, rate_limiter=rate_limiter, batch_size=3)
+    with patch.object(agent, '_chat', side_effect=responses) as mock_chat:
+        results = pool.evaluate_many([(a['title'], a['summary'], a['link']) for a in _articles(3)])
+    pool.shutdown()
+    assert mock_chat.call_count == 2 and rate_limiter.acquire.call_count == 2
+    assert results[1] == {'summary': 's1', 'rating': '4', 'rationale': 'r1'}
+
+def test_pool_splits_unparseable_batch(agent):
+    def chat(prompt, max_tokens):
+        if prompt.count('"id": "') > 2:
+            return "I cannot produce JSON"
+        ids = [a['id'] for a in _articles(4) if f'"id": "{a["id"]}"' in prompt]
+        return _answer(ids)
+
+    rate_limiter = MagicMock(spec=RateLimiter)
+    pool = EvaluationPool(agent, max_workers=2, rate_limiter=rate_limiter, batch_size=4)
+    with patch.object(agent, '_chat', side_effect=chat) as mock_chat:
+        results = pool.evaluate_many([(a['title'], a['summary'], a['link']) for a in _articles(4)])
+    pool.shutdown()
+    assert len(results) == 4
+    assert mock_chat.call_count == 3 and rate_limiter.acquire.call_count == 3
+
+def test_pool_groups_articles_into_batches():
+    gpt_agent = MagicMock()
+    gpt_agent.estimate_batch_tokens.return_value = 100
+    gpt_agent.evaluate_batch.side_effect = lambda articles: {
+        a['id']: {'summary': a['title'], 'rating': '5', 'rationale': ''} for a in articles
+    }
+    pool = EvaluationPool(gpt_agent, max_workers=2, rate_limiter=RateLimiter(0, 0), batch_size=2)
+    results = pool.evaluate_many([(f't{i}', '', '') for i in range(5)])
+    pool.shutdown()
+
+    assert [r['summary'] for r in results] == ['t0', 't1', 't2', 't3', 't4']
+    assert gpt_agent.evaluate_batch.call_count == 3
+
+def test_shutdown_without_wait_cancels_the_partial_batch():
+    gpt_agent = MagicMock()
+    pool = EvaluationPool(gpt_agent, max_workers=1, rate_limiter=RateLimiter(0, 0), batch_size=3)
+    future = pool.submit('t', '', '')
+    pool.shutdown(wait=False)
+    assert future.cancelled()
+    pool.shutdown()
+    gpt_agent.evaluate_batch.assert_not_called()
+    with pytest.raises(RuntimeError):
+        pool.submit('late', '', '')
+
+def test_shutdown_waits_for_retried_batches():
+    gpt_agent = MagicMock()
+    gpt_agent.estimate_batch_tokens.return_value = 100
+    # The first response drops every other article
+    gpt_agent.evaluate_batch.side_effect = lambda articles: {
+        a['id']: {'summary': a['title'], 'rating': '5', 'rationale': ''}
+        for a in articles if len(articles) < 4 or int(a['id']) % 2 == 0
+    }
+    pool = EvaluationPool(gpt_agent, max_workers=2, rate_limiter=RateLimiter(0, 0), batch_size=10)
+    futures = [pool.submit(f't{i}', '', '') for i in range(4)]
+    pool.shutdown()
+    assert [future.result(timeout=0)['summary'] for future in futures] == ['t0', 't1', 't2', 't3']
@@ -0,0 +1,44 @@
+import pytest
+from cto_signal_scanner.utils.dedup import DedupIndex, canonicalize_url, minhash, similarity
+
+ANNOUNCEMENT = ("Today we are announcing general availability of the new managed vector database "
+                "service, with automatic scaling, point in time recovery and private networking "
+                "across all commercial regions.")
+
+@pytest.fixture
+def index(tmp_path):
+    index = DedupIndex(tmp_path / 'dedup.sqlite3')
+    yield index
+    index.close()
+
+def test_canonicalize_url_drops_tracking_and_cosmetics():
+    assert canonicalize_url('http://www.Example.com/blog/post/?utm_source=rss&id=2&fbclid=x#top') == \
+        canonicalize_url('https://example.com/blog/post?id=2')
+    assert canonicalize_url('https://example.com/a?b=1&a=2') == canonicalize_url('https://example.com/a?a=2&b=1')
+    assert canonicalize_url('https://example.com/a?id=1') != canonicalize_url('https://example.com/a?id=2')
+
+def test_minhash_is_similar_for_small_edits():
+    original = minhash(f"Announcing: New vector database {ANNOUNCEMENT}")
+    edited = minhash(f"New vector DB now GA {ANNOUNCEMENT}")
+    unrelated = minhash("Quarterly earnings call transcript with commentary on retail growth, "
+                        "supply chain costs and the outlook for holiday shopping in Europe.")
+    assert similarity(original, edited) >= 0.7
+    assert similarity(original, unrelated) < 0.2
+
+def test_short_text_has_no_fingerprint():
+    assert minhash("Short title") is None
+
+def test_matches_same_canonical_url(index):
+    index.add('key1', canonicalize_url('https://example.com/post'), None)
+    assert index.match(canonicalize_url('https://www.example.com/post/?utm_medium=feed'), None) == 'key1'
+
+def test_matches_near_duplicate_content(index):
+    index.add('key1', canonicalize_url('https://a.example.com/post'),
+              DedupIndex.fingerprint('New vector database', ANNOUNCEMENT))
+    match = index.match(canonicalize_url('https://b.example.com/other'),
+                        DedupIndex.fingerprint('New vector database is now available', ANNOUNCEMENT))
+    assert match == 'key1'
+    assert index.match(canonicalize_url('https://c.example.com/x'),
+                       DedupIndex.fingerprint('Unrelated', 'Completely different words about '
+                                              'gardening tools, soil quality and spring planting '
+                                              'schedules for vegetables.')) is None
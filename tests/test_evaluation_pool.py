@@ -0,0 +1,136 @@
+import time
+import threading
+import pytest
+import openai
+from unittest.mock import MagicMock, patch
+from cto_signal_scanner.utils.evaluation_pool import (
+    AdaptiveConcurrencyLimiter, EvaluationPool, RateLimiter, TokenBucket
+)
+
+def _agent(evaluate):
+    agent = MagicMock()
+    agent.estimate_tokens.return_value = 100
+    agent.evaluate_post.side_effect = evaluate
+    return agent
+
+def test_evaluate_many_runs_concurrently_and_keeps_order():
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def evaluate(title, summary, link):
+        with lock:
+            in_flight.append(title)
+            peak.append(len(in_flight))
+        time.sleep(0.05 if title != 'a' else 0.15)
+        with lock:
+            in_flight.remove(title)
+        return {'summary': title, 'rating': '5', 'rationale': ''}
+
+    pool = EvaluationPool(_agent(evaluate), max_workers=3, rate_limiter=RateLimiter(0, 0))
+    results = pool.evaluate_many([(t, '', '') for t in 'abcdef'])
+    pool.shutdown()
+
+    assert [r['summary'] for r in results] == list('abcdef')
+    assert max(peak) == 3
+
+def test_retries_rate_limit_errors():
+    calls = []
+
+    def evaluate(title, summary, link):
+        calls.append(title)
+        if len(calls) < 3:
+            raise openai.error.RateLimitError("slow down")
+        return {'summary': 'ok', 'rating': '5', 'rationale': ''}
+
+    pool = EvaluationPool(_agent(evaluate), max_workers=1, rate_limiter=RateLimiter(0, 0),
+                          max_retries=3, backoff_base=0.001)
+    assert pool.submit('t', '', '').result()['summary'] == 'ok'
+    assert len(calls) == 3
+
+def test_non_retryable_errors_propagate():
+    def evaluate(title, summary, link):
+        raise openai.error.InvalidRequestError("bad request", None)
+
+    pool = EvaluationPool(_agent(evaluate), max_workers=1, rate_limiter=RateLimiter(0, 0), max_retries=3)
+    with pytest.raises(openai.error.InvalidRequestError):
+        pool.submit('t', '', '').result()
+
+def test_token_bucket_throttles_to_rate():
+    bucket = TokenBucket(rate_per_minute=600, capacity=1)  # 10 per second
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.25
+
+def test_retry_honours_retry_after_header():
+    pool = EvaluationPool(_agent(lambda *a: None), max_workers=1, rate_limiter=RateLimiter(0, 0))
+    error = openai.error.RateLimitError("slow down", headers={'Retry-After': '7'})
+    assert pool._backoff(0, error) == 7.0
+
+def test_adaptive_limit_grows_with_successes():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=4, adaptive=True)
+    for _ in range(20):
+        # Keep the limit saturated, as a busy scan would
+        slots = limiter.stats()['limit']
+        for _ in range(slots):
+            limiter.acquire()
+        for _ in range(slots):
+            limiter.release(0.1, 'success')
+    stats = limiter.stats()
+    assert stats['limit'] == 4
+    assert stats['decisions'][-1]['action'] == 'increase'
+
+def test_adaptive_limit_halves_on_rate_limit_once_per_cooldown():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, adaptive=True)
+    for _ in range(3):
+        limiter.acquire()
+    for _ in range(3):
+        limiter.release(0.1, 'rate_limited')
+    stats = limiter.stats()
+    assert stats['limit'] == 4
+    assert [d['action'] for d in stats['decisions']] == ['decrease']
+    assert stats['outcomes']['rate_limited'] == 3
+
+def test_adaptive_limit_decreases_on_latency_spike():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=4, adaptive=True)
+    for _ in range(AdaptiveConcurrencyLimiter.MIN_SAMPLES):
+        limiter.acquire()
+        limiter.release(0.1, 'success')
+    limiter.acquire()
+    limiter.release(1.0, 'success')
+    assert limiter.stats()['limit'] == 2
+    assert 'latency' in limiter.stats()['decisions'][-1]['reason']
+
+def test_limit_does_not_grow_when_unused():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=8, adaptive=True)
+    for _ in range(50):
+        limiter.acquire()
+        limiter.release(0.1, 'success')
+    assert limiter.stats()['limit'] == 4
+
+def test_fixed_limit_when_not_adaptive():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=3, adaptive=False)
+    limiter.acquire()
+    limiter.release(0.1, 'rate_limited')
+    assert limiter.stats()['limit'] == 3
+    assert limiter.max_limit == 3
+
+def test_pool_reports_outcomes_to_limiter():
+    calls = []
+
+    def evaluate(title, summary, link):
+        calls.append(title)
+        if len(calls) == 1:
+            raise openai.error.Timeout("too slow")
+        return {'summary': 'ok', 'rating': '5', 'rationale': ''}
+
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, adaptive=True)
+    pool = EvaluationPool(_agent(evaluate), rate_limiter=RateLimiter(0, 0), backoff_base=0.001,
+                          concurrency_limiter=limiter)
+    assert pool.submit('t', '', '').result()['summary'] == 'ok'
+    pool.shutdown()
+    stats = limiter.stats()
+    assert stats['outcomes'] == {'success': 1, 'rate_limited': 0, 'overloaded': 1, 'error': 0}
+    assert stats['limit'] == 2
+    assert stats['in_flight'] == 0
@@ -0,0 +1,109 @@
+import pytest
+import responses
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from unittest.mock import MagicMock, patch
+from cto_signal_scanner.main import FeedStages
+from cto_signal_scanner.utils.feed_cache import FeedCache
+from cto_signal_scanner.utils.feed_fetcher import FeedFetcher
+
+FEED_URL = 'https://example.com/feed'
+
+def _rss_body(title='Fresh Post'):
+    published = format_datetime(datetime.utcnow())
+    return f"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Example</title>
+<item><title>{title}</title><link>https://example.com/post</link>
+<description>Body</description><pubDate>{published}</pubDate></item>
+</channel></rss>"""
+
+@pytest.fixture
+def feed_cache(tmp_path):
+    return FeedCache(tmp_path / 'feed_cache.json')
+
+def fetch_and_parse(url, fetcher, feed_cache):
+    """Run a feed through a scan's fetch and parse stages; returns its entries, or None."""
+    stages = FeedStages(datetime.utcnow() - timedelta(days=1), MagicMock(), feed_cache, fetcher=fetcher)
+    fetched = stages.fetch(url)
+    parsed = stages.parse(fetched) if fetched else None
+    return parsed[1] if parsed else None
+
+@responses.activate
+def test_not_modified_response_skips_parsing(feed_cache):
+    fetcher = FeedFetcher(max_workers=1)
+    responses.add(responses.GET, FEED_URL, body=_rss_body(),
+                  headers={'ETag': '"v1"', 'Content-Type': 'application/rss+xml'})
+    first = fetch_and_parse(FEED_URL, fetcher, feed_cache)
+    assert first[0].title == 'Fresh Post'
+
+    responses.replace(responses.GET, FEED_URL, status=304)
+    with patch('cto_signal_scanner.utils.feed_parser.parse_feed') as mock_parse:
+        second = fetch_and_parse(FEED_URL, fetcher, feed_cache)
+        mock_parse.assert_not_called()
+
+    assert responses.calls[1].request.headers['If-None-Match'] == '"v1"'
+    assert [e.title for e in second] == ['Fresh Post']
+
+@responses.activate
+def test_unchanged_body_skips_parsing(feed_cache):
+    fetcher = FeedFetcher(max_workers=1)
+    body = _rss_body()
+    responses.add(responses.GET, FEED_URL, body=body, headers={'Content-Type': 'application/rss+xml'})
+    fetch_and_parse(FEED_URL, fetcher, feed_cache)
+
+    with patch('cto_signal_scanner.utils.feed_parser.parse_feed') as mock_parse:
+        feed = fetch_and_parse(FEED_URL, fetcher, feed_cache)
+        mock_parse.assert_not_called()
+    assert len(feed) == 1
+
+def test_validators_persist_across_instances(feed_cache, tmp_path):
+    feed_cache.update(FEED_URL, {'ETag': '"v2"', 'Last-Modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}, 'abc', [])
+    feed_cache.save()
+
+    reloaded = FeedCache(tmp_path / 'feed_cache.json')
+    assert reloaded.request_headers(FEED_URL) == {
+        'If-None-Match': '"v2"',
+        'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'
+    }
+
+LANDING_URL = 'https://example.com/blog'
+LANDING_PAGE = """<html><head>
+<link rel="alternate" type="application/rss+xml" href="/blog/rss.xml">
+</head><body>Blog</body></html>"""
+
+@responses.activate
+def test_discovered_feed_url_is_cached(feed_cache):
+    fetcher = FeedFetcher(max_workers=1)
+    responses.add(responses.GET, LANDING_URL, body=LANDING_PAGE, content_type='text/html')
+    responses.add(responses.GET, 'https://example.com/blog/rss.xml', body=_rss_body(),
+                  content_type='application/rss+xml')
+
+    fetch_and_parse(LANDING_URL, fetcher, feed_cache)
+    assert feed_cache.discovered_url(LANDING_URL) == 'https://example.com/blog/rss.xml'
+
+    responses.replace(responses.GET, 'https://example.com/blog/rss.xml', body=_rss_body('Newer Post'),
+                      content_type='application/rss+xml')
+    feed = fetch_and_parse(LANDING_URL, fetcher, feed_cache)
+
+    assert feed[0].title == 'Newer Post'
+    assert [call.request.url for call in responses.calls].count(LANDING_URL) == 1
+
+@responses.activate
+def test_failed_discovered_url_is_rediscovered(feed_cache):
+    fetcher = FeedFetcher(max_workers=1)
+    feed_cache.remember_discovery(LANDING_URL, 'https://example.com/old-feed.xml')
+    responses.add(responses.GET, 'https://example.com/old-feed.xml', status=404)
+    responses.add(responses.GET, LANDING_URL, body=LANDING_PAGE, content_type='text/html')
+    responses.add(responses.GET, 'https://example.com/blog/rss.xml', body=_rss_body(),
+                  content_type='application/rss+xml')
+
+    feed = fetch_and_parse(LANDING_URL, fetcher, feed_cache)
+
+    assert feed[0].title == 'Fresh Post'
+    assert feed_cache.discovered_url(LANDING_URL) == 'https://example.com/blog/rss.xml'
+
+def test_discovery_expires_after_ttl(tmp_path):
+    cache = FeedCache(tmp_path / 'feed_cache.json', discovery_ttl_hours=1)
+    cache.remember_discovery(LANDING_URL, 'https://example.com/blog/rss.xml')
+    cache.feeds[LANDING_URL]['discovered_at'] = '2000-01-01T00:00:00'
+    assert cache.discovered_url(LANDING_URL) is None
@@ -0,0 +1,42 @@
+import threading
+import responses
+from unittest.mock import patch
+from cto_signal_scanner.utils.feed_fetcher import USER_AGENT, FeedFetcher, get_fetcher
+
+def test_timeouts_are_configurable(monkeypatch):
+    monkeypatch.setenv('FEED_CONNECT_TIMEOUT', '2')
+    monkeypatch.setenv('FEED_READ_TIMEOUT', '7')
+    fetcher = FeedFetcher()
+    assert fetcher.timeout == (2.0, 7.0)
+
+def test_get_applies_timeouts_unless_given():
+    fetcher = FeedFetcher(max_workers=1, connect_timeout=2, read_timeout=7)
+    with patch.object(fetcher.session, 'get') as get:
+        fetcher.get('https://example.com/feed', headers={'If-None-Match': '"v1"'})
+        fetcher.get('https://example.com/feed', timeout=1)
+    assert get.call_args_list[0].kwargs == {'timeout': (2, 7), 'headers': {'If-None-Match': '"v1"'}}
+    assert get.call_args_list[1].kwargs == {'timeout': 1}
+
+@responses.activate
+def test_fetch_stage_threads_share_one_pooled_session():
+    fetcher = FeedFetcher(max_workers=4)
+    urls = [f'https://feed{i}.example.com/rss' for i in range(8)]
+    for url in urls:
+        responses.add(responses.GET, url, body=url)
+    bodies = {}
+
+    def fetch(url):
+        bodies[url] = fetcher.get(url).text
+
+    threads = [threading.Thread(target=fetch, args=(url,)) for url in urls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert bodies == {url: url for url in urls}
+    assert all(call.request.headers['User-Agent'] == USER_AGENT for call in responses.calls)
+    assert fetcher.session.get_adapter('https://example.com')._pool_maxsize == 4
+
+def test_get_fetcher_is_shared_across_scans():
+    assert get_fetcher() is get_fetcher()
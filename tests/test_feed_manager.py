@@ -0,0 +1,67 @@
+import time
+import pytest
+from unittest.mock import patch
+from cto_signal_scanner.utils.feed_manager import FeedManager
+
+@pytest.fixture
+def manager(tmp_path):
+    return FeedManager(str(tmp_path / 'feeds.json'), health_ttl_minutes=60)
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+def test_get_feeds_returns_without_validating(manager):
+    with patch.object(FeedManager, 'validate_feed', return_value=(True, 'Feed is valid')) as mock_validate:
+        with patch.object(FeedManager, 'revalidate'):
+            feeds = manager.get_feeds()
+        mock_validate.assert_not_called()
+    assert feeds and all(feed['status'] == 'unknown' for feed in feeds)
+
+def test_stale_feeds_are_revalidated_in_background(manager):
+    with patch.object(FeedManager, 'validate_feed', return_value=(False, 'Feed contains no entries')):
+        manager.get_feeds()
+        urls = [feed['url'] for feed in manager.feeds['feeds']]
+        assert _wait_for(lambda: all(manager.get_health(url) for url in urls))
+
+    feeds = manager.get_feeds()
+    assert all(feed['status'] == 'invalid' for feed in feeds)
+    assert feeds[0]['error'] == 'Feed contains no entries'
+    assert feeds[0]['last_checked'] is not None
+
+def test_fresh_health_is_not_revalidated(manager):
+    url = manager.feeds['feeds'][0]['url']
+    with patch.object(FeedManager, 'validate_feed', return_value=(True, 'Feed is valid')):
+        manager.check_feed(url)
+    assert not manager.is_stale(url)
+
+    reloaded = FeedManager(str(manager.feeds_file), health_ttl_minutes=60)
+    assert reloaded.get_health(url)['status'] == 'valid'
+
+def test_add_feed_rejects_duplicates_without_fetching(manager):
+    url = manager.feeds['feeds'][0]['url']
+    with patch.object(FeedManager, 'validate_feed') as mock_validate:
+        success, message, _ = manager.add_feed(url)
+        mock_validate.assert_not_called()
+    assert not success
+    assert message == "Feed already exists"
+
+def test_zero_ttl_always_revalidates(tmp_path):
+    manager = FeedManager(str(tmp_path / 'feeds.json'), health_ttl_minutes=0)
+    url = manager.feeds['feeds'][0]['url']
+    with patch.object(FeedManager, 'validate_feed', return_value=(True, 'Feed is valid')):
+        manager.check_feed(url)
+    assert manager.is_stale(url)
+
+def test_health_file_is_replaced_whole(manager):
+    url = manager.feeds['feeds'][0]['url']
+    with patch.object(FeedManager, 'validate_feed', return_value=(True, 'Feed is valid')):
+        manager.check_feed(url)
+    health_dir = manager.health_file.parent
+    assert sorted(path.name for path in health_dir.iterdir() if path.name.startswith('feed_health')) == \
+        ['feed_health.json']
+    assert FeedManager(str(manager.feeds_file)).get_health(url)['status'] == 'valid'
@@ -0,0 +1,85 @@
+import pytest
+from datetime import datetime, timedelta
+from email.utils import format_datetime
+from unittest.mock import patch
+from cto_signal_scanner.utils.feed_parser import FeedEntry, ParserPool, parse_feed, iter_entries, parse_entry_date
+
+def _rss(items):
+    body = ''.join(
+        f"<item><title>{title}</title><link>https://example.com/{title}</link>"
+        f"<description><![CDATA[<p>{title} body</p>]]></description>"
+        f"<pubDate>{format_datetime(published)}</pubDate></item>"
+        for title, published in items
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>T</title>{body}</channel></rss>'.encode()
+
+def test_parses_rss_items():
+    now = datetime.utcnow().replace(microsecond=0)
+    entries = parse_feed(_rss([('one', now)]))
+    assert len(entries) == 1
+    assert entries[0].title == 'one'
+    assert entries[0].link == 'https://example.com/one'
+    assert entries[0].summary == '<p>one body</p>'
+    assert entries[0].published == now
+
+def test_parses_atom_entries():
+    body = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>T</title>
+<entry><title>Atom Post</title><id>tag:example.com,1</id>
+<link rel="self" href="https://example.com/self"/>
+<link rel="alternate" href="https://example.com/atom-post"/>
+<summary>Short</summary><updated>2024-05-01T12:00:00+02:00</updated></entry>
+</feed>"""
+    entries = parse_feed(body)
+    assert entries[0].link == 'https://example.com/atom-post'
+    assert entries[0].guid == 'tag:example.com,1'
+    assert entries[0].published == datetime(2024, 5, 1, 10, 0)
+
+def test_stops_reading_newest_first_feed_after_cutoff():
+    now = datetime.utcnow()
+    items = [(f'post{i}', now - timedelta(days=i)) for i in range(50)]
+    seen = list(iter_entries(_rss(items), cutoff_date=now - timedelta(days=2, hours=12)))
+    assert [e.title for e in seen] == ['post0', 'post1', 'post2']
+
+def test_unsorted_feed_is_read_to_the_end():
+    now = datetime.utcnow()
+    items = [('old1', now - timedelta(days=10)), ('old2', now - timedelta(days=11)),
+             ('old3', now - timedelta(days=12)), ('new', now)]
+    # Out-of-order dates detected after the stale run has started
+    items.insert(0, ('newer', now - timedelta(days=20)))
+    entries = parse_feed(_rss(items), cutoff_date=now - timedelta(days=1))
+    assert [e.title for e in entries] == ['new']
+
+def test_malformed_xml_falls_back_to_feedparser():
+    body = _rss([('broken &nbsp; entity', datetime.utcnow())])
+    with patch('cto_signal_scanner.utils.feed_parser.feedparser.parse',
+               wraps=__import__('feedparser').parse) as mock_parse:
+        entries = parse_feed(body)
+        mock_parse.assert_called_once()
+    assert len(entries) == 1
+
+def test_non_feed_document_returns_none():
+    assert parse_feed(b'<html><body>hello</body></html>') is None
+
+def test_parse_entry_date_formats():
+    assert parse_entry_date('Tue, 30 Apr 2024 18:00:00 -0400') == datetime(2024, 4, 30, 22, 0)
+    assert parse_entry_date('2024-04-30T22:00:00Z') == datetime(2024, 4, 30, 22, 0)
+    assert parse_entry_date('not a date') is None
+
+def test_parser_pool_returns_the_same_entries_from_worker_processes():
+    now = datetime.utcnow().replace(microsecond=0)
+    body = _rss([(f'post{i}', now - timedelta(hours=i)) for i in range(50)])
+    pool = ParserPool(workers=2, min_bytes=0)
+    try:
+        entries = pool.parse(body, cutoff_date=now - timedelta(hours=10))
+        assert entries == parse_feed(body, cutoff_date=now - timedelta(hours=10))
+        assert all(type(entry) is FeedEntry for entry in entries)
+        assert pool.parse(b'<html><body>hello</body></html>' * 10) is None
+    finally:
+        pool.shutdown()
+
+def test_parser_pool_parses_small_bodies_in_process():
+    pool = ParserPool(workers=2, min_bytes=1024 * 1024)
+    assert len(pool.parse(_rss([('one', datetime.utcnow())]))) == 1
+    assert pool._executor is None
+    assert not ParserPool(workers=0).enabled
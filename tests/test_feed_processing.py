@@ -1,8 +1,10 @@
 import pytest
 from unittest.mock import patch, MagicMock
 import feedparser
-from cto_signal_scanner.main import fetch_and_process_feeds
+from datetime import datetime
+from cto_signal_scanner.main import FeedDownload, fetch_and_process_feeds
 from cto_signal_scanner.utils.feed_sources import FEEDS
+from cto_signal_scanner.utils.feed_parser import FeedEntry
 
 def test_feed_urls_are_valid():
     for url in FEEDS:
@@ -40,4 +42,42 @@ def test_fetch_and_process_feeds(mock_feedparser):
     with patch('feedparser.parse', return_value=mock_feedparser):
         with patch('cto_signal_scanner.utils.gpt_agent.get_openai_client', return_value=mock_client):
             fetch_and_process_feeds()
-            mock_client.chat.completions.create.assert_called() 
\ No newline at end of file
+            mock_client.chat.completions.create.assert_called() 
+
+
+def _make_feed(*titles):
+    return [
+        FeedEntry(
+            title=title,
+            link=f"https://example.com/{title}",
+            summary=f"{title} summary",
+            published=datetime.utcnow()
+        )
+        for title in titles
+    ]
+
+
+def test_results_keep_feed_order_with_concurrent_fetch(tmp_path):
+    feeds = ['https://a.example.com/feed', 'https://b.example.com/feed']
+    parsed = {feeds[0]: _make_feed('first'), feeds[1]: _make_feed('second')}
+    agent = MagicMock()
+    agent.get_current_prompt.return_value = 'prompt'
+    agent.model = 'test-model'
+    agent.system_message = 'system'
+    agent.parallel = 0
+    agent.evaluate_post.side_effect = lambda title, summary, link: {
+        'summary': title, 'rating': '5', 'rationale': 'ok'
+    }
+
+    with patch('cto_signal_scanner.main.FEEDS', feeds), \
+         patch('cto_signal_scanner.main.download_feed',
+               side_effect=lambda url, *args: FeedDownload(url, entries=parsed[url])), \
+         patch('cto_signal_scanner.main.GPTAgent', return_value=agent), \
+         patch('cto_signal_scanner.main.ReportGenerator'), \
+         patch('cto_signal_scanner.main.GPT_CACHE_FILE', tmp_path / 'gpt_cache.sqlite3'), \
+         patch('cto_signal_scanner.main.CACHE_FILE', tmp_path / 'processed_entries.json'), \
+         patch('cto_signal_scanner.main.ARTICLE_STORE_FILE', tmp_path / 'articles.sqlite3'), \
+         patch('cto_signal_scanner.main.FeedCache'):
+        results, _ = fetch_and_process_feeds(days_back=1)
+
+    assert [r['title'] for r in results] == ['first', 'second']
@@ -0,0 +1,82 @@
+import os
+import pytest
+from unittest.mock import MagicMock, patch
+from cto_signal_scanner.utils.gpt_agent import GPTAgent
+from cto_signal_scanner.utils.model_router import ModelRouter, tiered_routing_enabled
+
+def _agent(model, rating):
+    agent = MagicMock()
+    agent.model = model
+    agent.parallel = 0
+    agent.max_tokens = 500
+    agent.system_message = 'system'
+    agent.estimate_tokens.return_value = 600
+    agent.evaluate_post.return_value = {'summary': f'{model} summary', 'rating': rating, 'rationale': 'why'}
+    return agent
+
+@pytest.fixture
+def router():
+    return ModelRouter(_agent('local', '2'), _agent('remote', '9'), escalate_min=5, escalate_max=7,
+                       local_cost=0, remote_cost=1.0)
+
+def test_confident_local_rating_is_kept(router):
+    result = router.evaluate_post('Title', 'Summary', 'https://example.com')
+    assert result['summary'] == 'local summary'
+    router.remote.evaluate_post.assert_not_called()
+    stats = router.get_stats()
+    assert stats['local']['calls'] == 1 and stats['remote']['calls'] == 0
+    assert stats['local']['tokens'] > 100
+
+@pytest.mark.parametrize('local_rating', ['6', '5/10', 'Medium', ''])
+def test_ambiguous_or_unparseable_rating_is_escalated(router, local_rating):
+    router.local.evaluate_post.return_value['rating'] = local_rating
+    assert router.evaluate_post('Title', 'Summary', 'https://example.com')['summary'] == 'remote summary'
+    stats = router.get_stats()
+    assert stats['remote']['calls'] == 1
+    assert stats['remote']['cost'] == pytest.approx(stats['remote']['tokens'] / 1000)
+
+@pytest.mark.parametrize('local_rating', ['High', 'low', '**Low** - vendor marketing'])
+def test_confident_categorical_rating_is_kept(router, local_rating):
+    router.local.evaluate_post.return_value['rating'] = local_rating
+    assert router.evaluate_post('Title', 'Summary', 'https://example.com')['summary'] == 'local summary'
+    router.remote.evaluate_post.assert_not_called()
+
+def test_local_failure_is_escalated(router):
+    router.local.evaluate_post.side_effect = ConnectionError('ollama down')
+    assert router.evaluate_post('Title', 'Summary', 'https://example.com')['rating'] == '9'
+    assert router.get_stats()['local']['failures'] == 1
+
+def test_batch_escalates_only_ambiguous_items(router):
+    router.local.evaluate_batch.return_value = {
+        '0': {'summary': 's0', 'rating': '2', 'rationale': ''},
+        '1': {'summary': 's1', 'rating': '6', 'rationale': ''},
+    }
+    router.remote.evaluate_batch.side_effect = lambda articles: {
+        a['id']: {'summary': 'remote', 'rating': '9', 'rationale': ''} for a in articles
+    }
+    articles = [{'id': str(i), 'title': f't{i}', 'summary': '', 'link': ''} for i in range(3)]
+    results = router.evaluate_batch(articles)
+    assert [results[str(i)]['summary'] for i in range(3)] == ['s0', 'remote', 'remote']
+    assert [a['id'] for a in router.remote.evaluate_batch.call_args[0][0]] == ['1', '2']
+
+def test_model_name_covers_both_tiers_and_band(router):
+    assert router.model == 'local>remote@5-7'
+
+def test_routing_mode_from_env():
+    with patch.dict(os.environ, {'LLM_ROUTING': 'tiered'}):
+        assert tiered_routing_enabled()
+    with patch.dict(os.environ, {'LLM_ROUTING': 'single'}):
+        assert not tiered_routing_enabled()
+
+def test_agents_pass_their_own_endpoint_per_request():
+    with patch.dict(os.environ, {'OPENAI_API_KEY': 'sk-test', 'OLLAMA_BASE_URL': 'http://ollama:11434/v1',
+                                 'OLLAMA_NATIVE': 'false'}):
+        local, remote = GPTAgent(provider='ollama'), GPTAgent(provider='openai')
+    response = MagicMock()
+    response.choices[0].message.content = 'Summary: s\nRating: 3\nRationale: r'
+    with patch('openai.ChatCompletion.create', return_value=response) as create:
+        local.evaluate_post('t', 's', 'l')
+        remote.evaluate_post('t', 's', 'l')
+    assert create.call_args_list[0].kwargs['api_base'] == 'http://ollama:11434/v1'
+    assert create.call_args_list[1].kwargs['api_base'] is None
+    assert create.call_args_list[1].kwargs['api_key'] == 'sk-test'
@@ -0,0 +1,85 @@
+import os
+import pytest
+import httpx
+import ollama
+from unittest.mock import MagicMock, patch
+from cto_signal_scanner.main import scan_namespace
+from cto_signal_scanner.utils.gpt_agent import GPTAgent, move_article_to_end
+from cto_signal_scanner.utils.evaluation_pool import is_overloaded, is_rate_limited, is_retryable
+
+RESPONSE = 'Summary: s\nRating: 8\nRationale: r'
+
+@pytest.fixture
+def agent():
+    env = {'OLLAMA_BASE_URL': 'http://ollama:11434/v1', 'OLLAMA_KEEP_ALIVE': '-1', 'OLLAMA_NUM_PARALLEL': '3',
+           'OLLAMA_NATIVE': 'true'}
+    with patch.dict(os.environ, env), patch('ollama.Client') as client:
+        agent = GPTAgent(provider='ollama')
+    assert client.call_args.kwargs['host'] == 'http://ollama:11434'
+    return agent
+
+def test_article_fields_move_after_instructions():
+    template = 'Rate this.\nArticle:\nTitle: {title}\nSummary: {summary}\nLink: {link}\n\nRespond as JSON.'
+    assert move_article_to_end(template) == \
+        'Rate this.\n\nRespond as JSON.\n\nArticle:\nTitle: {title}\nSummary: {summary}\nLink: {link}'
+    assert move_article_to_end('No placeholders') == 'No placeholders'
+
+def test_prompts_share_a_prefix_up_to_the_article(agent):
+    first = agent.prompt_template.format(title='A', summary='a', link='x')
+    second = agent.prompt_template.format(title='B', summary='b', link='y')
+    prefix = first[:first.index('Title: A')]
+    assert second.startswith(prefix) and 'Rationale: [your rationale]' in prefix
+
+def test_native_chat_pins_model_with_keep_alive(agent):
+    agent.ollama.chat.return_value = {'message': {'content': RESPONSE}, 'done': True}
+    with patch('openai.ChatCompletion.create') as create:
+        result = agent.evaluate_post('t', 's', 'l')
+    create.assert_not_called()
+    assert result['rating'] == '8'
+    kwargs = agent.ollama.chat.call_args.kwargs
+    assert kwargs['keep_alive'] == -1
+    assert kwargs['options']['num_predict'] == agent.max_tokens
+    assert agent.parallel == 3
+
+def test_native_stream_yields_message_deltas(agent):
+    agent.ollama.chat.return_value = iter(
+        [{'message': {'content': line + '\n'}, 'done': False} for line in RESPONSE.split('\n')] +
+        [{'message': {'content': ''}, 'done': True, 'eval_count': 12}]
+    )
+    partials = []
+    assert agent.evaluate_post('t', 's', 'l', on_partial=partials.append)['rationale'] == 'r'
+    assert partials[-1]['rating'] == '8'
+
+def test_warm_up_loads_model(agent):
+    assert agent.warm_up()
+    agent.ollama.generate.assert_called_once_with(model=agent.model, keep_alive=-1)
+    agent.ollama.generate.side_effect = httpx.ConnectError('refused')
+    assert not agent.warm_up()
+
+def test_warm_up_is_a_no_op_for_openai():
+    with patch.dict(os.environ, {'OPENAI_API_KEY': 'sk-test'}):
+        assert not GPTAgent(provider='openai').warm_up()
+
+def test_native_mode_is_opt_in():
+    with patch.dict(os.environ):
+        os.environ.pop('OLLAMA_NATIVE', None)
+        agent = GPTAgent(provider='ollama')
+    assert not agent.ollama_native and agent.parallel == 0
+    assert agent.prompt_template.index('{title}') < agent.prompt_template.index('Format your response')
+
+def test_native_mode_keeps_a_custom_prompt_and_its_namespace():
+    custom = 'Article:\nTitle: {title}\nSummary: {summary}\nLink: {link}\n\nRate it.'
+    with patch.dict(os.environ, {'GPT_PROMPT': custom, 'OLLAMA_NATIVE': 'false'}):
+        compatible = GPTAgent(provider='ollama')
+    with patch.dict(os.environ, {'GPT_PROMPT': custom, 'OLLAMA_NATIVE': 'true'}), patch('ollama.Client'):
+        native = GPTAgent(provider='ollama')
+    assert native.ollama_native and native.get_current_prompt() == custom
+    assert scan_namespace(native) == scan_namespace(compatible)
+
+def test_ollama_errors_are_classified():
+    busy = ollama.ResponseError('server busy', 503)
+    assert is_overloaded(busy) and is_retryable(busy)
+    assert is_rate_limited(ollama.ResponseError('too many requests', 429))
+    assert is_overloaded(httpx.ReadTimeout('slow'))
+    assert is_retryable(httpx.ConnectError('refused'))
+    assert not is_retryable(ollama.ResponseError('model not found', 404))
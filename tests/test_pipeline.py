@@ -0,0 +1,111 @@
+import time
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from cto_signal_scanner.main import FeedDownload, ScanStages
+from cto_signal_scanner.utils.feed_parser import FeedEntry
+from cto_signal_scanner.utils.pipeline import Pipeline, Stage
+
+def test_items_flow_through_stages_with_fan_out_and_drops():
+    seen = []
+    pipeline = Pipeline([
+        Stage('split', lambda n: range(n), fan_out=True),
+        Stage('odd', lambda n: n if n % 2 else None, workers=3),
+        Stage('sink', seen.append),
+    ], queue_size=2)
+    pipeline.run([3, 4])
+    assert sorted(seen) == [1, 1, 3]
+    stats = pipeline.stats()
+    assert stats['split']['emitted'] == 7 and stats['odd']['emitted'] == 3
+
+def test_failing_item_is_dropped_and_counted():
+    seen = []
+    pipeline = Pipeline([Stage('invert', lambda n: 1 / n), Stage('sink', seen.append)])
+    pipeline.run([0, 2])
+    assert seen == [0.5]
+    assert pipeline.stats()['invert']['errors'] == 1
+
+def test_slow_stage_bounds_buffered_items():
+    produced = []
+    release = threading.Event()
+
+    def source():
+        for n in range(100):
+            produced.append(n)
+            yield n
+
+    pipeline = Pipeline([Stage('pass', lambda n: n), Stage('slow', lambda n: release.wait())], queue_size=2)
+    runner = threading.Thread(target=pipeline.run, args=(source(),))
+    runner.start()
+    time.sleep(0.2)
+    try:
+        # Two queues of two, one item per worker and one waiting to enter the first queue
+        assert len(produced) == 7
+    finally:
+        release.set()
+        runner.join(timeout=5)
+    assert len(produced) == 100
+
+def test_cancel_drains_without_processing():
+    seen = []
+    pipeline = Pipeline([Stage('sink', seen.append)])
+    pipeline.cancel()
+    pipeline.run(range(5))
+    assert seen == []
+
+def test_stage_can_be_replaced():
+    seen = []
+    pipeline = Pipeline([Stage('double', lambda n: n * 2), Stage('sink', lambda n: None)])
+    pipeline.replace(Stage('sink', seen.append))
+    pipeline.run([1])
+    assert seen == [2]
+
+def _entry(title, days_old=0):
+    return FeedEntry(title, f'https://example.com/{title}', f'{title} summary',
+                     datetime.utcnow() - timedelta(days=days_old))
+
+def _stages(tmp_path=None, **kwargs):
+    eval_pool = MagicMock()
+    eval_pool.max_workers = 2
+    gpt_cache = MagicMock()
+    gpt_cache.get.return_value = None
+    return ScanStages(datetime.utcnow() - timedelta(days=1), eval_pool, gpt_cache, fetcher=MagicMock(), **kwargs)
+
+def test_filter_stage_drops_old_entries_and_keeps_positions():
+    stages = _stages()
+    kept = stages.filter(('feed', [_entry('old', days_old=3), _entry('new')]))
+    assert [(url, position, entry.title) for url, position, _, entry in kept] == [('feed', 1, 'new')]
+
+def test_failed_parse_forgets_discovered_url():
+    feed_cache = MagicMock()
+    feed_cache.is_unchanged.return_value = False
+    stages = _stages(feed_cache=feed_cache)
+    response = MagicMock(content=b'not a feed')
+    assert stages.parse(('https://example.com/blog', FeedDownload('https://example.com/rss', response))) is None
+    feed_cache.forget_discovery.assert_called_once_with('https://example.com/blog')
+
+def test_evaluate_stage_blocks_when_evaluations_are_in_flight():
+    stages = _stages(max_in_flight=1)
+    futures = [Future(), Future()]
+    stages.eval_pool.submit.side_effect = futures
+    first, second = _entry('first'), _entry('second')
+
+    stages.evaluate(('feed', 0, 'raw1', 'key1', first))
+    blocked = threading.Thread(target=stages.evaluate, args=(('feed', 1, 'raw2', 'key2', second),))
+    blocked.start()
+    time.sleep(0.1)
+    assert blocked.is_alive()
+    stages.eval_pool.flush.assert_called()
+
+    futures[0].set_result({'rating': '5'})
+    blocked.join(timeout=5)
+    assert not blocked.is_alive()
+    futures[1].set_result({'rating': '6'})
+
+def test_sink_reports_feed_order():
+    stages = _stages()
+    stages.sink(('feed', 2, ('c', 'k3', None)))
+    stages.sink(('feed', 0, ('a', 'k1', None)))
+    assert [entry for entry, _, _ in stages.queued('feed')] == ['a', 'c']
+    assert stages.queued('other') == []
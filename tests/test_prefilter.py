@@ -0,0 +1,95 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+from cto_signal_scanner.main import create_prefilter, remember_results
+from cto_signal_scanner.utils.feed_parser import FeedEntry
+from cto_signal_scanner.utils.prefilter import (
+    MIN_TRAINING_SAMPLES, NEUTRAL_SCORE, RelevanceScorer, article_text, is_skipped, parse_rating, rating_value,
+    tokenize
+)
+from cto_signal_scanner.utils.response_cache import ResponseCache
+from cto_signal_scanner.utils.seen_index import SeenIndex
+
+def test_tokenize_strips_html():
+    assert tokenize('<p>Kubernetes <b>1.30</b> released.</p>') == ['kubernetes', '1.30', 'released']
+
+def test_parse_rating():
+    assert parse_rating('7') == 7
+    assert parse_rating('8/10') == 8
+    assert parse_rating('High') is None
+    assert parse_rating('42') is None
+
+def test_rating_value_maps_categories_to_the_scale():
+    assert rating_value('7/10') == 7
+    assert rating_value('High') == 9 and rating_value('[medium]') == 5.5 and rating_value('LOW.') == 2
+    assert rating_value('Highly relevant') is None and rating_value('') is None
+
+def test_keyword_weights_without_training():
+    scorer = RelevanceScorer(threshold=4)
+    assert scorer.score('Critical vulnerability disclosed', '') > NEUTRAL_SCORE
+    assert scorer.score('Join us at the Berlin meetup', 'Register now for our webinar') < 4
+
+def test_disabled_by_default(monkeypatch):
+    monkeypatch.delenv('PREFILTER_THRESHOLD', raising=False)
+    scorer = RelevanceScorer()
+    assert not scorer.enabled
+    assert scorer.should_skip('Webinar meetup giveaway', '') == (False, scorer.score('Webinar meetup giveaway', ''))
+
+def test_train_learns_from_cached_ratings():
+    samples = [('Regional partner event with snacks and networking', '2')] * MIN_TRAINING_SAMPLES + \
+        [('Database pricing changes affect enterprise cloud spend', '9')] * MIN_TRAINING_SAMPLES
+    scorer = RelevanceScorer(threshold=4, keyword_weights={})
+    assert scorer.train(samples) == 2 * MIN_TRAINING_SAMPLES
+    assert scorer.score('Partner event networking evening', '') < 4
+    assert scorer.score('Cloud database pricing update', '') > 7
+
+def test_train_needs_enough_samples():
+    scorer = RelevanceScorer(threshold=4, keyword_weights={})
+    assert scorer.train([('Some text', '9')] * 3) == 3
+    assert scorer.token_weights == {}
+    assert scorer.score('Some text', '') == NEUTRAL_SCORE
+
+def test_evaluate_stage_skips_low_prior_entries_without_llm_call(queue_entries):
+    now = datetime.utcnow()
+    entries = [
+        FeedEntry('Join us at our community meetup', 'https://example.com/meetup',
+                  '<p>Register now for the <b>webinar</b></p>', now),
+        FeedEntry('Critical vulnerability in OpenSSL', 'https://example.com/openssl', 'Patch now', now),
+    ]
+    eval_pool = MagicMock()
+    gpt_cache = MagicMock()
+    gpt_cache.get.return_value = None
+    scorer = RelevanceScorer(threshold=4)
+
+    queued = queue_entries(entries, eval_pool, gpt_cache, prefilter=scorer)
+
+    assert len(queued) == 2
+    eval_pool.submit.assert_called_once_with(entries[1].title, entries[1].summary, entries[1].link,
+                                             on_partial=None)
+    skipped = queued[0][2].result()
+    assert skipped['rationale'].startswith('Skipped: low prior')
+    assert skipped['summary'] == 'Register now for the webinar'
+    assert (scorer.scored, scorer.skipped) == (2, 1)
+
+def test_trains_on_the_article_text_it_scores(tmp_path, monkeypatch):
+    monkeypatch.setenv('PREFILTER_THRESHOLD', '4')
+    cache = ResponseCache(tmp_path / 'gpt_cache.sqlite3')
+    for i in range(MIN_TRAINING_SAMPLES):
+        # The model's summaries share no words with the articles
+        cache.put(f'low{i}', {'summary': 'Promotional', 'rating': '2'}, article_text('Partner networking evening', ''))
+        cache.put(f'high{i}', {'summary': 'Important', 'rating': '9'}, article_text('Database pricing change', ''))
+    scorer = create_prefilter(cache)
+    cache.close()
+    assert scorer.should_skip('Partner networking evening', '')[0]
+    assert not scorer.should_skip('Database pricing change', '')[0]
+
+def test_skipped_entries_are_not_remembered(queue_entries):
+    now = datetime.utcnow()
+    entry = FeedEntry('Join us at our community meetup', 'https://example.com/meetup', 'Register now', now)
+    gpt_cache = MagicMock()
+    gpt_cache.get.return_value = None
+    queued = queue_entries([entry], MagicMock(), gpt_cache, prefilter=RelevanceScorer(threshold=4))
+    assert is_skipped(queued[0][2].result())
+
+    seen_index = SeenIndex()
+    remember_results(seen_index, 'https://example.com/feed', queued)
+    assert not seen_index.is_seen(entry)
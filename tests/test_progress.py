@@ -0,0 +1,98 @@
+import threading
+from collections import Counter
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from cto_signal_scanner.main import FeedDownload, fetch_and_process_feeds
+from cto_signal_scanner.utils.feed_parser import FeedEntry
+from cto_signal_scanner.utils.progress import ProgressBus
+
+def _listen_in_background(bus, **kwargs):
+    received = []
+    listener = bus.listen(**kwargs)
+    thread = threading.Thread(target=lambda: received.extend(listener), daemon=True)
+    thread.start()
+    return received, thread
+
+def test_listener_follows_the_next_scan_and_stops_when_it_finishes():
+    bus = ProgressBus()
+    listener = bus.listen(heartbeat=5)
+    scan_id = bus.start()
+    bus.publish(scan_id, 'feeds_fetched')
+    bus.publish(scan_id, 'articles_found', 3)
+    bus.publish(scan_id, 'article', data={'title': 'post'})
+    events, progress = next(listener)
+    assert [event for event, _ in events] == ['started', 'feeds_fetched', 'articles_found', 'article']
+    assert progress['feeds_fetched'] == 1 and progress['articles_found'] == 3
+
+    bus.finish(scan_id, cancelled=False)
+    events, progress = next(listener)
+    assert [event for event, _ in events] == ['finished'] and progress is None
+    assert events[0][1]['articles_found'] == 3 and events[0][1]['cancelled'] is False
+    assert list(listener) == []
+
+def test_late_listener_gets_the_running_scan_replayed():
+    bus = ProgressBus()
+    scan_id = bus.start()
+    bus.publish(scan_id, 'article', data={'title': 'early'})
+    bus.finish(bus.start())
+    events, progress = next(bus.listen(heartbeat=5))
+    assert ('article', {'title': 'early'}) in events
+    assert all(event != 'finished' for event, _ in events)
+
+def test_heartbeat_and_idle_timeout_without_scans():
+    bus = ProgressBus()
+    assert list(bus.listen(heartbeat=0.05, idle_timeout=0.2)).count(([], None)) >= 2
+
+def test_many_listeners_receive_every_event_once():
+    bus = ProgressBus()
+    listeners = [_listen_in_background(bus, heartbeat=5) for _ in range(20)]
+    scan_id = bus.start()
+    for index in range(50):
+        bus.publish(scan_id, 'article', data=index)
+    bus.finish(scan_id)
+    for received, thread in listeners:
+        thread.join(5)
+        articles = [data for events, _ in received for event, data in events if event == 'article']
+        assert articles == list(range(50))
+
+def test_publishing_after_finish_is_ignored():
+    bus = ProgressBus()
+    scan_id = bus.start()
+    bus.finish(scan_id)
+    bus.publish(scan_id, 'articles_found')
+    assert bus.progress(scan_id) is None and not bus.scanning
+
+def test_scan_reports_feed_and_article_progress(tmp_path):
+    agent = MagicMock()
+    agent.get_current_prompt.return_value = 'prompt'
+    agent.model = 'test-model'
+    agent.system_message = 'system'
+    agent.parallel = 0
+    agent.evaluate_post.side_effect = lambda title, summary, link: {'summary': title, 'rating': '5', 'rationale': ''}
+    entries = [FeedEntry(title, f'https://example.com/{title}', title, datetime.utcnow()) for title in ('a', 'b')]
+    feeds = ['https://a.example.com/feed', 'https://b.example.com/feed']
+    counts = Counter()
+    lock = threading.Lock()
+
+    def on_progress(event, count=1):
+        with lock:
+            counts[event] += count
+
+    def scan():
+        with patch('cto_signal_scanner.main.FEEDS', feeds), \
+             patch('cto_signal_scanner.main.download_feed',
+                   side_effect=lambda url, *args: FeedDownload(url, entries=entries) if 'a.' in url else None), \
+             patch('cto_signal_scanner.main.GPTAgent', return_value=agent), \
+             patch('cto_signal_scanner.main.ReportGenerator'), \
+             patch('cto_signal_scanner.main.GPT_CACHE_FILE', tmp_path / 'gpt_cache.sqlite3'), \
+             patch('cto_signal_scanner.main.CACHE_FILE', tmp_path / 'processed_entries.json'), \
+             patch('cto_signal_scanner.main.ARTICLE_STORE_FILE', tmp_path / 'articles.sqlite3'), \
+             patch('cto_signal_scanner.main.FeedCache'):
+            return fetch_and_process_feeds(days_back=1, max_age=0, on_progress=on_progress)[0]
+
+    assert len(scan()) == 2
+    assert counts == {'feeds_total': 2, 'feeds_fetched': 1, 'feeds_failed': 1, 'articles_found': 2,
+                      'articles_evaluated': 2}
+    counts.clear()
+    scan()
+    assert counts['cache_hits'] == 2 and counts['articles_evaluated'] == 2
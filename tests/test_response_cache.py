@@ -0,0 +1,119 @@
+import json
+import time
+import sqlite3
+import pytest
+from cto_signal_scanner.utils.response_cache import ResponseCache
+
+RESULT = {'summary': 'Summary', 'rating': '7', 'rationale': 'Relevant'}
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(tmp_path / 'gpt_cache.sqlite3', max_entries=3, max_age_days=30)
+    yield cache
+    cache.close()
+
+def test_key_ignores_whitespace_differences():
+    assert ResponseCache.cache_key('Title', '<p>Body\n text</p>', 'https://x') == \
+        ResponseCache.cache_key('Title', '<p>Body  text</p>', 'https://x')
+    assert ResponseCache.cache_key('Title', 'Body', 'https://x') != \
+        ResponseCache.cache_key('Title', 'Body', 'https://y')
+
+def test_put_and_get_persist(cache, tmp_path):
+    key = ResponseCache.cache_key('t', 's', 'l')
+    cache.put(key, RESULT)
+    reopened = ResponseCache(tmp_path / 'gpt_cache.sqlite3')
+    assert reopened.get(key) == RESULT
+    assert reopened.get('missing') is None
+    reopened.close()
+
+def test_evicts_least_recently_used(cache):
+    for i in range(4):
+        cache.put(f'k{i}', RESULT)
+        time.sleep(0.01)
+    cache.get('k0')  # touch the oldest entry
+    cache.evict()
+    assert len(cache) == 3
+    assert cache.get('k0') is not None
+    assert cache.get('k1') is None
+
+def test_evicts_expired_entries(cache):
+    cache.put('old', RESULT)
+    cache.conn.execute('UPDATE responses SET created_at = ?', (time.time() - 31 * 86400,))
+    cache.conn.commit()
+    assert cache.compact() == 1
+    assert len(cache) == 0
+
+def test_namespaces_keep_responses_per_prompt(cache):
+    cache.use_namespace('prompt one', 'model', 'system')
+    cache.put('k', RESULT)
+    cache.use_namespace('prompt two', 'model', 'system')
+    assert cache.get('k') is None
+    cache.put('k', {'summary': 'other', 'rating': '3', 'rationale': ''})
+    cache.use_namespace('prompt one', 'model', 'system')
+    assert cache.get('k') == RESULT
+
+def test_model_and_system_message_change_namespace(cache):
+    first = cache.use_namespace('prompt', 'model-a', 'system')
+    assert cache.use_namespace('prompt', 'model-b', 'system') != first
+    assert cache.use_namespace('prompt', 'model-a', 'other system') != first
+    assert cache.use_namespace('prompt', 'model-a', 'system') == first
+
+def test_least_recently_used_namespaces_are_dropped(tmp_path):
+    cache = ResponseCache(tmp_path / 'ns.sqlite3', max_namespaces=2)
+    for prompt in ('a', 'b', 'c'):
+        cache.use_namespace(prompt, 'model', 'system')
+        cache.put('k', RESULT)
+        time.sleep(0.01)
+    cache.evict()
+    assert [ns['entries'] for ns in cache.namespaces()] == [1, 1]
+    cache.use_namespace('a', 'model', 'system')
+    assert cache.get('k') is None
+    cache.close()
+
+def test_imports_legacy_json(cache, tmp_path):
+    legacy = tmp_path / 'gpt_cache.json'
+    legacy.write_text(json.dumps({'prompt': 'p', 'responses': {'Title:Body:https://x': RESULT}}))
+    assert cache.import_json(legacy) == 1
+    cache.use_namespace('p', 'model', 'system')
+    assert cache.get(ResponseCache.cache_key('Title', 'Body', 'https://x')) == RESULT
+
+def test_migrates_unnamespaced_database(tmp_path):
+    db_path = tmp_path / 'v1.sqlite3'
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(
+        "CREATE TABLE responses (key TEXT PRIMARY KEY, result TEXT NOT NULL,"
+        " created_at REAL NOT NULL, last_accessed REAL NOT NULL);"
+        "CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT);"
+        "INSERT INTO meta VALUES ('prompt', 'p');"
+    )
+    conn.execute("INSERT INTO responses VALUES ('k', ?, ?, ?)", (json.dumps(RESULT), time.time(), time.time()))
+    conn.commit()
+    conn.close()
+
+    cache = ResponseCache(db_path)
+    cache.use_namespace('p', 'model', 'system')
+    assert cache.get('k') == RESULT
+    cache.close()
+
+def test_training_samples_pair_article_text_with_rating(cache, tmp_path):
+    cache.put('with-article', RESULT, 'Title Prepared body')
+    cache.put('without-article', RESULT)
+    assert cache.training_samples() == [('Title Prepared body', '7')]
+
+def test_adds_article_column_to_version_2_database(tmp_path):
+    db_path = tmp_path / 'v2.sqlite3'
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(
+        "CREATE TABLE responses (namespace TEXT NOT NULL, key TEXT NOT NULL, result TEXT NOT NULL,"
+        " created_at REAL NOT NULL, last_accessed REAL NOT NULL, PRIMARY KEY (namespace, key));"
+        "PRAGMA user_version=2;"
+    )
+    conn.execute("INSERT INTO responses VALUES ('', 'k', ?, ?, ?)", (json.dumps(RESULT), time.time(), time.time()))
+    conn.commit()
+    conn.close()
+
+    cache = ResponseCache(db_path)
+    assert cache.get('k') == RESULT
+    cache.put('k2', RESULT, 'text')
+    assert cache.training_samples() == [('text', '7')]
+    cache.close()
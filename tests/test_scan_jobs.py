@@ -0,0 +1,222 @@
+import time
+import threading
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from cto_signal_scanner.main import FeedDownload, fetch_and_process_feeds
+from cto_signal_scanner.utils.article_store import ArticleStore
+from cto_signal_scanner.utils.feed_parser import FeedEntry
+from cto_signal_scanner.utils.scan_jobs import (
+    CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore, JobWorkerPool
+)
+
+PARAMS = {'days_back': 7, 'incremental': None, 'force': False}
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(tmp_path / 'scan_jobs.sqlite3', stale_after=60)
+    yield store
+    store.close()
+
+def _wait_for(store, job_id, statuses, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(job_id)
+        if job['status'] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job stayed {store.get(job_id)['status']}")
+
+def test_identical_pending_jobs_are_merged(store):
+    first, merged_first = store.submit(PARAMS)
+    second, merged_second = store.submit(dict(reversed(list(PARAMS.items()))))
+    other, _ = store.submit(dict(PARAMS, days_back=1))
+    assert first == second and (merged_first, merged_second) == (False, True)
+    assert other != first
+
+    store.claim('worker')
+    assert store.submit(PARAMS) == (first, True)
+    store.finish(first, 'worker', SUCCEEDED)
+    assert store.submit(PARAMS)[1] is False
+
+def test_jobs_are_claimed_oldest_first_and_once(store):
+    first, _ = store.submit(PARAMS)
+    second, _ = store.submit(dict(PARAMS, days_back=1))
+    other_process = JobStore(store.db_path)
+    assert store.claim('a')['id'] == first
+    assert other_process.claim('b')['id'] == second
+    assert store.claim('a') is None
+    assert store.get(first)['status'] == RUNNING and store.get(first)['worker'] == 'a'
+    other_process.close()
+
+def test_job_of_a_silent_worker_is_requeued(tmp_path):
+    store = JobStore(tmp_path / 'scan_jobs.sqlite3', stale_after=0.05)
+    job_id, _ = store.submit(PARAMS)
+    store.claim('crashed')
+    assert store.add_result(job_id, 'crashed', {'title': 'partial'})
+    time.sleep(0.1)
+    assert store.claim('healthy')['id'] == job_id
+    assert store.get(job_id)['worker'] == 'healthy'
+    assert store.results(job_id) == []
+    # The first worker has lost the job and cannot write into it any more
+    assert store.heartbeat(job_id, 'crashed') == (False, False)
+    assert not store.add_result(job_id, 'crashed', {'title': 'late'})
+    assert not store.replace_results(job_id, 'crashed', [{'title': 'late'}])
+    assert not store.finish(job_id, 'crashed', SUCCEEDED)
+    assert store.heartbeat(job_id, 'healthy') == (True, False)
+    assert store.get(job_id)['status'] == RUNNING and store.results(job_id) == []
+    store.close()
+
+def test_cancel_queued_job_is_immediate(store):
+    job_id, _ = store.submit(PARAMS)
+    assert store.cancel(job_id) == CANCELLED
+    assert store.claim('worker') is None
+    assert store.cancel('missing') is None
+
+def test_worker_records_partial_then_final_results(store):
+    results = [{'title': 'b'}, {'title': 'a'}]
+    seen_partial = threading.Event()
+    release = threading.Event()
+
+    def run_job(params, on_result, cancel):
+        assert params == PARAMS
+        on_result({'title': 'a', 'rating': ''}, False)
+        on_result(results[1], True)
+        seen_partial.set()
+        release.wait(5)
+        on_result(results[0], True)
+        return results, '/reports/report.pdf'
+
+    workers = JobWorkerPool(store, run_job, workers=1, poll_interval=0.05)
+    workers.start()
+    job_id, _ = store.submit(PARAMS)
+    workers.notify()
+    assert seen_partial.wait(5)
+    assert [result for _, result in store.results(job_id)] == [{'title': 'a'}]
+    assert store.results(job_id, after=1) == []
+
+    release.set()
+    job = _wait_for(store, job_id, (SUCCEEDED,))
+    assert job['pdf_path'] == '/reports/report.pdf' and job['result_count'] == 2
+    assert [result['title'] for _, result in store.results(job_id)] == ['b', 'a']
+    workers.stop(timeout=5)
+
+def test_running_job_is_cancelled_through_its_event(store):
+    def run_job(params, on_result, cancel):
+        assert cancel.wait(5)
+        return [], None
+
+    workers = JobWorkerPool(store, run_job, workers=1, poll_interval=0.05)
+    workers.start()
+    job_id, _ = store.submit(PARAMS)
+    _wait_for(store, job_id, (RUNNING,))
+    assert workers.cancel(job_id) == RUNNING
+    assert store.get(job_id)['cancel_requested']
+    _wait_for(store, job_id, (CANCELLED,))
+    workers.stop(timeout=5)
+
+def test_cancel_reaches_a_worker_in_another_process_via_heartbeat(store):
+    def run_job(params, on_result, cancel):
+        assert cancel.wait(5)
+        return [], None
+
+    workers = JobWorkerPool(store, run_job, workers=1, poll_interval=0.05, heartbeat_interval=0.05)
+    workers.start()
+    job_id, _ = store.submit(PARAMS)
+    _wait_for(store, job_id, (RUNNING,))
+    store.cancel(job_id)
+    _wait_for(store, job_id, (CANCELLED,))
+    workers.stop(timeout=5)
+
+def test_failing_job_records_error(store):
+    def run_job(params, on_result, cancel):
+        raise RuntimeError('feeds unreachable')
+
+    workers = JobWorkerPool(store, run_job, workers=1, poll_interval=0.05)
+    workers.start()
+    job_id, _ = store.submit(PARAMS)
+    job = _wait_for(store, job_id, (FAILED,))
+    assert job['error'] == 'feeds unreachable'
+    workers.stop(timeout=5)
+
+def test_prune_keeps_pending_jobs(tmp_path):
+    store = JobStore(tmp_path / 'scan_jobs.sqlite3', history_days=0)
+    done, _ = store.submit(PARAMS)
+    store.claim('worker')
+    store.finish(done, 'worker', SUCCEEDED)
+    pending, _ = store.submit(PARAMS)
+    time.sleep(0.01)
+    assert store.prune() == 1
+    assert store.get(done) is None and store.get(pending)['status'] == QUEUED
+    store.close()
+
+def test_worker_stops_a_job_taken_over_by_another_worker(tmp_path):
+    store = JobStore(tmp_path / 'scan_jobs.sqlite3', stale_after=0.2)
+    other_process = JobStore(store.db_path, stale_after=0.2)
+    stopped = threading.Event()
+
+    def run_job(params, on_result, cancel):
+        assert cancel.wait(5)
+        stopped.set()
+        on_result({'title': 'late'}, True)
+        return [{'title': 'late'}], '/reports/late.pdf'
+
+    # Heartbeats slower than stale_after, as from a stalled worker
+    workers = JobWorkerPool(store, run_job, workers=1, poll_interval=0.05, heartbeat_interval=0.5)
+    workers.start()
+    job_id, _ = store.submit(PARAMS)
+    _wait_for(store, job_id, (RUNNING,))
+    time.sleep(0.3)
+    assert other_process.claim('other')['id'] == job_id
+    assert stopped.wait(5)
+    workers.stop(timeout=5)
+
+    job = store.get(job_id)
+    assert job['status'] == RUNNING and job['worker'] == 'other'
+    assert store.results(job_id) == []
+    assert other_process.finish(job_id, 'other', SUCCEEDED)
+    other_process.close()
+    store.close()
+
+def test_worker_prunes_old_jobs_after_running_one(tmp_path):
+    store = JobStore(tmp_path / 'scan_jobs.sqlite3', history_days=0)
+    old, _ = store.submit(dict(PARAMS, days_back=1))
+    store.claim('worker')
+    assert store.add_result(old, 'worker', {'title': 'old'})
+    store.finish(old, 'worker', SUCCEEDED)
+    time.sleep(0.01)
+
+    workers = JobWorkerPool(store, lambda params, on_result, cancel: ([], None), workers=1, poll_interval=0.05)
+    workers.start()
+    store.submit(PARAMS)
+    deadline = time.monotonic() + 5
+    while store.get(old) is not None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    workers.stop(timeout=5)
+    assert store.get(old) is None and store.results(old) == []
+    store.close()
+
+def test_cancelled_scan_is_not_recorded_as_fresh(tmp_path):
+    agent = MagicMock()
+    agent.get_current_prompt.return_value = 'prompt'
+    agent.model = 'test-model'
+    agent.system_message = 'system'
+    agent.parallel = 0
+    cancel = threading.Event()
+    cancel.set()
+    entry = FeedEntry('post', 'https://example.com/post', 'post', datetime.utcnow())
+    with patch('cto_signal_scanner.main.FEEDS', ['https://a.example.com/feed']), \
+         patch('cto_signal_scanner.main.download_feed',
+               side_effect=lambda url, *args: FeedDownload(url, entries=[entry])) as download, \
+         patch('cto_signal_scanner.main.GPTAgent', return_value=agent), \
+         patch('cto_signal_scanner.main.ReportGenerator'), \
+         patch('cto_signal_scanner.main.GPT_CACHE_FILE', tmp_path / 'gpt_cache.sqlite3'), \
+         patch('cto_signal_scanner.main.CACHE_FILE', tmp_path / 'processed_entries.json'), \
+         patch('cto_signal_scanner.main.ARTICLE_STORE_FILE', tmp_path / 'articles.sqlite3'), \
+         patch('cto_signal_scanner.main.FeedCache'):
+        results, _ = fetch_and_process_feeds(days_back=1, cancel=cancel)
+    assert results == [] and download.call_count == 0
+    agent.evaluate_post.assert_not_called()
+    store = ArticleStore(tmp_path / 'articles.sqlite3')
+    assert store.conn.execute('SELECT COUNT(*) FROM scans').fetchone()[0] == 0
+    store.close()
@@ -0,0 +1,85 @@
+import threading
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from cto_signal_scanner.main import precompute_reports
+from cto_signal_scanner.scheduler import ScanScheduler
+from cto_signal_scanner.utils.article_store import ArticleStore
+
+FEEDS = ['https://a.example.com/feed', 'https://b.example.com/feed']
+
+def _result(title, hours_old):
+    return {'title': title, 'link': f'https://example.com/{title}', 'summary': title, 'rating': '5',
+            'rationale': '', 'date': (datetime.utcnow() - timedelta(hours=hours_old)).isoformat()}
+
+@pytest.fixture
+def store(tmp_path):
+    store = ArticleStore(tmp_path / 'articles.sqlite3')
+    yield store
+    store.close()
+
+def test_latest_report_is_fresh_and_per_namespace(store):
+    store.save_report('ns', FEEDS, 7, [{'title': 'old'}])
+    store.save_report('ns', FEEDS, 7, [{'title': 'new'}], 'report.pdf')
+    report = store.latest_report('ns', FEEDS, 7, max_age_minutes=60)
+    assert report['results'] == [{'title': 'new'}] and report['pdf_path'] == 'report.pdf'
+    assert store.latest_report('other', FEEDS, 7, max_age_minutes=60) is None
+    assert store.latest_report('ns', FEEDS[:1], 7, max_age_minutes=60) is None
+    assert store.latest_report('ns', FEEDS, 1, max_age_minutes=60) is None
+    assert store.latest_report('ns', FEEDS, 7, max_age_minutes=-1) is None
+
+def _report_generator(output_path):
+    generator = MagicMock()
+    generator.generate.side_effect = lambda: output_path.write_text(str(len(generator.add_article.mock_calls)))
+    return generator
+
+def test_precompute_reports_per_window(store, tmp_path):
+    store.add_results('ns', FEEDS[0], [_result('today', 2), _result('this-week', 24 * 5)])
+    store.add_results('ns', FEEDS[1], [_result('last-month', 24 * 20)])
+    reports_dir = tmp_path / 'precomputed_reports'
+    with patch('cto_signal_scanner.main.ARTICLE_STORE_FILE', tmp_path / 'articles.sqlite3'), \
+         patch('cto_signal_scanner.main.FEEDS', FEEDS), \
+         patch('cto_signal_scanner.main.PRECOMPUTED_REPORTS_DIR', reports_dir), \
+         patch('cto_signal_scanner.main.ReportGenerator', side_effect=_report_generator):
+        counts = precompute_reports('ns', [1, 7, 30])
+        store.add_results('ns', FEEDS[0], [_result('later-today', 1)])
+        precompute_reports('ns', [1, 7, 30])
+
+    assert counts == {1: 1, 7: 2, 30: 3}
+    # Each window's report is replaced in place rather than added to the user reports
+    assert sorted(path.name for path in reports_dir.iterdir()) == \
+        ['tech_report_1d.pdf', 'tech_report_30d.pdf', 'tech_report_7d.pdf']
+    assert (reports_dir / 'tech_report_7d.pdf').read_text() == '3'
+    report = store.latest_report('ns', FEEDS, 7, max_age_minutes=60)
+    assert [result['title'] for result in report['results']] == ['later-today', 'today', 'this-week']
+    assert report['pdf_path'] == str(reports_dir / 'tech_report_7d.pdf')
+
+def test_run_once_scans_the_widest_window_then_precomputes():
+    def scan(days_back, on_namespace, **kwargs):
+        on_namespace('ns')
+        return [], 'report.pdf'
+
+    with patch('cto_signal_scanner.scheduler.fetch_and_process_feeds', side_effect=scan) as fetch, \
+         patch('cto_signal_scanner.scheduler.precompute_reports', return_value={1: 0, 7: 2}) as precompute:
+        assert ScanScheduler(interval_minutes=60, windows=[7, 1]).run_once() == {1: 0, 7: 2}
+    fetch.assert_called_once()
+    assert fetch.call_args.args == (7,)
+    assert {key: fetch.call_args.kwargs[key] for key in ('incremental', 'max_age')} == {'incremental': True, 'max_age': 0}
+    precompute.assert_called_once_with('ns', [1, 7])
+
+def test_run_forever_survives_a_failed_run_until_stopped():
+    stop = threading.Event()
+    runs = []
+
+    def run_once():
+        runs.append(1)
+        if len(runs) == 1:
+            raise RuntimeError('feeds unreachable')
+        stop.set()
+
+    scheduler = ScanScheduler(interval_minutes=0.0001, windows=[1])
+    with patch.object(scheduler, 'run_once', side_effect=run_once):
+        worker = threading.Thread(target=scheduler.run_forever, kwargs={'stop': stop}, daemon=True)
+        worker.start()
+        worker.join(5)
+    assert not worker.is_alive() and len(runs) == 2
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from cto_signal_scanner.main import FeedDownload, fetch_and_process_feeds, load_cache, store_seen_index
+from cto_signal_scanner.utils.feed_parser import FeedEntry
+from cto_signal_scanner.utils.seen_index import SeenIndex, entry_id
+
+FEED = 'https://a.example.com/feed'
+
+def _entry(title, hours_old=0, guid=''):
+    return FeedEntry(title, f'https://example.com/{title}?utm_source=rss', f'{title} summary',
+                     datetime.utcnow() - timedelta(hours=hours_old), guid)
+
+def _result(entry):
+    return {'title': entry.title, 'link': entry.link, 'summary': '', 'rating': '5', 'rationale': '',
+            'date': entry.published.isoformat()}
+
+def test_entry_id_prefers_guid_then_canonical_link():
+    assert entry_id(_entry('post', guid='urn:1')) == 'urn:1'
+    assert entry_id(_entry('post')) == entry_id(_entry('post')._replace(link='https://example.com/post'))
+
+def test_seen_entries_are_scoped_to_the_namespace():
+    index = SeenIndex(namespace='ns1')
+    entry = _entry('post')
+    index.add(entry, FEED, _result(entry))
+    assert index.is_seen(entry)
+    assert not SeenIndex(index.to_dict(), namespace='ns2').is_seen(entry)
+
+def test_results_cover_the_window_newest_first():
+    index = SeenIndex()
+    for entry in (_entry('old', hours_old=72), _entry('older', hours_old=30), _entry('new', hours_old=1)):
+        index.add(entry, FEED, _result(entry))
+    titles = [r['title'] for r in index.results(FEED, datetime.utcnow() - timedelta(days=2))]
+    assert titles == ['new', 'older']
+    assert index.results('https://other.example.com/feed', datetime.utcnow() - timedelta(days=2)) == []
+
+def test_prune_drops_entries_past_the_longest_window():
+    index = SeenIndex()
+    for entry in (_entry('stale', hours_old=31 * 24), _entry('fresh')):
+        index.add(entry, FEED, _result(entry))
+    assert index.prune() == 1
+    assert len(index) == 1
+
+def test_merge_keeps_own_entries_and_adds_missing_ones():
+    first, second = _entry('first'), _entry('second')
+    index = SeenIndex(namespace='ns')
+    index.add(first, FEED, dict(_result(first), rating='9'))
+    other = SeenIndex(namespace='ns')
+    other.add(first, FEED, _result(first))
+    other.add(second, FEED, _result(second))
+    assert index.merge(other.to_dict()) == 1
+    assert index.is_seen(second)
+    assert index.results(FEED, datetime.utcnow() - timedelta(days=1))[-1]['rating'] == '9'
+
+def test_concurrent_scans_keep_each_others_entries(tmp_path):
+    first, second = _entry('first'), _entry('second')
+    with patch('cto_signal_scanner.main.CACHE_FILE', tmp_path / 'processed_entries.json'):
+        # Both scans loaded the index before either saved
+        scans = [SeenIndex(load_cache(), 'ns'), SeenIndex(load_cache(), 'ns')]
+        scans[0].add(first, FEED, _result(first))
+        scans[1].add(second, FEED, _result(second))
+        for scan in scans:
+            store_seen_index(scan)
+        stored = SeenIndex(load_cache(), 'ns')
+    assert stored.is_seen(first) and stored.is_seen(second)
+    assert [path.name for path in tmp_path.iterdir()] == ['processed_entries.json']
+
+def test_unreadable_index_is_ignored(tmp_path):
+    cache_file = tmp_path / 'processed_entries.json'
+    cache_file.write_text('{"truncated": ')
+    with patch('cto_signal_scanner.main.CACHE_FILE', cache_file):
+        assert load_cache() == {}
+
+def test_incremental_scan_evaluates_only_new_entries(tmp_path):
+    agent = MagicMock()
+    agent.get_current_prompt.return_value = 'prompt'
+    agent.model = 'test-model'
+    agent.system_message = 'system'
+    agent.parallel = 0
+    agent.evaluate_post.side_effect = lambda title, summary, link: {
+        'summary': title, 'rating': '5', 'rationale': 'ok'
+    }
+    entries = [_entry('first', hours_old=2)]
+
+    def scan():
+        with patch('cto_signal_scanner.main.FEEDS', [FEED]), \
+             patch('cto_signal_scanner.main.download_feed',
+                   side_effect=lambda url, *args: FeedDownload(url, entries=list(entries))), \
+             patch('cto_signal_scanner.main.GPTAgent', return_value=agent), \
+             patch('cto_signal_scanner.main.ReportGenerator'), \
+             patch('cto_signal_scanner.main.GPT_CACHE_FILE', tmp_path / 'gpt_cache.sqlite3'), \
+             patch('cto_signal_scanner.main.CACHE_FILE', tmp_path / 'processed_entries.json'), \
+             patch('cto_signal_scanner.main.ARTICLE_STORE_FILE', tmp_path / 'articles.sqlite3'), \
+             patch('cto_signal_scanner.main.FeedCache'), \
+             patch('cto_signal_scanner.main.ResponseCache.get', return_value=None):
+            return fetch_and_process_feeds(days_back=1, incremental=True, max_age=0)[0]
+
+    assert [r['title'] for r in scan()] == ['first']
+    entries.insert(0, _entry('second', hours_old=1))
+    assert [r['title'] for r in scan()] == ['second', 'first']
+    assert [call.args[0] for call in agent.evaluate_post.call_args_list] == ['first', 'second']
@@ -0,0 +1,151 @@
+import time
+import threading
+import pytest
+from concurrent.futures import Future
+from datetime import datetime
+from unittest.mock import MagicMock
+from cto_signal_scanner.utils.evaluation_pool import AdaptiveConcurrencyLimiter, EvaluationPool, RateLimiter
+from cto_signal_scanner.utils.feed_parser import FeedEntry
+from cto_signal_scanner.utils.response_cache import ResponseCache
+from cto_signal_scanner.utils.single_flight import SingleFlight
+
+RESULT = {'summary': 's', 'rating': '6', 'rationale': 'r'}
+
+@pytest.fixture
+def caches(tmp_path):
+    first = ResponseCache(tmp_path / 'gpt.sqlite3', shared_lock=True, claim_ttl=30)
+    second = ResponseCache(tmp_path / 'gpt.sqlite3', shared_lock=True, claim_ttl=30)
+    yield first, second
+    first.close()
+    second.close()
+
+def test_concurrent_callers_share_one_outcome():
+    group = SingleFlight()
+    started = []
+
+    def start():
+        started.append(Future())
+        return started[-1]
+
+    first, shared_first = group.do('key', start)
+    second, shared_second = group.do('key', start)
+    assert (shared_first, shared_second) == (False, True)
+    assert len(started) == 1
+
+    # Each caller owns its Future; cancelling one leaves the shared work alone
+    second.cancel()
+    started[0].set_result(RESULT)
+    assert first.result() == RESULT and second.cancelled()
+    assert len(group) == 0
+    third, shared_third = group.do('key', start)
+    assert not shared_third and len(started) == 2
+
+def test_joiners_restart_work_the_starter_cancelled():
+    group = SingleFlight()
+    started = []
+
+    def start():
+        started.append(Future())
+        return started[-1]
+
+    first, _ = group.do('key', start)
+    second, shared = group.do('key', start)
+    assert shared
+    started[0].cancel()
+    assert first.cancelled() and not second.done()
+    assert len(started) == 2
+    started[1].set_result(RESULT)
+    assert second.result() == RESULT
+
+def test_claims_exclude_other_owners_until_released(caches):
+    first, second = caches
+    assert first.claim('k')
+    assert first.claim('k')
+    assert not second.claim('k')
+    first.release('k')
+    assert second.claim('k')
+
+def test_expired_claim_can_be_taken_over(tmp_path):
+    first = ResponseCache(tmp_path / 'gpt.sqlite3', claim_ttl=0.01)
+    second = ResponseCache(tmp_path / 'gpt.sqlite3')
+    assert first.claim('k')
+    time.sleep(0.02)
+    assert second.claim('k')
+    first.close()
+    second.close()
+
+def test_wait_for_returns_result_published_by_claim_holder(caches):
+    first, second = caches
+    first.claim('k')
+
+    def finish():
+        time.sleep(0.1)
+        first.put('k', RESULT)
+        first.release('k')
+    threading.Thread(target=finish).start()
+    assert second.wait_for('k', poll_interval=0.02) == RESULT
+
+def _slow_pool(calls):
+    def evaluate(title, summary, link):
+        calls.append(title)
+        time.sleep(0.2)
+        return dict(RESULT)
+    agent = MagicMock()
+    agent.estimate_tokens.return_value = 10
+    agent.evaluate_post.side_effect = evaluate
+    return EvaluationPool(agent, max_workers=2, rate_limiter=RateLimiter(0, 0),
+                          concurrency_limiter=AdaptiveConcurrencyLimiter(initial_limit=2, adaptive=False))
+
+def test_overlapping_scans_evaluate_an_article_once(tmp_path, queue_entries):
+    now = datetime.utcnow()
+    entry = FeedEntry('Shared article', 'https://example.com/shared-single-flight', 'Summary', now)
+    calls = []
+    cache = ResponseCache(tmp_path / 'gpt.sqlite3')
+    first_pool, second_pool = _slow_pool(calls), _slow_pool(calls)
+
+    first = queue_entries([entry], first_pool, cache)
+    second = queue_entries([entry], second_pool, cache)
+
+    assert first[0][2].result() == second[0][2].result() == RESULT
+    assert calls == ['Shared article']
+    first_pool.shutdown()
+    second_pool.shutdown()
+    cache.close()
+
+def test_scans_with_different_prompts_do_not_share_evaluations(tmp_path, queue_entries):
+    now = datetime.utcnow()
+    entry = FeedEntry('Prompt-specific article', 'https://example.com/prompt-single-flight', 'Summary', now)
+    calls = []
+    first_cache = ResponseCache(tmp_path / 'gpt.sqlite3')
+    second_cache = ResponseCache(tmp_path / 'gpt.sqlite3')
+    first_cache.use_namespace('prompt A', 'model', 'system')
+    second_cache.use_namespace('prompt B', 'model', 'system')
+    first_pool, second_pool = _slow_pool(calls), _slow_pool(calls)
+
+    first = queue_entries([entry], first_pool, first_cache)
+    second = queue_entries([entry], second_pool, second_cache)
+
+    assert first[0][2].result() == second[0][2].result() == RESULT
+    assert calls == ['Prompt-specific article'] * 2
+    first_pool.shutdown()
+    second_pool.shutdown()
+    first_cache.close()
+    second_cache.close()
+
+def test_article_claimed_by_another_process_is_waited_for(caches, queue_entries):
+    now = datetime.utcnow()
+    entry = FeedEntry('Claimed article', 'https://example.com/claimed-single-flight', 'Summary', now)
+    other_process, this_process = caches
+    key = ResponseCache.cache_key(entry.title, entry.summary, entry.link)
+    other_process.claim(key)
+    calls = []
+    pool = _slow_pool(calls)
+
+    queued = queue_entries([entry], pool, this_process)
+    time.sleep(0.1)
+    other_process.put(key, RESULT)
+    other_process.release(key)
+
+    assert queued[0][2].result(timeout=5) == RESULT
+    assert calls == []
+    pool.shutdown()
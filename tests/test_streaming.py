@@ -0,0 +1,70 @@
+import os
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+from cto_signal_scanner.utils.evaluation_pool import EvaluationPool, RateLimiter
+from cto_signal_scanner.utils.feed_parser import FeedEntry
+from cto_signal_scanner.utils.gpt_agent import GPTAgent, StreamingResponseParser
+
+RESPONSE = "Summary: New managed Postgres service\nRating: 8\nRationale: Affects database strategy"
+
+@pytest.fixture
+def agent():
+    with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key', 'USE_OLLAMA': 'false', 'LLM_STREAM': 'true'}):
+        return GPTAgent()
+
+def _chunks(text, size=7):
+    return [{'choices': [{'delta': {'content': text[i:i + size]}}]} for i in range(0, len(text), size)] + \
+        [{'choices': [{'delta': {}}]}]
+
+def test_parser_reports_completed_sections():
+    parser = StreamingResponseParser()
+    assert not parser.feed("Summary: New managed")
+    assert not parser.feed(" Postgres service\n")
+    assert parser.feed("Rating: 8\n")
+    assert parser.partial_result() == {'summary': 'New managed Postgres service', 'rating': '', 'rationale': ''}
+    assert parser.feed("Rationale: Affects")
+    assert parser.partial_result()['rating'] == '8'
+    assert not parser.feed(" database strategy")
+    assert parser.result() == GPTAgent.parse_response(RESPONSE)
+
+def test_evaluate_post_streams_partial_results(agent):
+    partials = []
+    with patch('openai.ChatCompletion.create', return_value=iter(_chunks(RESPONSE))) as create:
+        result = agent.evaluate_post('Title', 'Summary', 'https://example.com', on_partial=partials.append)
+    assert create.call_args.kwargs['stream'] is True
+    assert result == {'summary': 'New managed Postgres service', 'rating': '8',
+                      'rationale': 'Affects database strategy'}
+    assert [partial['rating'] for partial in partials] == ['', '8']
+    assert partials[0]['summary'] == 'New managed Postgres service'
+
+def test_evaluate_post_streams_only_with_listener(agent):
+    with patch.object(agent, '_chat', return_value=RESPONSE) as chat:
+        assert agent.evaluate_post('Title', 'Summary', 'https://example.com')['rating'] == '8'
+        agent.stream = False
+        assert agent.evaluate_post('Title', 'Summary', 'https://example.com', on_partial=print)['rating'] == '8'
+    assert chat.call_count == 2
+
+def test_evaluate_stage_publishes_partial_and_final_results(queue_entries):
+    now = datetime.utcnow()
+    entry = FeedEntry('Postgres launch', 'https://example.com/pg', 'Summary', now)
+    agent = MagicMock()
+    agent.estimate_tokens.return_value = 10
+
+    def evaluate(title, summary, link, on_partial=None):
+        on_partial({'summary': 'New managed Postgres service', 'rating': '', 'rationale': ''})
+        return GPTAgent.parse_response(RESPONSE)
+    agent.evaluate_post.side_effect = evaluate
+    gpt_cache = MagicMock()
+    gpt_cache.get.return_value = None
+    published = []
+
+    with EvaluationPool(agent, max_workers=1, rate_limiter=RateLimiter(0, 0), batch_size=1) as pool:
+        queued = queue_entries([entry], pool, gpt_cache,
+                               on_result=lambda result, final: published.append((final, result)))
+        queued[0][2].result()
+
+    assert [final for final, _ in published] == [False, True]
+    assert published[0][1]['title'] == 'Postgres launch'
+    assert published[1][1]['rating'] == '8'
+    assert published[1][1]['date'] == now.isoformat()
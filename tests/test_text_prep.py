@@ -0,0 +1,58 @@
+from datetime import datetime
+from unittest.mock import MagicMock
+from cto_signal_scanner.utils.feed_parser import FeedEntry
+from cto_signal_scanner.utils.response_cache import ResponseCache
+from cto_signal_scanner.utils.text_prep import TextPreparer, estimate_tokens, html_to_text, truncate_to_budget
+
+FILLER = "This paragraph talks about things in general terms without much detail at all."
+
+def test_html_to_text_drops_media_and_boilerplate():
+    html = ('<div style="color:red"><img src="https://t.example.com/pixel.gif" width="1">'
+            '<p>Postgres 17 is out &amp; faster.</p><script>track()</script>'
+            '<p>The post <a href="#">Postgres 17</a> appeared first on Example Blog.</p></div>')
+    assert html_to_text(html) == 'Postgres 17 is out & faster.'
+
+def test_html_to_text_passes_plain_text_through():
+    assert html_to_text('  Plain   summary\ntext ') == 'Plain summary text'
+    assert html_to_text(None) == ''
+
+def test_truncate_keeps_short_text():
+    assert truncate_to_budget('Short text.', 50) == 'Short text.'
+
+def test_truncate_keeps_lead_and_informative_sentences():
+    lead = "Acme launches Widget Cloud for enterprises."
+    detail = "Widget Cloud costs $12 per seat and runs in 14 AWS regions."
+    text = ' '.join([lead] + [FILLER] * 5 + [detail] + [FILLER] * 5)
+    result = truncate_to_budget(text, 40, title='Acme Widget Cloud')
+    assert result.startswith(lead)
+    assert detail in result
+    assert estimate_tokens(result) <= 41
+
+def test_truncate_cuts_overlong_lead_on_word_boundary():
+    result = truncate_to_budget('word ' * 200, 10)
+    assert result.endswith('…')
+    assert len(result) <= 41
+
+def test_preparer_tracks_tokens_saved():
+    prep = TextPreparer(max_tokens=20)
+    prep.prepare('<p>' + ' '.join([FILLER] * 10) + '</p>')
+    assert prep.tokens_out <= 21
+    assert prep.tokens_saved == prep.tokens_in - prep.tokens_out > 0
+
+def test_stages_use_prepared_summary_and_reuse_raw_key_cache(queue_entries):
+    now = datetime.utcnow()
+    raw = FeedEntry('Cached post', 'https://example.com/cached', '<p>Cached <b>body</b></p>', now)
+    fresh = FeedEntry('Fresh post', 'https://example.com/fresh', '<p>Fresh <img src="x"> body</p>', now)
+    cached_result = {'summary': 'S', 'rating': '7', 'rationale': 'R'}
+    raw_key = ResponseCache.cache_key(raw.title, raw.summary, raw.link)
+    gpt_cache = MagicMock()
+    gpt_cache.get.side_effect = lambda key: cached_result if key == raw_key else None
+    eval_pool = MagicMock()
+
+    queued = queue_entries([raw, fresh], eval_pool, gpt_cache, text_prep=TextPreparer(max_tokens=100))
+
+    assert queued[0][2].result() == cached_result
+    gpt_cache.put.assert_called_once_with(ResponseCache.cache_key(raw.title, 'Cached body', raw.link), cached_result,
+                                          'Cached post Cached body')
+    eval_pool.submit.assert_called_once_with('Fresh post', 'Fresh body', fresh.link, on_partial=None)
+    assert queued[1][0].summary == 'Fresh body'
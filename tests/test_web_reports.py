@@ -0,0 +1,49 @@
+import sys
+import pytest
+import importlib
+from unittest.mock import MagicMock, patch
+from cto_signal_scanner.main import FEEDS
+from cto_signal_scanner.utils.article_store import ArticleStore
+
+@pytest.fixture(scope='module')
+def web(tmp_path_factory):
+    """The web app module, imported without an LLM, log file, feed files, session directory or scan workers."""
+    tmp_path = tmp_path_factory.mktemp('web')
+    agent = MagicMock()
+    agent.get_current_prompt.return_value = 'prompt'
+    agent.model = 'test-model'
+    agent.system_message = 'system'
+    with patch.dict('os.environ', {'SCAN_WORKERS': '0', 'TIERED_ROUTING': 'false'}), \
+         patch('cto_signal_scanner.utils.gpt_agent.GPTAgent', return_value=agent), \
+         patch('cto_signal_scanner.utils.feed_manager.FeedManager'), \
+         patch('flask_session.Session'), \
+         patch('logging.FileHandler'), \
+         patch('logging.basicConfig'), \
+         patch('cto_signal_scanner.main.SCAN_JOBS_FILE', tmp_path / 'scan_jobs.sqlite3'):
+        sys.modules.pop('cto_signal_scanner.web.app', None)
+        web = importlib.import_module('cto_signal_scanner.web.app')
+    web.app.config.update(TESTING=True, RATELIMIT_ENABLED=False)
+    web.limiter.enabled = False
+    yield web
+    web.job_store.close()
+
+def test_precomputed_report_can_be_downloaded(web, tmp_path, monkeypatch):
+    reports_dir = tmp_path / 'precomputed_reports'
+    reports_dir.mkdir()
+    (reports_dir / 'tech_report_7d.pdf').write_bytes(b'%PDF-1.4 precomputed')
+    monkeypatch.setitem(web.app.config, 'REPORTS_FOLDER', tmp_path / 'reports')
+    monkeypatch.setitem(web.app.config, 'PRECOMPUTED_REPORTS_FOLDER', reports_dir)
+    monkeypatch.setattr(web, 'ARTICLE_STORE_FILE', tmp_path / 'articles.sqlite3')
+    store = ArticleStore(tmp_path / 'articles.sqlite3')
+    store.save_report(web.report_namespace, FEEDS, 7, [{'title': 'post'}], str(reports_dir / 'tech_report_7d.pdf'))
+    store.close()
+
+    client = web.app.test_client()
+    report = client.get('/reports/7').get_json()
+    assert report['results'] == [{'title': 'post'}]
+    assert report['download_url'] == '/download/tech_report_7d.pdf'
+
+    download = client.get(report['download_url'])
+    assert download.status_code == 200 and download.data == b'%PDF-1.4 precomputed'
+    assert client.get('/download/tech_report_30d.pdf').status_code == 404
+    assert client.get('/reports/30').status_code == 404
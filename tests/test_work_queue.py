@@ -0,0 +1,131 @@
+import time
+import threading
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+from cto_signal_scanner.main import FeedDownload, ShardWorker, distributed_scan
+from cto_signal_scanner.utils.feed_parser import FeedEntry
+from cto_signal_scanner.utils.work_queue import (
+    BACKENDS, SQLiteWorkQueue, WorkQueue, open_work_queue, register_backend
+)
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = SQLiteWorkQueue(tmp_path / 'work_queue.sqlite3', lease_seconds=60, max_attempts=2)
+    yield queue
+    queue.close()
+
+def test_tasks_are_unique_per_run_and_claimed_once(queue, tmp_path):
+    assert queue.put('run', 'shard', '0', {'feeds': ['a']})
+    assert not queue.put('run', 'shard', '0', {'feeds': ['b']})
+    assert queue.put('run', 'evaluate', 'key', {})
+    assert queue.put('other', 'shard', '0', {})
+
+    other_node = SQLiteWorkQueue(tmp_path / 'work_queue.sqlite3')
+    [shard] = queue.claim('a', kinds=['shard'], run_id='run')
+    assert shard.payload == {'feeds': ['a']} and shard.attempts == 1
+    assert other_node.claim('b', limit=5, run_id='run')[0].kind == 'evaluate'
+    assert other_node.claim('b', run_id='run') == []
+    other_node.close()
+
+    assert queue.complete('a', shard.id, {'done': True})
+    assert queue.results('run', 'shard') == {'0': {'done': True}}
+    assert queue.unfinished('run') == 1
+
+def test_lapsed_lease_is_reclaimed_and_late_result_ignored(tmp_path):
+    queue = SQLiteWorkQueue(tmp_path / 'work_queue.sqlite3', lease_seconds=0.05, max_attempts=2)
+    queue.put('run', 'shard', '0', {})
+    [crashed] = queue.claim('crashed')
+    time.sleep(0.1)
+    [reclaimed] = queue.claim('healthy')
+    assert reclaimed.id == crashed.id and reclaimed.attempts == 2
+    assert not queue.complete('crashed', crashed.id, 'stale')
+    assert queue.heartbeat('crashed', [crashed.id]) == []
+
+    # A second lapse uses up the attempts
+    time.sleep(0.1)
+    assert queue.claim('third') == []
+    assert queue.failures('run') == {'shard:0': 'lease expired'}
+    assert queue.unfinished('run') == 0
+    queue.close()
+
+def test_heartbeat_keeps_the_lease(tmp_path):
+    queue = SQLiteWorkQueue(tmp_path / 'work_queue.sqlite3', lease_seconds=0.2)
+    queue.put('run', 'shard', '0', {})
+    [task] = queue.claim('worker')
+    for _ in range(3):
+        time.sleep(0.1)
+        assert queue.heartbeat('worker', [task.id]) == [task.id]
+    assert queue.claim('other') == []
+    queue.close()
+
+def test_failed_task_is_retried_then_given_up(queue):
+    queue.put('run', 'evaluate', 'key', {})
+    [task] = queue.claim('worker')
+    queue.fail('worker', task.id, 'timeout')
+    [task] = queue.claim('worker')
+    queue.fail('worker', task.id, 'timeout again')
+    assert queue.claim('worker') == []
+    assert queue.failures('run') == {'evaluate:key': 'timeout again'}
+
+def test_open_work_queue_by_url(tmp_path):
+    queue = open_work_queue(f"sqlite://{tmp_path / 'queue.sqlite3'}")
+    assert isinstance(queue, SQLiteWorkQueue) and queue.db_path == tmp_path / 'queue.sqlite3'
+    queue.close()
+    register_backend('memory', lambda location: SQLiteWorkQueue(':memory:'))
+    try:
+        memory_queue = open_work_queue('memory://')
+        assert memory_queue.put('run', 'shard', '0', {}) and memory_queue.unfinished('run') == 1
+        memory_queue.close()
+    finally:
+        BACKENDS.pop('memory')
+    with pytest.raises(ValueError):
+        open_work_queue('redis://localhost')
+
+def test_work_queue_is_abstract():
+    with pytest.raises(TypeError):
+        WorkQueue()
+
+def test_distributed_scan_merges_shards_from_several_nodes(tmp_path):
+    agent = MagicMock()
+    agent.get_current_prompt.return_value = 'prompt'
+    agent.model = 'test-model'
+    agent.system_message = 'system'
+    agent.parallel = 0
+    agent.evaluate_post.side_effect = lambda title, summary, link: {'summary': title, 'rating': '5', 'rationale': ''}
+    feeds = [f'https://feed{i}.example.com/rss' for i in range(5)]
+    now = datetime.utcnow()
+
+    def download(url, *args):
+        index = feeds.index(url)
+        entries = [FeedEntry(f'post{index}-{n}', f'https://example.com/{index}/{n}', f'post {index} {n}',
+                             now - timedelta(hours=n)) for n in range(2)]
+        # Every feed also carries the same syndicated article
+        entries.append(FeedEntry('shared', 'https://example.com/shared', 'shared article', now - timedelta(hours=3)))
+        return FeedDownload(url, entries=entries)
+
+    work_queue = SQLiteWorkQueue(tmp_path / 'work_queue.sqlite3')
+    stop = threading.Event()
+    with patch('cto_signal_scanner.main.FEEDS', feeds), \
+         patch('cto_signal_scanner.main.download_feed', side_effect=download), \
+         patch('cto_signal_scanner.main.GPTAgent', return_value=agent), \
+         patch('cto_signal_scanner.main.ReportGenerator'), \
+         patch('cto_signal_scanner.main.GPT_CACHE_FILE', tmp_path / 'gpt_cache.sqlite3'), \
+         patch('cto_signal_scanner.main.FeedCache'), \
+         patch.dict('os.environ', {'SCAN_SHARD_SIZE': '2'}):
+        nodes = [threading.Thread(target=ShardWorker(work_queue, f'node{i}', poll_interval=0.05).run,
+                                  kwargs={'stop': stop}, daemon=True) for i in range(2)]
+        for node in nodes:
+            node.start()
+        try:
+            results, _ = distributed_scan(days_back=1, work_queue=work_queue, participate=False, poll_interval=0.05)
+        finally:
+            stop.set()
+            for node in nodes:
+                node.join(10)
+
+    expected = [title for index in range(5) for title in (f'post{index}-0', f'post{index}-1', 'shared')]
+    assert [result['title'] for result in results] == expected
+    assert sorted(call.args[0] for call in agent.evaluate_post.call_args_list) == sorted(set(expected))
+    assert work_queue.unfinished('any') == 0
+    work_queue.close()